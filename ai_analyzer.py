@@ -4,7 +4,18 @@ import logging
 import re
 import requests
 import traceback
+import http_client
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from circuit_breaker import CircuitOpenError, get_breaker
+from rate_limiter import RateLimitTimeout, groq_limiter
+from result_cache import make_key, result_cache
+from cv_model import parse_cv
+from prompt_optimizer import (ANALYSIS_TOKEN_BUDGET, JOB_DESCRIPTION_TOKEN_BUDGET, SCORE_TOKEN_BUDGET,
+                              pack_text, packing_signature)
+from rule_engine import BASIC_RULES, get_rule_set
+from scoring import features_from_parsed_cv, get_score_summary, score_features
+from text_index import TextIndex
 
 # Groq API configuration
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "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")
@@ -14,7 +25,9 @@ GROQ_MODEL = "llama3-70b-8192"  # Using Llama-3 70B model
 groq_client = None
 try:
     from groq import Groq
-    groq_client = Groq(api_key=GROQ_API_KEY)
+    # 429s are retried by the shared rate limiter, which tells all workers to back off
+    groq_client = Groq(api_key=GROQ_API_KEY, http_client=http_client.create_groq_http_client(),
+                       max_retries=0 if groq_limiter.enabled else 2)
     logging.info("Groq client initialized successfully")
 except ImportError:
     logging.error("Failed to import Groq client. Make sure the groq package is installed.")
@@ -26,6 +39,23 @@ DEEPINFRA_API_KEY = GROQ_API_KEY
 DEEPINFRA_MODEL = "meta-llama/Llama-3-8b-instruct"
 DEEPINFRA_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
+# Prompt versions, part of the result cache key; bump when a prompt changes
+ANALYSIS_PROMPT_VERSION = "2"
+SCORE_PROMPT_VERSION = "2"
+ANSCHREIBEN_PROMPT_VERSION = "2"
+COMBINED_PROMPT_VERSION = "2"
+
+# Combined analysis mode: one structured-output call returns corrections and score together
+COMBINED_ANALYSIS = os.environ.get("COMBINED_ANALYSIS", "0") == "1"
+
+# Chunked analysis of long CVs; chunks must fit into the analysis prompt.
+# Every chunk is one Groq call, so the chunks of a long CV share the rate
+# limit (see GROQ_TOKENS_PER_MINUTE); chunks that get no capacity are skipped.
+ANALYSIS_CHUNK_SIZE = int(os.environ.get("ANALYSIS_CHUNK_SIZE", "2500"))
+ANALYSIS_CHUNK_OVERLAP = int(os.environ.get("ANALYSIS_CHUNK_OVERLAP", "300"))
+ANALYSIS_MAX_CHUNKS = int(os.environ.get("ANALYSIS_MAX_CHUNKS", "8"))
+ANALYSIS_CHUNK_CONCURRENCY = int(os.environ.get("ANALYSIS_CHUNK_CONCURRENCY", "4"))
+
 # Headers for API requests
 deepinfra_headers = {
     "Authorization": f"Bearer {GROQ_API_KEY}",
@@ -42,6 +72,150 @@ huggingface_headers = {
     "Content-Type": "application/json"
 }
 
+# Circuit breakers for the LLM backends; while open, callers go straight to the rule-based paths
+groq_breaker = get_breaker('groq')
+huggingface_breaker = get_breaker('huggingface')
+
+def is_http_failure(response):
+    """
+    Check whether an HTTP response means the backend is failing.
+    
+    Groq 429s never reach this check: the rate limiter backs off and
+    retries them without recording them on the breaker.
+    """
+    return response.status_code >= 500 or response.status_code == 429
+
+# Thread pool for running independent LLM calls side by side
+llm_executor = ThreadPoolExecutor(max_workers=http_client.LLM_POOL_WORKERS, thread_name_prefix="llm")
+
+# Separate pool for chunk requests, which also bounds their concurrency per process
+chunk_executor = ThreadPoolExecutor(max_workers=ANALYSIS_CHUNK_CONCURRENCY, thread_name_prefix="llm-chunk")
+
+def analyze_and_score(resume_text, language='en'):
+    """
+    Analyze and score a CV concurrently.
+    
+    The scoring call is submitted to the shared LLM thread pool while the
+    analysis runs in the calling thread, so the total latency is that of
+    the slower call rather than the sum of both.
+    
+    Args:
+        resume_text (str): The CV text to analyze
+        language (str): Language for the analysis ('en' or 'de')
+    
+    Returns:
+        tuple: (corrections, score_data); score_data is None if scoring failed
+    """
+    if COMBINED_ANALYSIS:
+        combined = analyze_and_score_combined(resume_text, language)
+        if combined:
+            return combined
+        logging.warning("Combined analysis failed, using separate analysis and scoring calls")
+    
+    score_future = llm_executor.submit(score_resume, resume_text, language)
+    
+    corrections = analyze_resume(resume_text, language)
+    
+    try:
+        score_data = score_future.result()
+    except Exception as e:
+        logging.error(f"Error scoring CV: {str(e)}")
+        score_data = None
+    
+    return corrections, score_data
+
+def analyze_and_score_combined(resume_text, language='en'):
+    """
+    Analyze and score a CV with a single structured-output Groq request.
+    
+    The CV is sent once and the model returns both the corrections array and
+    the score object, which are parsed into the same shapes as
+    analyze_resume() and score_resume() produce.
+    
+    Args:
+        resume_text (str): The CV text to analyze
+        language (str): Language for the suggestions and summary ('en' or 'de')
+    
+    Returns:
+        tuple: (corrections, score_data), or None if the request or parsing failed
+    """
+    if not groq_client or groq_breaker.is_open():
+        return None
+    
+    cache_key = make_key(resume_text, language, GROQ_MODEL, COMBINED_PROMPT_VERSION,
+                         packing_signature(SCORE_TOKEN_BUDGET))
+    cached = result_cache.get('combined', cache_key)
+    if cached is not None:
+        logging.info("Using cached combined CV analysis")
+        return build_corrections(resume_text, cached['corrections']), cached['score']
+    
+    system_prompt = """You are an expert CV reviewer and HR specialist for the German job market.
+    You review a CV, suggest specific improvements and score it according to German application standards.
+    You always answer with a single JSON object and nothing else."""
+    
+    packed = pack_text(resume_text, SCORE_TOKEN_BUDGET)
+    output_language = "German" if language == 'de' else "English"
+    user_prompt = f"""Review and score this CV for the German job market:
+
+{packed.text}
+
+1. Provide precise improvement suggestions. Each "original" must be copied exactly from the CV.
+   For a CV with low scores (below 50/100), provide at least 7-10 substantial suggestions.
+2. Score the CV from 0-100 in these categories:
+   content (qualifications, experience, achievements) - 40%,
+   format (structure, clarity, layout) - 30%,
+   language (grammar, terminology, professionalism) - 15%,
+   conciseness (brevity, relevance, focus) - 15%.
+
+Write explanations and the summary in {output_language}. Answer with this JSON object:
+{{
+  "corrections": [
+    {{
+      "original": "The text that needs improvement",
+      "suggestion": "The improved text",
+      "explanation": "Why this change improves the CV",
+      "category": "One of: grammar, formatting, clarity, professional language, content, achievement, skills"
+    }}
+  ],
+  "score": {{
+    "overall": 0,
+    "categories": {{"content": 0, "format": 0, "language": 0, "conciseness": 0}},
+    "summary": "Short summary in 1-2 sentences"
+  }}
+}}
+"""
+
+    try:
+        response = groq_limiter.call(
+            groq_client.chat.completions.create,
+            model=GROQ_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.3,
+            max_tokens=2500,
+            response_format={"type": "json_object"},
+            breaker=groq_breaker
+        )
+        
+        result = json.loads(response.choices[0].message.content)
+        suggestions = result.get("corrections")
+        score_data = result.get("score")
+        if not isinstance(suggestions, list) or not isinstance(score_data, dict):
+            raise ValueError("Combined response is missing corrections or score")
+        if "overall" not in score_data or not isinstance(score_data.get("categories"), dict):
+            raise ValueError("Combined response has an incomplete score")
+        
+        corrections = build_corrections(resume_text, suggestions, packed)
+        result_cache.set('combined', cache_key, {"corrections": corrections, "score": score_data})
+        logging.info(f"Combined analysis successful, found {len(corrections)} suggestions")
+        return corrections, score_data
+    
+    except Exception as e:
+        logging.error(f"Error in combined analysis: {str(e)}")
+        return None
+
 def analyze_resume(resume_text, language='en'):
     """
     Analyze CV text using AI to provide improvement suggestions.
@@ -49,7 +223,7 @@ def analyze_resume(resume_text, language='en'):
     Args:
         resume_text (str): The CV text to analyze
         language (str): Language for the analysis ('en' or 'de')
-        
+    
     Returns:
         list: A list of correction suggestions with their positions and explanations
     """
@@ -65,7 +239,7 @@ def analyze_resume(resume_text, language='en'):
                 logging.warning("DeepInfra API returned no corrections")
             except Exception as api_error:
                 logging.error(f"DeepInfra API analysis error: {str(api_error)}")
-                
+        
         # Fallback to rules-based analysis
         logging.info("Using enhanced fallback analysis for CV corrections")
         fallback_corrections = perform_enhanced_analysis(resume_text, language)
@@ -86,7 +260,7 @@ def split_text_into_segments(text, max_segment_length=200):
     Args:
         text (str): The text to split
         max_segment_length (int): Maximum length of each segment
-        
+    
     Returns:
         list: List of text segments
     """
@@ -100,7 +274,7 @@ def split_text_into_segments(text, max_segment_length=200):
         # Skip empty sentences
         if not sentence.strip():
             continue
-            
+        
         # If adding this sentence would exceed max length, start a new segment
         if len(current_segment) + len(sentence) > max_segment_length and current_segment:
             segments.append(current_segment.strip())
@@ -124,7 +298,7 @@ def analyze_segment(segment, full_text):
     Args:
         segment (str): The text segment to analyze
         full_text (str): The full CV text (for position calculation)
-        
+    
     Returns:
         list: Corrections for this segment
     """
@@ -135,16 +309,18 @@ def analyze_segment(segment, full_text):
         if not HUGGINGFACE_API_KEY:
             logging.error("No Hugging Face API key provided")
             return []
-            
+        
         # Prepare payload
         payload = json.dumps({"inputs": segment})
         
         # Make request to Hugging Face API
-        response = requests.post(
+        response = huggingface_breaker.call(
+            http_client.post,
             HUGGINGFACE_API_URL,
             headers=huggingface_headers,
             data=payload,
-            timeout=10  # 10 second timeout
+            read_timeout=10,  # 10 second timeout
+            is_failure=is_http_failure
         )
         
         # Check for successful response
@@ -161,22 +337,16 @@ def analyze_segment(segment, full_text):
                     return []
                 
                 # Find the position of segment in full text
-                segment_start = full_text.find(segment)
-                if segment_start == -1:
-                    # If exact match not found, try case-insensitive
-                    pattern = re.escape(segment)
-                    matches = list(re.finditer(pattern, full_text, re.IGNORECASE))
-                    if matches:
-                        segment_start = matches[0].start()
-                    else:
-                        # Skip if segment can't be located
-                        logging.warning(f"Segment not found in full text: {segment[:30]}...")
-                        return []
-                        
+                span = TextIndex(full_text).locate_all([segment])[0]
+                if span is None:
+                    # Skip if segment can't be located
+                    logging.warning(f"Segment not found in full text: {segment[:30]}...")
+                    return []
+                
                 # Create a correction
                 correction = {
-                    "original": original_text,
-                    "position": {"start": segment_start, "end": segment_start + len(original_text)},
+                    "original": full_text[span[0]:span[1]],
+                    "position": {"start": span[0], "end": span[1]},
                     "suggestion": corrected_text,
                     "explanation": "Improved grammar and clarity",
                     "category": "grammar"
@@ -185,7 +355,9 @@ def analyze_segment(segment, full_text):
                 corrections.append(correction)
         else:
             logging.warning(f"Hugging Face API error: {response.status_code}, {response.text}")
-            
+    
+    except CircuitOpenError as e:
+        logging.info(f"Skipping Hugging Face API: {str(e)}")
     except requests.exceptions.RequestException as e:
         logging.warning(f"Hugging Face API request failed: {str(e)}")
     except (KeyError, IndexError, json.JSONDecodeError) as e:
@@ -202,93 +374,11 @@ def perform_fallback_analysis(text):
     
     Args:
         text (str): The CV text to analyze
-        
+    
     Returns:
         list: List of corrections
     """
-    corrections = []
-    
-    # Common CV improvements to check for
-    checks = [
-        {
-            "pattern": r"\bresponsible for\b",
-            "replacement": "managed",
-            "explanation": "Use action verbs instead of passive phrases",
-            "category": "clarity"
-        },
-        {
-            "pattern": r"\bhelped\b",
-            "replacement": "assisted",
-            "explanation": "Use more professional terminology",
-            "category": "professional language"
-        },
-        {
-            "pattern": r"\bi\b",
-            "replacement": "",
-            "explanation": "Avoid using first-person pronouns in CVs",
-            "category": "professional language"
-        },
-        {
-            "pattern": r"\bteam player\b",
-            "replacement": "collaborative professional",
-            "explanation": "Avoid overused phrases and clichés",
-            "category": "content"
-        },
-        {
-            "pattern": r"\bms office\b",
-            "replacement": "Microsoft Office",
-            "explanation": "Use proper capitalization for product names",
-            "category": "formatting"
-        },
-        {
-            "pattern": r"\b(?:gute|sehr gute|ausgezeichnete)\s+kenntnisse\b",
-            "replacement": "Fortgeschrittene Kenntnisse",
-            "explanation": "Be more specific and professional in describing skills",
-            "category": "professional language"
-        },
-        {
-            "pattern": r"\bargts", 
-            "replacement": "arbeitet",
-            "explanation": "Use full words instead of abbreviations",
-            "category": "professional language"
-        },
-        {
-            "pattern": r"\binteragirt\b",
-            "replacement": "interagiert",
-            "explanation": "Fix spelling errors",
-            "category": "spelling"
-        },
-    ]
-    
-    for check in checks:
-        for match in re.finditer(check["pattern"], text, re.IGNORECASE):
-            start_pos = match.start()
-            end_pos = match.end()
-            original_text = text[start_pos:end_pos]
-            
-            # Create replacement based on case of original
-            if original_text.isupper():
-                replacement = check["replacement"].upper()
-            elif original_text[0].isupper():
-                replacement = check["replacement"].capitalize()
-            else:
-                replacement = check["replacement"]
-                
-            # Skip if replacement would be empty
-            if not replacement:
-                continue
-                
-            correction = {
-                "original": original_text,
-                "position": {"start": start_pos, "end": end_pos},
-                "suggestion": replacement,
-                "explanation": check["explanation"],
-                "category": check["category"]
-            }
-            
-            corrections.append(correction)
-    
-    return corrections
+    return BASIC_RULES.scan(text)
 
 
 def generate_anschreiben(resume_text, job_description):
@@ -298,7 +388,7 @@ def generate_anschreiben(resume_text, job_description):
     Args:
         resume_text (str): The CV text to analyze
         job_description (str): The job description text
-        
+    
     Returns:
         str: Generated cover letter text
     """
@@ -308,51 +398,43 @@ def generate_anschreiben(resume_text, job_description):
         job_title = extract_job_title(job_description)
         company_name = extract_company_name(job_description)
         
-        # First try using Groq
-        if groq_client:
+        # First try using Groq, unless its circuit breaker is open
+        if groq_client and not groq_breaker.is_open():
             try:
                 logging.info("Using Groq to generate Anschreiben")
                 
-                system_prompt = """You are an expert in writing professional cover letters (Anschreiben) for 
-                German job applications. Create a formal, professional cover letter that matches the applicant's 
-                qualifications to the job requirements. Follow German business letter standards."""
+                system_prompt, user_prompt = build_anschreiben_prompts(job_description, job_title, company_name, skills_info)
                 
-                user_prompt = f"""Create a personalized cover letter (Anschreiben) in German based on the following information:
-                
-                CV Highlights:
-                Technical Skills: {', '.join(skills_info['technical_skills'][:5])}
-                Languages: {', '.join(skills_info['languages'][:3])}
-                Education: {', '.join(skills_info['education'][:2])}
-                Experience: {', '.join(skills_info['experience'][:3])}
-                
-                Job Position: {job_title}
-                Company: {company_name}
-                
-                Job Description:
-                {job_description[:500]}
-                
-                Format as a proper German business letter with all standard sections.
-                """
+                cache_key = make_key(resume_text, job_description, GROQ_MODEL, ANSCHREIBEN_PROMPT_VERSION,
+                                     packing_signature(JOB_DESCRIPTION_TOKEN_BUDGET))
+                cached = result_cache.get('anschreiben', cache_key)
+                if cached is not None:
+                    logging.info("Using cached Anschreiben")
+                    return cached
                 
                 # Make API call to Groq
-                response = groq_client.chat.completions.create(
+                response = groq_limiter.call(
+                    groq_client.chat.completions.create,
                     model=GROQ_MODEL,
                     messages=[
                         {"role": "system", "content": system_prompt},
                         {"role": "user", "content": user_prompt}
                     ],
                     temperature=0.7,
-                    max_tokens=1000
+                    max_tokens=1000,
+                    breaker=groq_breaker
                 )
                 
                 # Extract the generated content
                 if response and response.choices and len(response.choices) > 0:
                     logging.info("Groq successfully generated Anschreiben")
                     anschreiben_text = response.choices[0].message.content
+                    if anschreiben_text:
+                        result_cache.set('anschreiben', cache_key, anschreiben_text)
                     return anschreiben_text
                 else:
                     logging.warning("Empty response from Groq API")
-                    
+            
             except Exception as groq_error:
                 logging.error(f"Groq API error: {str(groq_error)}")
                 logging.error(f"Will fall back to template-based generation")
@@ -360,7 +442,7 @@ def generate_anschreiben(resume_text, job_description):
         # If Groq fails or not available, fall back to template
         logging.info("Using template-based approach for Anschreiben generation")
         return generate_template_anschreiben(resume_text, job_description, job_title, company_name, skills_info)
-        
+    
     except Exception as e:
         logging.error(f"Error generating Anschreiben: {str(e)}")
         logging.error(f"Stack trace: {traceback.format_exc()}")
@@ -378,68 +460,121 @@ def generate_anschreiben(resume_text, job_description):
             return "Fehler bei der Erstellung des Anschreibens. Bitte versuchen Sie es später erneut."
 
 
-def extract_skills_from_resume(resume_text):
+def build_anschreiben_prompts(job_description, job_title, company_name, skills_info):
     """
-    Extract skills and key information from CV text.
+    Build the system and user prompts for cover letter generation.
     
     Args:
-        resume_text (str): The CV text to analyze
-        
+        job_description (str): The job description text
+        job_title (str): The extracted job title
+        company_name (str): The extracted company name
+        skills_info (dict): Extracted skills and information
+    
     Returns:
-        dict: Extracted skills and information
+        tuple: (system_prompt, user_prompt)
     """
-    skills = {
-        "technical_skills": [],
-        "languages": [],
-        "education": [],
-        "experience": []
-    }
-    
-    # Extract languages (simplified approach)
-    language_patterns = [
-        r"\b(?:Deutsch|Englisch|Französisch|Spanisch|Italienisch|Russisch|Chinesisch|Japanisch)\b(?:\s+\((?:Muttersprache|[BCG][12]|fließend|verhandlungssicher|Grundkenntnisse)\))?",
-        r"\b(?:German|English|French|Spanish|Italian|Russian|Chinese|Japanese)\b(?:\s+\((?:native|[BCG][12]|fluent|business|basic)\))?"
-    ]
+    system_prompt = """You are an expert in writing professional cover letters (Anschreiben) for 
+                German job applications. Create a formal, professional cover letter that matches the applicant's 
+                qualifications to the job requirements. Follow German business letter standards."""
     
-    for pattern in language_patterns:
-        matches = re.findall(pattern, resume_text, re.IGNORECASE)
-        skills["languages"].extend(matches)
+    user_prompt = f"""Create a personalized cover letter (Anschreiben) in German based on the following information:
     
-    # Extract technical skills (simplified)
-    tech_patterns = [
-        r"\b(?:Java|Python|C\+\+|JavaScript|SQL|PHP|HTML|CSS|React|Angular|Vue|Node\.js|Excel|Word|PowerPoint|SAP)\b"
-    ]
+                CV Highlights:
+                Technical Skills: {', '.join(skills_info['technical_skills'][:5])}
+                Languages: {', '.join(skills_info['languages'][:3])}
+                Education: {', '.join(skills_info['education'][:2])}
+                Experience: {', '.join(skills_info['experience'][:3])}
+                
+                Job Position: {job_title}
+                Company: {company_name}
+                
+                Job Description:
+                {pack_text(job_description, JOB_DESCRIPTION_TOKEN_BUDGET, use_sections=False).text}
+                
+                Format as a proper German business letter with all standard sections.
+                """
     
-    for pattern in tech_patterns:
-        matches = re.findall(pattern, resume_text, re.IGNORECASE)
-        skills["technical_skills"].extend(matches)
+    return system_prompt, user_prompt
+
+
+def stream_anschreiben(resume_text, job_description):
+    """
+    Generate a cover letter, yielding the text as Groq produces it.
     
-    # Extract education information (simplified)
-    edu_patterns = [
-        r"(?:Universität|Hochschule|Fachhochschule|University|College|Institute)[^\n.]{3,50}",
-        r"(?:Bachelor|Master|Diplom|Promotion|PhD|Dr\.)[^\n.]{3,50}"
-    ]
+    Yields ('delta', text) for each streamed chunk. If Groq is unavailable or
+    the stream breaks, yields ('replace', text) with the complete template-based
+    letter, which supersedes any chunks sent before.
     
-    for pattern in edu_patterns:
-        matches = re.findall(pattern, resume_text, re.IGNORECASE)
-        skills["education"].extend(matches)
+    Args:
+        resume_text (str): The CV text to analyze
+        job_description (str): The job description text
     
-    # Extract job experiences (simplified)
-    exp_patterns = [
-        r"(?:Software Engineer|Developer|Entwickler|Projektmanager|Manager|Consultant|Berater)[^\n.]{3,50}"
-    ]
+    Yields:
+        tuple: (event, text) where event is 'delta' or 'replace'
+    """
+    skills_info = extract_skills_from_resume(resume_text)
+    job_title = extract_job_title(job_description)
+    company_name = extract_company_name(job_description)
+    
+    if groq_client and not groq_breaker.is_open():
+        cache_key = make_key(resume_text, job_description, GROQ_MODEL, ANSCHREIBEN_PROMPT_VERSION,
+                             packing_signature(JOB_DESCRIPTION_TOKEN_BUDGET))
+        cached = result_cache.get('anschreiben', cache_key)
+        if cached is not None:
+            logging.info("Using cached Anschreiben")
+            yield 'replace', cached
+            return
+        
+        try:
+            logging.info("Streaming Anschreiben from Groq")
+            system_prompt, user_prompt = build_anschreiben_prompts(job_description, job_title, company_name, skills_info)
+            
+            stream = groq_limiter.call(
+                groq_client.chat.completions.create,
+                model=GROQ_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.7,
+                max_tokens=1000,
+                stream=True,
+                breaker=groq_breaker
+            )
+            
+            parts = []
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield 'delta', chunk.choices[0].delta.content
+            
+            if parts:
+                logging.info("Groq successfully streamed Anschreiben")
+                result_cache.set('anschreiben', cache_key, "".join(parts))
+                return
+            logging.warning("Empty response from Groq API")
+        
+        except Exception as groq_error:
+            logging.error(f"Groq streaming error: {str(groq_error)}")
+            logging.error(f"Will fall back to template-based generation")
     
-    for pattern in exp_patterns:
-        matches = re.findall(pattern, resume_text, re.IGNORECASE)
-        skills["experience"].extend(matches)
+    logging.info("Using template-based approach for Anschreiben generation")
+    yield 'replace', generate_template_anschreiben(resume_text, job_description, job_title, company_name, skills_info)
+
+
+def extract_skills_from_resume(resume_text):
+    """
+    Extract skills and key information from CV text.
     
-    # Remove duplicates
-    skills["languages"] = list(set(skills["languages"]))
-    skills["technical_skills"] = list(set(skills["technical_skills"]))
-    skills["education"] = list(set(skills["education"]))
-    skills["experience"] = list(set(skills["experience"]))
+    Args:
+        resume_text (str): The CV text to analyze
     
-    return skills
+    Returns:
+        dict: Extracted skills and information
+    """
+    # Skills are extracted once per CV as part of its document model
+    skills = parse_cv(resume_text).skills
+    return {key: list(values) for key, values in skills.items()}
 
 
 def parse_anschreiben_from_response(api_response):
@@ -448,7 +583,7 @@ def parse_anschreiben_from_response(api_response):
     
     Args:
         api_response: The API response to parse
-        
+    
     Returns:
         str: Cleaned Anschreiben text
     """
@@ -459,7 +594,7 @@ def parse_anschreiben_from_response(api_response):
         # If it's a string already, just use it
         if isinstance(api_response, str):
             return api_response.strip()
-            
+        
         # If it's a list from Hugging Face API
         if isinstance(api_response, list) and len(api_response) > 0:
             generated_text = api_response[0].get("generated_text", "")
@@ -487,7 +622,7 @@ def parse_anschreiben_from_response(api_response):
         anschreiben = re.sub(r'<\/s>$', '', anschreiben).strip()
         
         return anschreiben
-        
+    
     except Exception as e:
         logging.error(f"Error parsing Anschreiben response: {str(e)}")
         return "Error generating Anschreiben. Please try again."
@@ -499,7 +634,7 @@ def extract_job_title(job_description):
     
     Args:
         job_description (str): The job description text
-        
+    
     Returns:
         str: Extracted job title
     """
@@ -525,7 +660,7 @@ def extract_company_name(job_description):
     
     Args:
         job_description (str): The job description text
-        
+    
     Returns:
         str: Extracted company name
     """
@@ -551,7 +686,7 @@ def score_resume(resume_text, language='en'):
     Args:
         resume_text (str): The CV text to analyze
         language (str): Language for the summary and tips ('en' or 'de')
-        
+    
     Returns:
         dict: Score details including overall score and category scores
     """
@@ -563,81 +698,8 @@ def score_resume(resume_text, language='en'):
         logging.error(traceback.format_exc())
         
         # Fallback to rule-based scoring
-        scores = {}
-        
-        # Content score (40%)
-        content_score = 0
-        
-        # Check for achievements with numbers
-        achievement_pattern = r"\b(?:increased|improved|reduced|saved|achieved|developed|launched|managed|led)\b.*?\b\d+(?:\.\d+)?%?\b"
-        achievements = re.findall(achievement_pattern, resume_text, re.IGNORECASE)
-        content_score += min(len(achievements) * 5, 20)  # 5 points per achievement, max 20
-        
-        # Check for skills section
-        if re.search(r"\b(?:skills|fähigkeiten|kenntnisse|kompetenzen)\b", resume_text, re.IGNORECASE):
-            content_score += 10
-            
-        # Check for education details
-        if re.search(r"\b(?:bachelor|master|diplom|doktor|phd|ausbildung|studium|university|hochschule|universität)\b", resume_text, re.IGNORECASE):
-            content_score += 10
-        
-        # Format score (30%)
-        format_score = 0
-        
-        # Check for bullet points
-        bullet_points = re.findall(r"(?:^|\n)\s*(?:•|-|\*|\d+\.)\s+", resume_text)
-        format_score += min(len(bullet_points) * 2, 15)  # 2 points per bullet, max 15
-        
-        # Check for sections
-        section_headers = re.findall(r"(?:^|\n)(?:[A-Z][A-Za-z\s]+:|\b(?:EDUCATION|EXPERIENCE|SKILLS|PROJECTS|AUSBILDUNG|BERUFSERFAHRUNG|FÄHIGKEITEN|PROJEKTE)\b)", resume_text)
-        format_score += min(len(section_headers) * 3, 15)  # 3 points per section, max 15
-        
-        # Language score (15%)
-        language_score = 0
-        
-        # Check for grammatical errors (simplistic)
-        grammar_patterns = [
-            r"\bi\s+(?:has|have|is|am|are|was|were)\b",  # Subject-verb agreement issues
-            r"\b(?:a|an)\s+(?:[aeiou]|hour|honor)",       # A/An issues
-            r"\b(?:he|she|it|they)\s+(?:has|have|is|am|are|was|were)\b"  # More subject-verb agreement
-        ]
-        grammar_errors = 0
-        for pattern in grammar_patterns:
-            grammar_errors += len(re.findall(pattern, resume_text, re.IGNORECASE))
-            
-        # Give up to 15 points for good grammar
-        language_score += max(0, 15 - grammar_errors * 5)  # Subtract 5 points per error
-        
-        # Conciseness score (15%)
-        conciseness_score = 0
-        
-        # Count words
-        word_count = len(resume_text.split())
-        
-        # Ideal range: 300-600 words
-        if 300 <= word_count <= 600:
-            conciseness_score = 15
-        elif word_count < 300:
-            conciseness_score = word_count / 300 * 15  # Proportional to minimum
-        else:
-            conciseness_score = max(0, 15 - (word_count - 600) / 100)  # Subtract 1 point per 100 words over
-            
-        # Calculate overall score (weighted average)
-        overall_score = (content_score * 0.4) + (format_score * 0.3) + (language_score * 0.15) + (conciseness_score * 0.15)
-        
-        # Prepare result
-        scores = {
-            "overall": round(overall_score),
-            "categories": {
-                "content": round(content_score * 100 / 40),  # Convert to 100-point scale
-                "format": round(format_score * 100 / 30),
-                "language": round(language_score * 100 / 15),
-                "conciseness": round(conciseness_score * 100 / 15)
-            },
-            "summary": get_score_summary(round(overall_score), language)
-        }
-        
-        return scores
+        features = features_from_parsed_cv(parse_cv(resume_text))
+        return score_features([features], language)[0]
 
 
 def score_resume_with_api(resume_text, language='en'):
@@ -647,10 +709,20 @@ def score_resume_with_api(resume_text, language='en'):
     Args:
         resume_text (str): The CV text to analyze
         language (str): Language for the summary and tips ('en' or 'de')
-        
+    
     Returns:
         dict: Score details including overall score and category scores
     """
+    cache_key = make_key(resume_text, language, DEEPINFRA_MODEL, SCORE_PROMPT_VERSION,
+                         packing_signature(SCORE_TOKEN_BUDGET))
+    cached = result_cache.get('score', cache_key)
+    if cached is not None:
+        logging.info("Using cached CV score")
+        return cached
+    
+    if groq_breaker.is_open():
+        raise CircuitOpenError("Circuit breaker 'groq' is open")
+    
     try:
         # Prepare a prompt for DeepInfra based on German standards
         system_prompt = """Du bist ein deutscher HR-Experte, der Lebensläufe basierend auf 
@@ -659,7 +731,7 @@ def score_resume_with_api(resume_text, language='en'):
         
         user_prompt = f"""Bewerte folgenden Lebenslauf nach deutschen Standards (0-100 Punkte):
 
-{resume_text[:3000]}
+{pack_text(resume_text, SCORE_TOKEN_BUDGET).text}
 
 Bewerte die folgenden Kategorien:
 1. Inhalt (Qualifikationen, Erfahrungen, Leistungen) - 40%
@@ -679,9 +751,10 @@ Antwort NUR in diesem JSON-Format (ohne weitere Erklärungen):
   "summary": [Kurze Zusammenfassung in 1-2 Sätzen]
 }}
 """
-        
+
         # Call DeepInfra API
-        response = requests.post(
+        response = groq_limiter.call(
+            http_client.post,
             DEEPINFRA_API_URL,
             headers=deepinfra_headers,
             json={
@@ -693,7 +766,9 @@ Antwort NUR in diesem JSON-Format (ohne weitere Erklärungen):
                 "temperature": 0.3,
                 "max_tokens": 500
             },
-            timeout=30
+            read_timeout=30,
+            breaker=groq_breaker,
+            is_failure=is_http_failure
         )
         
         if response.status_code == 200:
@@ -704,6 +779,7 @@ Antwort NUR in diesem JSON-Format (ohne weitere Erklärungen):
             json_match = re.search(r'({[\s\S]*})', result_text)
             if json_match:
                 result_json = json.loads(json_match.group(1))
+                result_cache.set('score', cache_key, result_json)
                 return result_json
             else:
                 raise ValueError("Could not extract JSON from API response")
@@ -711,59 +787,12 @@ Antwort NUR in diesem JSON-Format (ohne weitere Erklärungen):
             # Handle API errors
             logging.error(f"DeepInfra API error ({response.status_code}): {response.text}")
             raise Exception(f"API error: {response.status_code}")
-            
+    
     except Exception as e:
         logging.error(f"Error in API-based scoring: {str(e)}")
         raise e
 
 
-def get_score_summary(score, language='en'):
-    """
-    Get a summary message based on the overall score.
-    
-    Args:
-        score (int): The overall score (0-100)
-        language (str): Language for the summary ('en' or 'de')
-        
-    Returns:
-        str: A summary message
-    """
-    if language == 'de':
-        if score >= 90:
-            return "Ausgezeichneter Lebenslauf, der deutsche Standards hervorragend erfüllt. Sofort einsatzbereit."
-        elif score >= 80:
-            return "Sehr guter Lebenslauf mit wenigen Verbesserungsmöglichkeiten."
-        elif score >= 70:
-            return "Guter Lebenslauf, der grundlegende Anforderungen erfüllt, aber noch optimiert werden kann."
-        elif score >= 60:
-            return "Solider Lebenslauf mit mehreren Verbesserungsmöglichkeiten."
-        elif score >= 50:
-            return "Durchschnittlicher Lebenslauf, der deutliche Überarbeitung benötigt."
-        elif score >= 40:
-            return "Schwacher Lebenslauf, der erhebliche Verbesserungen erfordert."
-        elif score >= 30:
-            return "Unzureichender Lebenslauf mit grundlegenden Mängeln."
-        else:
-            return "Kritisch mangelhafter Lebenslauf, der eine komplette Überarbeitung benötigt."
-    else:  # default to English
-        if score >= 90:
-            return "Excellent CV that meets German standards exceptionally well. Ready for immediate use."
-        elif score >= 80:
-            return "Very good CV with few areas for improvement."
-        elif score >= 70:
-            return "Good CV that meets basic requirements but can still be optimized."
-        elif score >= 60:
-            return "Solid CV with several areas for improvement."
-        elif score >= 50:
-            return "Average CV that needs significant revision."
-        elif score >= 40:
-            return "Weak CV that requires substantial improvements."
-        elif score >= 30:
-            return "Insufficient CV with fundamental deficiencies."
-        else:
-            return "Critical deficiencies in CV, requires complete revision."
-
-
 def generate_template_anschreiben(resume_text, job_description, job_title, company_name, skills_info):
     """
     Generate Anschreiben using a template-based approach.
@@ -774,7 +803,7 @@ def generate_template_anschreiben(resume_text, job_description, job_title, compa
         job_title (str): The extracted job title
         company_name (str): The extracted company name
         skills_info (dict): Extracted skills and information
-        
+    
     Returns:
         str: Generated Anschreiben text
     """
@@ -812,7 +841,7 @@ Sehr geehrte Damen und Herren,
 
 ich bewerbe mich hiermit um die ausgeschriebene Stelle als {job_title} bei {company_name}, da mein Profil sehr gut zu Ihren Anforderungen passt.
 '''
-    
+
     # Add sections based on extracted information
     if skills_info.get('technical_skills'):
         technical_skills = ', '.join(skills_info['technical_skills'][:5])
@@ -838,23 +867,213 @@ Mit freundlichen Grüßen,
 
 {sender_name}
 '''
-    
+
     return anschreiben
 
 
+def build_corrections(resume_text, suggestions, packed=None):
+    """
+    Locate LLM suggestions in the CV text and turn them into corrections.
+    
+    Args:
+        resume_text (str): The CV text the suggestions refer to
+        suggestions (list): Dicts with "original", "suggestion", "explanation" and "category"
+        packed (PackedText): The packed excerpt the model saw, if the prompt didn't contain resume_text itself
+    
+    Returns:
+        list: Corrections with positions; suggestions that can't be located are skipped
+    """
+    # Resolve all spans in one batch so repeated phrases get distinct positions
+    originals = [suggestion.get("original", "") for suggestion in suggestions]
+    if packed is None:
+        spans = TextIndex(resume_text).locate_all(originals)
+    else:
+        # Quotes follow the packed text, e.g. its collapsed whitespace; map them back to the CV.
+        # Spans across dropped lines don't map back and are skipped like unlocated ones.
+        spans = [packed.to_original(*span) if span else None
+                 for span in TextIndex(packed.text).locate_all(originals)]
+    
+    corrections = []
+    for suggestion, span in zip(suggestions, spans):
+        # Skip this suggestion if text can't be located
+        if span is None:
+            continue
+        
+        start_pos, end_pos = span
+        
+        # Create correction with detailed information
+        correction = {
+            "original": resume_text[start_pos:end_pos],
+            "position": {"start": start_pos, "end": end_pos},
+            "suggestion": suggestion.get("suggestion", ""),
+            "explanation": suggestion.get("explanation", "Improves CV presentation"),
+            "category": suggestion.get("category", "content")
+        }
+        
+        corrections.append(correction)
+    
+    return corrections
+
+
 def analyze_with_deepinfra(resume_text, language='en'):
     """
     Analyze a CV using Groq's Llama-3-70b model for comprehensive improvement suggestions.
     
+    Results are cached by content; on a cache hit the stored suggestions are
+    located again in the given text, so positions always match it.
+    
     Args:
         resume_text (str): The CV text to analyze
         language (str): Language for the analysis ('en' or 'de')
-        
+    
     Returns:
         list: A list of correction suggestions with specific improvements
     """
+    cache_key = make_key(resume_text, language, GROQ_MODEL, DEEPINFRA_MODEL, ANALYSIS_PROMPT_VERSION,
+                         packing_signature(ANALYSIS_TOKEN_BUDGET))
+    cached = result_cache.get('analysis', cache_key)
+    if cached is not None:
+        logging.info("Using cached CV analysis")
+        return build_corrections(resume_text, cached)
+    
+    if groq_breaker.is_open():
+        logging.info("Skipping Groq analysis, circuit breaker is open")
+        return []
+    
+    corrections, complete = request_deepinfra_analysis(resume_text, language)
+    if corrections and complete:
+        result_cache.set('analysis', cache_key, corrections)
+    elif corrections:
+        logging.info("Not caching CV analysis, some chunks failed")
+    return corrections
+
+
+def split_text_into_chunks(text, chunk_size=ANALYSIS_CHUNK_SIZE, overlap=ANALYSIS_CHUNK_OVERLAP):
+    """
+    Split text into overlapping chunks that keep their offsets in the text.
+    
+    Unlike split_text_into_segments(), chunks are exact slices of the text, so
+    positions found in a chunk map back by adding its start offset. Chunks end
+    at a line break or sentence end where possible.
+    
+    Args:
+        text (str): The text to split
+        chunk_size (int): Maximum length of each chunk
+        overlap (int): Number of characters shared by consecutive chunks
+    
+    Returns:
+        list: (start_offset, chunk_text) tuples covering the whole text
+    """
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        
+        if end < len(text):
+            # Prefer to cut after a line break, then after a sentence, in the second half of the chunk
+            cut = text.rfind('\n', start + chunk_size // 2, end)
+            if cut == -1:
+                cut = text.rfind('. ', start + chunk_size // 2, end)
+            if cut != -1:
+                end = cut + 1
+        
+        chunks.append((start, text[start:end]))
+        if end >= len(text):
+            break
+        
+        # Start the next chunk inside the overlap, at a line start if there is one
+        next_start = max(end - overlap, start + 1)
+        line_start = text.find('\n', next_start, end)
+        if line_start != -1 and line_start + 1 < end:
+            next_start = line_start + 1
+        start = next_start
+    
+    return chunks
+
+
+def request_deepinfra_analysis(resume_text, language='en'):
+    """
+    Request CV improvement suggestions from Groq, bypassing the result cache.
+    
+    Long CVs are split into overlapping chunks that are analyzed in parallel
+    under a process-wide concurrency limit; the suggestions are merged,
+    deduplicated and positioned in the full text.
+    
+    Args:
+        resume_text (str): The CV text to analyze
+        language (str): Language for the analysis ('en' or 'de')
+    
+    Returns:
+        tuple: (corrections, complete); complete is False if any chunk failed or was skipped
+    """
+    chunks = split_text_into_chunks(resume_text)
+    if len(chunks) == 1:
+        return request_chunk_analysis(resume_text, language)
+    
+    if len(chunks) > ANALYSIS_MAX_CHUNKS:
+        logging.warning(f"CV split into {len(chunks)} chunks, analyzing the first {ANALYSIS_MAX_CHUNKS}")
+        chunks = chunks[:ANALYSIS_MAX_CHUNKS]
+    
+    logging.info(f"Analyzing CV in {len(chunks)} chunks")
+    futures = [
+        (chunk_start, chunk_executor.submit(request_chunk_analysis, chunk_text, language))
+        for chunk_start, chunk_text in chunks
+    ]
+    
+    candidates = []
+    complete = True
+    for index, (chunk_start, future) in enumerate(futures):
+        try:
+            chunk_corrections, chunk_complete = future.result()
+        except Exception as e:
+            logging.error(f"Error analyzing CV chunk at offset {chunk_start}: {str(e)}")
+            complete = False
+            continue
+        complete = complete and chunk_complete
+        
+        # Text shared with the previous and next chunk
+        previous_end = chunks[index - 1][0] + len(chunks[index - 1][1]) if index > 0 else 0
+        next_start = chunks[index + 1][0] if index + 1 < len(chunks) else len(resume_text)
+        
+        for correction in chunk_corrections:
+            start_pos = correction["position"]["start"] + chunk_start
+            end_pos = correction["position"]["end"] + chunk_start
+            correction["position"] = {"start": start_pos, "end": end_pos}
+            in_overlap = start_pos < previous_end or end_pos > next_start
+            candidates.append((in_overlap, -(end_pos - start_pos), index, correction))
+    
+    # Chunks overlap, so the same passage is often suggested from both sides with
+    # slightly different spans. Of intersecting spans from different chunks keep the
+    # one outside the overlap, where its chunk had more context, else the longer one.
+    corrections = []
+    kept_spans = []
+    for in_overlap, _, index, correction in sorted(candidates, key=lambda candidate: candidate[:3]):
+        start_pos, end_pos = correction["position"]["start"], correction["position"]["end"]
+        if any((other_index != index and start_pos < other_end and other_start < end_pos)
+               or (start_pos, end_pos) == (other_start, other_end)
+               for other_index, other_start, other_end in kept_spans):
+            continue
+        kept_spans.append((index, start_pos, end_pos))
+        corrections.append(correction)
+    
+    return sorted(corrections, key=lambda x: x["position"]["start"]), complete
+
+
+def request_chunk_analysis(resume_text, language='en'):
+    """
+    Request improvement suggestions for a single CV chunk from Groq.
+    
+    Args:
+        resume_text (str): The CV text or chunk to analyze
+        language (str): Language for the analysis ('en' or 'de')
+    
+    Returns:
+        tuple: (corrections with positions relative to the given text, whether the model's
+            answer was received and parsed)
+    """
     logging.info("Analyzing CV with Groq's Llama-3-70b model")
     corrections = []
+    packed = pack_text(resume_text, ANALYSIS_TOKEN_BUDGET)
     
     if groq_client:
         try:
@@ -869,7 +1088,7 @@ def analyze_with_deepinfra(resume_text, language='en'):
             if language == 'de':
                 user_prompt = f"""Analysiere diesen Lebenslauf für den deutschen Arbeitsmarkt:
 
-{resume_text[:2500]}
+{packed.text}
 
 Gib nur präzise Verbesserungsvorschläge im folgenden JSON-Format zurück:
 [
@@ -887,7 +1106,7 @@ Für einen Lebenslauf mit niedrigen Punktzahlen (unter 50/100) solltest du minde
             else:
                 user_prompt = f"""Analyze this CV for the German job market:
 
-{resume_text[:2500]}
+{packed.text}
 
 Return only precise improvement suggestions in the following JSON format:
 [
@@ -904,14 +1123,16 @@ For a CV with low scores (below 50/100), you should provide at least 7-10 substa
 """
 
             # Make API call to Groq
-            response = groq_client.chat.completions.create(
+            response = groq_limiter.call(
+                groq_client.chat.completions.create,
                 model=GROQ_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
                 temperature=0.3,
-                max_tokens=2000
+                max_tokens=2000,
+                breaker=groq_breaker
             )
             
             if response and response.choices and len(response.choices) > 0:
@@ -930,45 +1151,19 @@ For a CV with low scores (below 50/100), you should provide at least 7-10 substa
                             raise ValueError("Could not extract JSON from API response")
                     else:
                         result_text = json_match.group(0)
-                        
+                    
                     # Parse JSON and process each suggestion
                     suggestions = json.loads(result_text)
                     
                     # Process each suggestion
-                    corrections = []
-                    for suggestion in suggestions:
-                        original_text = suggestion.get("original", "")
-                        if not original_text:
-                            continue
-                            
-                        # Find position of the original text in the CV
-                        start_pos = resume_text.find(original_text)
-                        if start_pos == -1:
-                            # Try case-insensitive search if exact match fails
-                            pattern = re.escape(original_text.lower())
-                            matches = list(re.finditer(pattern, resume_text.lower()))
-                            if matches:
-                                start_pos = matches[0].start()
-                            else:
-                                # Skip this suggestion if text can't be located
-                                logging.warning(f"Original text not found: {original_text[:30]}...")
-                                continue
-                                
-                        # Create correction with detailed information
-                        correction = {
-                            "original": original_text,
-                            "position": {"start": start_pos, "end": start_pos + len(original_text)},
-                            "suggestion": suggestion.get("suggestion", ""),
-                            "explanation": suggestion.get("explanation", "Improves CV presentation"),
-                            "category": suggestion.get("category", "content")
-                        }
-                        
-                        corrections.append(correction)
-                    
-                    return corrections
+                    return build_corrections(resume_text, suggestions, packed), True
                 except Exception as e:
                     logging.error(f"Error processing Groq response: {str(e)}")
         
+        except RateLimitTimeout as e:
+            # The API request method would wait for the same capacity again
+            logging.warning(f"Skipping CV chunk analysis: {str(e)}")
+            return corrections, False
         except Exception as groq_error:
             logging.error(f"Error with Groq native client: {str(groq_error)}")
             logging.error("Falling back to API request method")
@@ -984,7 +1179,7 @@ For a CV with low scores (below 50/100), you should provide at least 7-10 substa
     if language == 'de':
         user_prompt = f"""Analysiere diesen Lebenslauf für den deutschen Arbeitsmarkt:
 
-{resume_text[:2500]}
+{packed.text}
 
 Gib nur präzise Verbesserungsvorschläge im folgenden JSON-Format zurück:
 [
@@ -1002,7 +1197,7 @@ Für einen Lebenslauf mit niedrigen Punktzahlen (unter 50/100) solltest du minde
     else:
         user_prompt = f"""Analyze this CV for the German job market:
 
-{resume_text[:2500]}
+{packed.text}
 
 Return only precise improvement suggestions in the following JSON format:
 [
@@ -1017,10 +1212,11 @@ Return only precise improvement suggestions in the following JSON format:
 
 For a CV with low scores (below 50/100), you should provide at least 7-10 substantial improvement suggestions.
 """
-    
+
     try:
         # Call DeepInfra API
-        response = requests.post(
+        response = groq_limiter.call(
+            http_client.post,
             DEEPINFRA_API_URL,
             headers=deepinfra_headers,
             json={
@@ -1032,7 +1228,9 @@ For a CV with low scores (below 50/100), you should provide at least 7-10 substa
                 "temperature": 0.3,
                 "max_tokens": 2000
             },
-            timeout=45  # Longer timeout for complex analysis
+            read_timeout=45,  # Longer timeout for complex analysis
+            breaker=groq_breaker,
+            is_failure=is_http_failure
         )
         
         if response.status_code == 200:
@@ -1052,58 +1250,31 @@ For a CV with low scores (below 50/100), you should provide at least 7-10 substa
                         raise ValueError("Could not extract JSON from API response")
                 else:
                     result_text = json_match.group(0)
-                    
+                
                 # Parse the extracted JSON
                 suggestions = json.loads(result_text)
                 
                 # Process each suggestion
-                for suggestion in suggestions:
-                    original_text = suggestion.get("original", "")
-                    if not original_text:
-                        continue
-                        
-                    # Find position of the original text in the CV
-                    start_pos = resume_text.find(original_text)
-                    if start_pos == -1:
-                        # Try case-insensitive search if exact match fails
-                        pattern = re.escape(original_text.lower())
-                        matches = list(re.finditer(pattern, resume_text.lower()))
-                        if matches:
-                            start_pos = matches[0].start()
-                        else:
-                            # Skip this suggestion if text can't be located
-                            logging.warning(f"Original text not found: {original_text[:30]}...")
-                            continue
-                            
-                    # Create correction with detailed information
-                    correction = {
-                        "original": original_text,
-                        "position": {"start": start_pos, "end": start_pos + len(original_text)},
-                        "suggestion": suggestion.get("suggestion", ""),
-                        "explanation": suggestion.get("explanation", "Improves CV presentation"),
-                        "category": suggestion.get("category", "content")
-                    }
-                    
-                    corrections.append(correction)
-                    
+                corrections = build_corrections(resume_text, suggestions, packed)
+                
                 if corrections:
-                    return corrections
+                    return corrections, True
                 else:
                     logging.warning("No valid corrections extracted from DeepInfra response")
-                    return []
-                    
+                    return [], True
+            
             except (json.JSONDecodeError, ValueError) as e:
                 logging.error(f"Failed to parse DeepInfra response as JSON: {str(e)}")
                 logging.debug(f"Raw response: {result_text[:500]}...")
-                return []
+                return [], False
         else:
             logging.error(f"DeepInfra API error ({response.status_code}): {response.text}")
-            return []
-            
+            return [], False
+    
     except Exception as e:
         logging.error(f"Error in DeepInfra analysis: {str(e)}")
         logging.error(traceback.format_exc())
-        return []
+        return [], False
 
 
 def perform_enhanced_analysis(resume_text, language='en'):
@@ -1113,101 +1284,17 @@ def perform_enhanced_analysis(resume_text, language='en'):
     Args:
         resume_text (str): The CV text to analyze
         language (str): Language for the analysis ('en' or 'de')
-        
+    
     Returns:
         list: List of corrections with detailed improvement suggestions
     """
     corrections = []
     
-    # Build a comprehensive set of checks based on German CV standards
-    checks = []
-    
-    # Common weak phrases that should be replaced with strong action verbs
-    weak_phrases = [
-        # English weak phrases
-        {"pattern": r"\bresponsible for\b", "replacement": "managed", 
-         "explanation": "Use action verbs instead of passive phrases to show proactive leadership", "category": "clarity"},
-        {"pattern": r"\bhelped (with|to)?\b", "replacement": "assisted with", 
-         "explanation": "Use more professional terminology to describe your contributions", "category": "professional language"},
-        {"pattern": r"\bworked (on|with)\b", "replacement": "developed", 
-         "explanation": "Use stronger action verbs to demonstrate your contribution", "category": "clarity"},
-        {"pattern": r"\bpart of (a|the) team\b", "replacement": "collaborated with team members to", 
-         "explanation": "Specify your role in the team rather than just mentioning team membership", "category": "content"},
-        
-        # German weak phrases
-        {"pattern": r"\bzuständig für\b", "replacement": "verantwortete", 
-         "explanation": "Verwenden Sie Aktiv-Formulierungen statt passiver Ausdrücke", "category": "clarity"},
-        {"pattern": r"\bhabe (mitge)?arbeitet\b", "replacement": "entwickelte", 
-         "explanation": "Nutzen Sie stärkere Verben, um Ihre Beiträge hervorzuheben", "category": "clarity"},
-        {"pattern": r"\bwar beteiligt an\b", "replacement": "koordinierte", 
-         "explanation": "Verdeutlichen Sie Ihre aktive Rolle statt nur Beteiligung zu erwähnen", "category": "content"},
-    ]
-    
-    # Personal pronouns to avoid in CVs
-    pronouns = [
-        {"pattern": r"\bi\b", "replacement": "", 
-         "explanation": "Avoid first-person pronouns in CVs; start sentences with action verbs instead", "category": "professional language"},
-        {"pattern": r"\bmy\b", "replacement": "the", 
-         "explanation": "Avoid possessive pronouns in CVs for a more professional tone", "category": "professional language"},
-        {"pattern": r"\bich\b", "replacement": "", 
-         "explanation": "Vermeiden Sie 'ich' im Lebenslauf; beginnen Sie Sätze direkt mit Verben", "category": "professional language"},
-        {"pattern": r"\bmein(e)?\b", "replacement": "die", 
-         "explanation": "Vermeiden Sie Possessivpronomen im Lebenslauf", "category": "professional language"},
-    ]
-    
-    # Cliché terms that should be avoided or replaced
-    cliches = [
-        {"pattern": r"\bteam player\b", "replacement": "collaborative professional", 
-         "explanation": "Replace overused clichés with specific examples of collaboration", "category": "content"},
-        {"pattern": r"\bthinking outside the box\b", "replacement": "implementing innovative solutions", 
-         "explanation": "Avoid clichés and use concrete examples of innovation", "category": "content"},
-        {"pattern": r"\bteamfähig\b", "replacement": "arbeitete effektiv im Team bei [Projektname]", 
-         "explanation": "Ersetzen Sie Floskeln durch konkrete Beispiele Ihrer Teamarbeit", "category": "content"},
-        {"pattern": r"\bhardworking\b", "replacement": "delivered projects consistently ahead of deadline", 
-         "explanation": "Show your work ethic through specific achievements rather than generic terms", "category": "content"},
-    ]
-    
-    # Format and capitalization issues
-    formatting = [
-        {"pattern": r"\bms office\b", "replacement": "Microsoft Office", 
-         "explanation": "Use proper capitalization for product names", "category": "formatting"},
-        {"pattern": r"\b(java ?script|type ?script)\b", "replacement": "JavaScript", 
-         "explanation": "Use correct capitalization for programming languages", "category": "formatting"},
-        {"pattern": r"\bc\+\+\b", "replacement": "C++", 
-         "explanation": "Use correct capitalization for programming languages", "category": "formatting"},
-    ]
-    
-    # Vague descriptions that need quantification
-    vague_terms = [
-        {"pattern": r"\b(significantly|substantially|greatly) (improved|increased|decreased|reduced)\b", 
-         "replacement": "improved by X%", 
-         "explanation": "Quantify your achievements with specific numbers or percentages", "category": "achievement"},
-        {"pattern": r"\b(managed|led) a team\b", "replacement": "managed a team of X members", 
-         "explanation": "Specify the size of the team you managed for greater impact", "category": "achievement"},
-        {"pattern": r"\bverbesserte Prozesse\b", "replacement": "verbesserte Prozesse, was zu einer X% Effizienzsteigerung führte", 
-         "explanation": "Quantifizieren Sie Ihre Erfolge mit konkreten Zahlen", "category": "achievement"},
-    ]
-    
-    # German-specific language issues
-    german_specific = [
-        {"pattern": r"\b(?:gute|sehr gute|ausgezeichnete)\s+kenntnisse\b", 
-         "replacement": "Fortgeschrittene Kenntnisse", 
-         "explanation": "Verwenden Sie präzisere Begriffe zur Beschreibung Ihrer Fähigkeiten", "category": "professional language"},
-        {"pattern": r"\bargts", "replacement": "arbeitet", 
-         "explanation": "Verwenden Sie vollständige Wörter statt Abkürzungen", "category": "professional language"},
-        {"pattern": r"\binteragirt\b", "replacement": "interagiert", 
-         "explanation": "Korrigieren Sie Rechtschreibfehler", "category": "spelling"},
-    ]
-    
-    # Combine all check categories based on language
-    if language == 'de':
-        checks = weak_phrases + pronouns + cliches + formatting + vague_terms + german_specific
-    else:
-        checks = weak_phrases + pronouns + cliches + formatting + vague_terms
-    
     # Add additional comprehensive checks for low-quality CVs
     # Check for missing sections
-    if not re.search(r'\b(?:experience|work|employment|berufserfahrung|arbeitserfahrung|tätigkeiten)\b', resume_text, re.IGNORECASE):
+    missing_sections = parse_cv(resume_text).missing_sections
+    
+    if "experience" in missing_sections:
         section_start = resume_text.find("\n\n")
         if section_start == -1:
             section_start = 0
@@ -1223,11 +1310,11 @@ def perform_enhanced_analysis(resume_text, language='en'):
         }
         corrections.append(missing_section)
     
-    if not re.search(r'\b(?:education|ausbildung|bildung|studium|akademisch)\b', resume_text, re.IGNORECASE):
+    if "education" in missing_sections:
         section_start = resume_text.find("\n\n")
         if section_start == -1:
             section_start = 0
-            
+        
         missing_section = {
             "original": resume_text[section_start:section_start+10] + "...",
             "position": {"start": section_start, "end": section_start + 10},
@@ -1239,11 +1326,11 @@ def perform_enhanced_analysis(resume_text, language='en'):
         }
         corrections.append(missing_section)
     
-    if not re.search(r'\b(?:skills|fähigkeiten|kenntnisse|kompetenzen)\b', resume_text, re.IGNORECASE):
+    if "skills" in missing_sections:
         section_start = resume_text.find("\n\n")
         if section_start == -1:
             section_start = 0
-            
+        
         missing_section = {
             "original": resume_text[section_start:section_start+10] + "...",
             "position": {"start": section_start, "end": section_start + 10},
@@ -1255,34 +1342,8 @@ def perform_enhanced_analysis(resume_text, language='en'):
         }
         corrections.append(missing_section)
     
-    # Apply all checks to the resume text
-    for check in checks:
-        for match in re.finditer(check["pattern"], resume_text, re.IGNORECASE):
-            start_pos = match.start()
-            end_pos = match.end()
-            original_text = resume_text[start_pos:end_pos]
-            
-            # Create replacement based on case of original
-            if original_text.isupper():
-                replacement = check["replacement"].upper()
-            elif original_text[0].isupper():
-                replacement = check["replacement"].capitalize()
-            else:
-                replacement = check["replacement"]
-                
-            # Skip if replacement would be empty
-            if not replacement:
-                continue
-                
-            correction = {
-                "original": original_text,
-                "position": {"start": start_pos, "end": end_pos},
-                "suggestion": replacement,
-                "explanation": check["explanation"],
-                "category": check["category"]
-            }
-            
-            corrections.append(correction)
+    # Apply all checks to the resume text in a single pass
+    corrections.extend(get_rule_set(language).scan(resume_text))
     
     # Return the corrections, limiting to a reasonable number if there are too many
     max_corrections = 25  # Limit to 25 to avoid overwhelming the user
@@ -1,14 +1,20 @@
 import os
-import io
 import logging
 import traceback
 import sys
-from flask import Flask, render_template, request, redirect, url_for, flash, session, send_file
-from werkzeug.utils import secure_filename
-import tempfile
+from flask import Flask, render_template, request, redirect, url_for, flash, session, send_file, Response, stream_with_context
 import json
-from resume_parser import parse_resume_file, parse_resume_text
-from ai_analyzer import analyze_resume, generate_anschreiben, score_resume
+from resume_parser import parse_resume_upload, parse_resume_text, parser_pool, parse_cache
+from ai_analyzer import analyze_and_score, generate_anschreiben, score_resume, stream_anschreiben
+from job_queue import job_queue, STATUS_DONE, STATUS_FAILED
+from circuit_breaker import breaker_stats
+from rate_limiter import groq_limiter
+from result_cache import result_cache
+from text_edits import apply_edits, map_span
+from cv_model import ParsedCV, parse_cv, remember_parsed_cv
+from session_store import SQLiteSessionInterface, session_store
+from janitor import JANITOR_ENABLED, janitor
+from artifacts import ARTIFACT_MIMETYPES, get_artifact, prepare_artifacts
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, 
@@ -20,24 +26,76 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "default-secret-key")
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 
-# Store session data in files instead of cookies to handle larger data
-from flask_session import Session
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_FILE_DIR'] = os.path.join(tempfile.gettempdir(), 'flask_sessions')
-os.makedirs(app.config['SESSION_FILE_DIR'], exist_ok=True)
-Session(app)
+# Store session data server-side; large values are kept compressed and shared by content hash
+app.session_interface = SQLiteSessionInterface(session_store)
 
 # Configure upload settings
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt'}
-UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
-TEMP_FOLDER = UPLOAD_FOLDER
-
-# Ensure upload folder exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def wants_json():
+    """Check whether the client asked for a JSON response instead of a page."""
+    return request.accept_mimetypes.best == 'application/json'
+
+def restore_parsed_cv(resume_text, parsed_cv_data):
+    """Reuse the document model built at upload time instead of re-scanning the CV."""
+    if parsed_cv_data:
+        remember_parsed_cv(ParsedCV.from_dict(resume_text, parsed_cv_data))
+
+def send_artifact(text, format_type, base_name, error_endpoint):
+    """Send a prepared TXT or PDF export; conditional GETs with a matching ETag get a 304."""
+    if format_type not in ARTIFACT_MIMETYPES:
+        format_type = 'pdf'
+    response = None
+    for attempt in range(2):
+        try:
+            path, etag = get_artifact(text, format_type)
+            response = send_file(
+                path,
+                as_attachment=True,
+                download_name=f'{base_name}.{format_type}',
+                mimetype=ARTIFACT_MIMETYPES[format_type],
+                etag=etag,
+                conditional=True
+            )
+            break
+        except FileNotFoundError:
+            # The janitor removed the file after get_artifact() found it; render it again
+            logging.warning(f"{format_type.upper()} export was removed before sending, rendering it again")
+        except Exception as e:
+            flash(f'Error generating {format_type.upper()}: {str(e)}', 'danger')
+            logging.error(f"{format_type.upper()} generation error: {str(e)}")
+            return redirect(url_for(error_endpoint))
+    
+    if response is None:
+        flash(f'Error generating {format_type.upper()}: the file could not be prepared', 'danger')
+        return redirect(url_for(error_endpoint))
+    
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+def run_analysis_job(payload):
+    """Job handler: analyze and score a CV."""
+    restore_parsed_cv(payload['resume_text'], payload.get('parsed_cv'))
+    corrections, score_data = analyze_and_score(payload['resume_text'], payload['language'])
+    return {'corrections': corrections, 'resume_score': score_data}
+
+def run_anschreiben_job(payload):
+    """Job handler: generate a cover letter."""
+    restore_parsed_cv(payload['resume_text'], payload.get('parsed_cv'))
+    return {'anschreiben': generate_anschreiben(payload['resume_text'], payload['job_description'])}
+
+job_queue.register('analyze', run_analysis_job)
+job_queue.register('anschreiben', run_anschreiben_job)
+job_queue.ensure_workers()
+
+# Clean up files left in the legacy session and upload directories
+if JANITOR_ENABLED:
+    janitor.ensure_started()
+
 @app.route('/')
 def index():
     # Clear any previous CV data from session
@@ -51,6 +109,10 @@ def index():
         session.pop('job_description')
     if 'resume_score' in session:
         session.pop('resume_score')
+    session.pop('analysis_job', None)
+    session.pop('anschreiben_job', None)
+    session.pop('parsed_cv', None)
+    session.pop('corrected_text', None)
     
     return render_template('index.html')
 
@@ -69,19 +131,11 @@ def analyze():
             return redirect(url_for('index'))
         
         try:
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(TEMP_FOLDER, filename)
-            logging.debug(f"Saving file to: {file_path}")
-            file.save(file_path)
-            
-            # Parse the CV file
-            logging.debug(f"Parsing file: {file_path}")
-            resume_text = parse_resume_file(file_path)
+            # Parse the CV straight from the upload stream, off the request worker
+            logging.debug(f"Parsing file: {file.filename}")
+            resume_text = parse_resume_upload(file.stream, file.filename)
             logging.debug(f"File parsed successfully, text length: {len(resume_text)}")
             
-            # Remove the temporary file
-            os.remove(file_path)
-            
         except Exception as e:
             flash(f'Error parsing file: {str(e)}', 'danger')
             logging.error(f"File parsing error: {str(e)}")
@@ -104,19 +158,22 @@ def analyze():
         # Get language preference from form
         language = request.form.get('language', 'en')
         
-        # Analyze the CV with AI using specified language
-        corrections = analyze_resume(resume_text, language)
+        # Build the document model once; downstream analysis reuses it
+        parsed_cv = parse_cv(resume_text).to_dict()
+        
+        # Queue the analysis and scoring; the results page polls for the outcome
+        job_id = job_queue.submit('analyze', {'resume_text': resume_text, 'language': language, 'parsed_cv': parsed_cv})
         
-        # Store the CV, corrections, and language in the session
-        # Limit the number of corrections to prevent session size issues
-        max_corrections = 20
-        if len(corrections) > max_corrections:
-            logging.warning(f"Limiting corrections from {len(corrections)} to {max_corrections} to prevent session overflow")
-            corrections = corrections[:max_corrections]
-            
         session['resume_text'] = resume_text
-        session['corrections'] = corrections
+        session['parsed_cv'] = parsed_cv
         session['language'] = language
+        session['analysis_job'] = job_id
+        session.pop('corrections', None)
+        session.pop('resume_score', None)
+        session.pop('corrected_text', None)
+        
+        if wants_json():
+            return json.dumps({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202, {'Content-Type': 'application/json'}
         
         return redirect(url_for('results'))
         
@@ -125,8 +182,55 @@ def analyze():
         logging.error(f"AI analysis error: {str(e)}")
         return redirect(url_for('index'))
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report the status of a queued job and store its result in the session once done."""
+    if job_id not in (session.get('analysis_job'), session.get('anschreiben_job')):
+        return json.dumps({'error': 'Unknown job'}), 404, {'Content-Type': 'application/json'}
+    
+    job = job_queue.get(job_id)
+    if job is None:
+        return json.dumps({'error': 'Unknown job'}), 404, {'Content-Type': 'application/json'}
+    
+    response = {'job_id': job_id, 'status': job['status']}
+    
+    if job['status'] == STATUS_DONE:
+        result = job['result']
+        if job['kind'] == 'analyze':
+            session['corrections'] = result['corrections']
+            if result.get('resume_score'):
+                session['resume_score'] = result['resume_score']
+            session.pop('analysis_job', None)
+            prepare_artifacts(session['resume_text'])
+            response['redirect'] = url_for('results')
+        else:
+            session['anschreiben'] = result['anschreiben']
+            session.pop('anschreiben_job', None)
+            prepare_artifacts(result['anschreiben'])
+            response['redirect'] = url_for('anschreiben_page')
+    
+    elif job['status'] == STATUS_FAILED:
+        logging.error(f"Job {job_id} failed: {job['error']}")
+        response['error'] = job['error']
+        if job['kind'] == 'analyze':
+            flash(f"Error analyzing CV: {job['error']}", 'danger')
+            session.pop('analysis_job', None)
+            response['redirect'] = url_for('index')
+        else:
+            flash(f"Error generating Anschreiben: {job['error']}", 'danger')
+            session.pop('anschreiben_job', None)
+            response['redirect'] = url_for('anschreiben_page')
+    
+    return json.dumps(response), 200, {'Content-Type': 'application/json'}
+
 @app.route('/results')
 def results():
+    # Show a progress page while the analysis job is still running
+    if 'corrections' not in session and session.get('analysis_job'):
+        return render_template('processing.html',
+                               job_id=session['analysis_job'],
+                               message='Analyzing your CV...')
+    
     # Check if CV and corrections are in session
     if 'resume_text' not in session or 'corrections' not in session:
         flash('Please submit a CV for analysis first.', 'warning')
@@ -158,99 +262,27 @@ def results():
     
     return render_template('result.html', resume_text=resume_text, corrections=corrections, score=score_data)
 
-@app.route('/download', methods=['POST'])
+@app.route('/download', methods=['GET', 'POST'])
 def download():
     if 'resume_text' not in session:
         flash('No CV data available for download.', 'warning')
         return redirect(url_for('index'))
     
-    # Get the corrected CV text from the form
-    corrected_text = request.form.get('corrected_text', '')
+    format_type = request.values.get('format', 'txt')
     
-    if not corrected_text:
-        flash('No content to download.', 'warning')
-        return redirect(url_for('results'))
-    
-    # Create a temporary file with the corrected CV
-    format_type = request.form.get('format', 'txt')
-    
-    if format_type == 'txt':
-        # Create a text file
-        file_buffer = io.BytesIO()
-        file_buffer.write(corrected_text.encode('utf-8'))
-        file_buffer.seek(0)
-        
-        return send_file(
-            file_buffer,
-            as_attachment=True,
-            download_name='corrected_cv.txt',
-            mimetype='text/plain'
-        )
-    else:  # PDF
-        try:
-            from fpdf import FPDF
-            
-            # Create a PDF file
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            
-            # Clean text of non-compatible characters 
-            # Replace special characters with standard ASCII alternatives
-            clean_text = corrected_text.replace('\u2013', '-')  # en-dash
-            clean_text = clean_text.replace('\u2014', '--')     # em-dash
-            clean_text = clean_text.replace('\u2018', "'")      # left single quote
-            clean_text = clean_text.replace('\u2019', "'")      # right single quote
-            clean_text = clean_text.replace('\u201c', '"')      # left double quote
-            clean_text = clean_text.replace('\u201d', '"')      # right double quote
-            
-            # Split the text into lines and add to PDF
-            for line in clean_text.split('\n'):
-                # Handle potential Unicode errors with a general filter
-                safe_line = ''.join(c if ord(c) < 128 else '-' for c in line)
-                pdf.multi_cell(0, 10, safe_line)
-            
-            # Save the PDF to a memory buffer
-            file_buffer = io.BytesIO()
-            
-            try:
-                # Get the PDF as bytes
-                pdf_data = pdf.output(dest='S')
-                if isinstance(pdf_data, str):
-                    pdf_data = pdf_data.encode('latin-1')
-                
-                file_buffer.write(pdf_data)
-                file_buffer.seek(0)
-            except UnicodeEncodeError:
-                logging.warning("Unicode encode error when creating PDF, using ASCII fallback")
-                # If still encountering unicode errors, fall back to ASCII only
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", size=12)
-                
-                # Use ASCII-only version
-                ascii_text = corrected_text.encode('ascii', 'replace').decode('ascii')
-                for line in ascii_text.split('\n'):
-                    pdf.multi_cell(0, 10, line)
-                
-                pdf_data = pdf.output(dest='S')
-                if isinstance(pdf_data, str):
-                    pdf_data = pdf_data.encode('latin-1')
-                
-                file_buffer = io.BytesIO()
-                file_buffer.write(pdf_data)
-                file_buffer.seek(0)
-            
-            return send_file(
-                file_buffer,
-                as_attachment=True,
-                download_name='corrected_cv.pdf',
-                mimetype='application/pdf'
-            )
-        except Exception as e:
-            flash(f'Error generating PDF: {str(e)}', 'danger')
-            logging.error(f"PDF generation error: {str(e)}")
+    if request.method == 'POST':
+        # Remember the corrected CV from the form, then download it with a GET
+        # so that repeat downloads can be answered from the browser cache
+        corrected_text = request.form.get('corrected_text', '')
+        if not corrected_text:
+            flash('No content to download.', 'warning')
             return redirect(url_for('results'))
+        if corrected_text != session.get('corrected_text'):
+            session['corrected_text'] = corrected_text
+        return redirect(url_for('download', format=format_type), code=303)
+    
+    corrected_text = session.get('corrected_text') or session['resume_text']
+    return send_artifact(corrected_text, format_type, 'corrected_cv', 'results')
 
 @app.route('/apply_corrections', methods=['POST'])
 def apply_corrections():
@@ -262,16 +294,35 @@ def apply_corrections():
         selected_corrections = data['selected_corrections']
         resume_text = data['resume_text']
         
-        # Apply selected corrections to the CV text
-        # Sort corrections in reverse order to avoid offset issues
-        sorted_corrections = sorted(selected_corrections, key=lambda x: x['position']['start'], reverse=True)
+        # Apply selected corrections to the CV text in a single pass;
+        # overlapping corrections are skipped and reported back
+        try:
+            corrected_text, conflicts, offset_map = apply_edits(resume_text, selected_corrections)
+        except (KeyError, TypeError):
+            return json.dumps({'error': 'Invalid data format'}), 400, {'ContentType': 'application/json'}
+        
+        # Keep the latest version for downloads and render its exports in the background
+        if corrected_text != session.get('corrected_text'):
+            session['corrected_text'] = corrected_text
+        prepare_artifacts(corrected_text)
         
-        for correction in sorted_corrections:
-            start = correction['position']['start']
-            end = correction['position']['end']
-            resume_text = resume_text[:start] + correction['suggestion'] + resume_text[end:]
+        response = {
+            'corrected_text': corrected_text,
+            'conflicts': conflicts,
+            'offset_map': offset_map
+        }
         
-        return json.dumps({'corrected_text': resume_text}), 200, {'ContentType': 'application/json'}
+        # Re-position the corrections that were not applied, if the client sent them
+        if 'remaining_corrections' in data:
+            try:
+                response['remaining_positions'] = [
+                    map_span(offset_map, correction['position']['start'], correction['position']['end'])
+                    for correction in data['remaining_corrections']
+                ]
+            except (KeyError, TypeError):
+                return json.dumps({'error': 'Invalid data format'}), 400, {'ContentType': 'application/json'}
+        
+        return json.dumps(response), 200, {'ContentType': 'application/json'}
     
     return json.dumps({'error': 'Invalid request method'}), 405, {'ContentType': 'application/json'}
 
@@ -284,6 +335,12 @@ def anschreiben_page():
             flash('Please submit a CV for analysis first.', 'warning')
             return redirect(url_for('index'))
             
+        # Show a progress page while the cover letter job is still running
+        if session.get('anschreiben_job'):
+            return render_template('processing.html',
+                                   job_id=session['anschreiben_job'],
+                                   message='Generating your Anschreiben...')
+        
         # Get CV from session
         resume_text = session.get('resume_text', '')
         anschreiben_text = session.get('anschreiben', '')
@@ -311,27 +368,22 @@ def anschreiben_page():
                                   anschreiben='')
         
         try:
-            # Generate anschreiben using DeepInfra API
-            anschreiben_text = generate_anschreiben(resume_text, job_description)
+            # Queue the cover letter generation; the page polls for the outcome
+            job_id = job_queue.submit('anschreiben', {'resume_text': resume_text, 'job_description': job_description,
+                                                      'parsed_cv': session.get('parsed_cv')})
             
-            # Store in session
-            session['anschreiben'] = anschreiben_text
             session['job_description'] = job_description
+            session['anschreiben_job'] = job_id
+            session.pop('anschreiben', None)
             
-            return render_template('anschreiben.html', 
-                                  resume_text=resume_text,
-                                  job_description=job_description,
-                                  anschreiben=anschreiben_text)
+            if wants_json():
+                return json.dumps({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202, {'Content-Type': 'application/json'}
+            
+            return redirect(url_for('anschreiben_page'))
                                   
         except Exception as e:
-            error_msg = str(e)
-            # Add a more user-friendly message for API errors
-            if "API error: 401" in error_msg:
-                flash('Authentication error with DeepInfra API. Using template-based generation instead.', 'warning')
-            else:
-                flash(f'Error generating Anschreiben: {error_msg}', 'danger')
-                
-            logging.error(f"Anschreiben generation error: {error_msg}")
+            flash(f'Error generating Anschreiben: {str(e)}', 'danger')
+            logging.error(f"Anschreiben generation error: {str(e)}")
             logging.error(traceback.format_exc())
             
             return render_template('anschreiben.html', 
@@ -340,13 +392,77 @@ def anschreiben_page():
                                   anschreiben='')
 
 
+@app.route('/anschreiben/stream', methods=['POST'])
+def stream_anschreiben_page():
+    """Stream a generated cover letter to the browser as Server-Sent Events."""
+    resume_text = session.get('resume_text', '')
+    job_description = request.form.get('job_description', '')
+    
+    if not resume_text:
+        return json.dumps({'error': 'No CV found. Please upload your CV first.'}), 400, {'Content-Type': 'application/json'}
+    
+    if not job_description or len(job_description) < 50:
+        return json.dumps({'error': 'Please provide a detailed job description to generate a personalized cover letter.'}), 400, {'Content-Type': 'application/json'}
+    
+    # The session is saved before the body is streamed, so the finished text
+    # is recorded on a job and moved into the session by /jobs/<id>
+    job_id = job_queue.start_external('anschreiben')
+    session['job_description'] = job_description
+    session['anschreiben_job'] = job_id
+    session.pop('anschreiben', None)
+    
+    restore_parsed_cv(resume_text, session.get('parsed_cv'))
+    
+    def generate():
+        parts = []
+        try:
+            for event, text in stream_anschreiben(resume_text, job_description):
+                if event == 'replace':
+                    parts = [text]
+                else:
+                    parts.append(text)
+                yield f"data: {json.dumps({event: text})}\n\n"
+            
+            job_queue.complete(job_id, {'anschreiben': ''.join(parts)})
+        except GeneratorExit:
+            job_queue.fail(job_id, 'Client disconnected')
+            raise
+        except Exception as e:
+            logging.error(f"Anschreiben streaming error: {str(e)}")
+            logging.error(traceback.format_exc())
+            job_queue.fail(job_id, str(e))
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            return
+        
+        yield f"data: {json.dumps({'done': True, 'status_url': url_for('job_status', job_id=job_id)})}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/metrics')
+def metrics():
+    """Report circuit breaker, rate limit, cache, job queue, session and cleanup metrics for this worker as JSON."""
+    data = {
+        'circuit_breakers': breaker_stats(),
+        'groq_rate_limit': groq_limiter.stats(),
+        'result_cache': result_cache.stats(),
+        'job_queue': job_queue.depth(),
+        'parser_pool': parser_pool.stats(),
+        'parse_cache': parse_cache.stats(),
+        'session_store': session_store.stats(),
+        'janitor': janitor.stats()
+    }
+    return json.dumps(data), 200, {'Content-Type': 'application/json'}
+
+
 @app.route('/donate')
 def donate():
     """Display the donation page."""
     return render_template('donate.html')
 
 
-@app.route('/download_anschreiben', methods=['POST'])
+@app.route('/download_anschreiben', methods=['GET', 'POST'])
 def download_anschreiben():
     if 'anschreiben' not in session:
         flash('No Anschreiben available for download.', 'warning')
@@ -359,82 +475,8 @@ def download_anschreiben():
         flash('No content to download.', 'warning')
         return redirect(url_for('anschreiben_page'))
     
-    # Create a temporary file with the anschreiben
-    format_type = request.form.get('format', 'txt')
+    format_type = request.values.get('format', 'txt')
+    if request.method == 'POST':
+        return redirect(url_for('download_anschreiben', format=format_type), code=303)
     
-    if format_type == 'txt':
-        # Create a text file
-        file_buffer = io.BytesIO()
-        file_buffer.write(anschreiben_text.encode('utf-8'))
-        file_buffer.seek(0)
-        
-        return send_file(
-            file_buffer,
-            as_attachment=True,
-            download_name='anschreiben.txt',
-            mimetype='text/plain'
-        )
-    else:  # PDF
-        try:
-            from fpdf import FPDF
-            
-            # Create a PDF file
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            
-            # Clean text of non-compatible characters
-            clean_text = anschreiben_text.replace('\u2013', '-')  # en-dash
-            clean_text = clean_text.replace('\u2014', '--')     # em-dash
-            clean_text = clean_text.replace('\u2018', "'")      # left single quote
-            clean_text = clean_text.replace('\u2019', "'")      # right single quote
-            clean_text = clean_text.replace('\u201c', '"')      # left double quote
-            clean_text = clean_text.replace('\u201d', '"')      # right double quote
-            
-            # Split the text into lines and add to PDF
-            for line in clean_text.split('\n'):
-                # Handle potential Unicode errors with a general filter
-                safe_line = ''.join(c if ord(c) < 128 else '-' for c in line)
-                pdf.multi_cell(0, 10, safe_line)
-            
-            # Save the PDF to a memory buffer
-            file_buffer = io.BytesIO()
-            
-            try:
-                # Get the PDF as bytes
-                pdf_data = pdf.output(dest='S')
-                if isinstance(pdf_data, str):
-                    pdf_data = pdf_data.encode('latin-1')
-                
-                file_buffer.write(pdf_data)
-                file_buffer.seek(0)
-            except UnicodeEncodeError:
-                logging.warning("Unicode encode error when creating PDF, using ASCII fallback")
-                # If still encountering unicode errors, fall back to ASCII only
-                pdf = FPDF()
-                pdf.add_page()
-                pdf.set_font("Arial", size=12)
-                
-                # Use ASCII-only version
-                ascii_text = anschreiben_text.encode('ascii', 'replace').decode('ascii')
-                for line in ascii_text.split('\n'):
-                    pdf.multi_cell(0, 10, line)
-                
-                pdf_data = pdf.output(dest='S')
-                if isinstance(pdf_data, str):
-                    pdf_data = pdf_data.encode('latin-1')
-                
-                file_buffer = io.BytesIO()
-                file_buffer.write(pdf_data)
-                file_buffer.seek(0)
-            
-            return send_file(
-                file_buffer,
-                as_attachment=True,
-                download_name='anschreiben.pdf',
-                mimetype='application/pdf'
-            )
-        except Exception as e:
-            flash(f'Error generating PDF: {str(e)}', 'danger')
-            logging.error(f"PDF generation error: {str(e)}")
-            return redirect(url_for('anschreiben_page'))
+    return send_artifact(anschreiben_text, format_type, 'anschreiben', 'anschreiben_page')
@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_export import PDF_EXPORT_VERSION, export_signature, render_pdf
+
+# Export artifact configuration
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), 'resume_artifacts'))
+ARTIFACT_WORKERS = int(os.environ.get("ARTIFACT_WORKERS", "1"))  # background render threads per process
+
+ARTIFACT_MIMETYPES = {
+    'txt': 'text/plain',
+    'pdf': 'application/pdf'
+}
+
+# Background renders, so that downloads find their file ready
+artifact_executor = ThreadPoolExecutor(max_workers=ARTIFACT_WORKERS, thread_name_prefix="artifacts")
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def artifact_key(text, format_type):
+    """
+    Build the content hash that names an artifact and serves as its ETag.
+    
+    PDF keys also cover the layout and the resolved font, so a font change
+    yields new files and ETags instead of stale cached ones.
+    
+    Args:
+        text (str): The exported text
+        format_type (str): 'txt' or 'pdf'
+    
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    signature = export_signature() if format_type == 'pdf' else PDF_EXPORT_VERSION
+    digest.update(f"{format_type}:{signature}\x00".encode('utf-8'))
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def artifact_path(key, format_type):
+    """Get the file path of an artifact."""
+    return os.path.join(ARTIFACT_DIR, f"{key}.{format_type}")
+
+
+def _reuse(path):
+    # Refresh the mtime, so that the janitor's age limit counts from the last use
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def build_artifact(text, format_type):
+    """
+    Render an artifact unless its file already exists.
+    
+    The file is written under a temporary name and renamed, so readers never
+    see a partial file.
+    
+    Args:
+        text (str): The exported text
+        format_type (str): 'txt' or 'pdf'
+    
+    Returns:
+        str: Path of the artifact file
+    """
+    path = artifact_path(artifact_key(text, format_type), format_type)
+    if _reuse(path):
+        return path
+    
+    data = render_pdf(text) if format_type == 'pdf' else text.encode('utf-8')
+    
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=ARTIFACT_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _submit(text, format_type):
+    # One render per artifact at a time; later callers share the running one
+    key = (artifact_key(text, format_type), format_type)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = artifact_executor.submit(build_artifact, text, format_type)
+            _inflight[key] = future
+            future.add_done_callback(lambda done: _forget(key))
+        return future
+
+
+def _forget(key):
+    with _inflight_lock:
+        _inflight.pop(key, None)
+
+
+def prepare_artifacts(text):
+    """
+    Render the TXT and PDF exports of a text in the background.
+    
+    Args:
+        text (str): The text users will download, e.g. the corrected CV or cover letter
+    """
+    if not text:
+        return
+    for format_type in ARTIFACT_MIMETYPES:
+        if not _reuse(artifact_path(artifact_key(text, format_type), format_type)):
+            _submit(text, format_type)
+
+
+def get_artifact(text, format_type):
+    """
+    Get a rendered artifact, waiting for its background render or rendering it now.
+    
+    Only a render that is already running is waited for. Otherwise the
+    artifact is rendered in the calling request rather than behind other
+    users' queued renders.
+    
+    Args:
+        text (str): The exported text
+        format_type (str): 'txt' or 'pdf'
+    
+    Returns:
+        tuple: (path, etag) of the artifact file
+    """
+    key = artifact_key(text, format_type)
+    path = artifact_path(key, format_type)
+    if _reuse(path):
+        return path, key
+    
+    with _inflight_lock:
+        future = _inflight.get((key, format_type))
+    
+    # A queued render that hasn't started yet is taken over by this request
+    if future is not None and not future.cancel():
+        try:
+            return future.result(), key
+        except Exception as e:
+            logging.error(f"Background render of {format_type} failed, rendering inline: {str(e)}")
+    
+    return build_artifact(text, format_type), key
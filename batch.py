@@ -0,0 +1,288 @@
+"""
+Offline batch processing of CVs.
+
+Parses, analyzes and scores every CV in a directory or JSONL file and writes
+one JSON result per line. The output file doubles as the checkpoint: records
+are flushed as soon as a CV is done, and a restarted run skips every CV that
+already has a successful record. CVs that failed, e.g. on a rate limit or a
+timeout, are retried and their error records replaced.
+
+Usage:
+    python batch.py cvs/ --output results.jsonl --workers 4 --rate 2
+    python batch.py cvs.jsonl --output results.jsonl --rules-only
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ai_analyzer import analyze_and_score, perform_enhanced_analysis, score_resume
+from cv_model import parse_cv
+from resume_parser import parse_resume_file
+from scoring import features_from_parsed_cv, score_features
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+PROGRESS_INTERVAL = 10  # seconds between throughput reports
+
+
+class RateLimiter:
+    """
+    Spread CV starts evenly so that at most `rate` CVs start per second.
+    
+    Shared by all worker threads; a rate of 0 disables the limit.
+    """
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.next_slot = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        """Block until the calling thread may start the next CV."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def iter_inputs(source, language):
+    """
+    List the CVs to process.
+    
+    A directory yields every supported file below it, in sorted order. A JSONL
+    file yields one CV per line: {"id": ..., "text": ...} or {"id": ..., "path": ...},
+    optionally with its own "language".
+    
+    Args:
+        source (str): Directory or JSONL file
+        language (str): Default language ('en' or 'de')
+    
+    Yields:
+        dict: Work item with id, path or text, and language
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                    path = os.path.join(root, name)
+                    yield {'id': os.path.relpath(path, source), 'path': path, 'language': language}
+        return
+    
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logging.error(f"Skipping invalid JSON on line {line_number} of {source}")
+                continue
+            item = {
+                'id': str(record.get('id') or record.get('path') or line_number),
+                'language': record.get('language') or language
+            }
+            if 'text' in record:
+                item['text'] = record['text']
+            elif 'path' in record:
+                item['path'] = os.path.join(base_dir, record['path'])
+            else:
+                logging.error(f"Skipping line {line_number} of {source}: no 'text' or 'path'")
+                continue
+            yield item
+
+
+def load_checkpoint(output_path):
+    """
+    Collect the ids of the CVs already processed successfully.
+    
+    A trailing partial line left by a crash is cut off so that appended
+    records start on a fresh line. Error records are removed, so the CVs
+    are retried and end up with a single record.
+    
+    Args:
+        output_path (str): The JSONL output file
+    
+    Returns:
+        set: Ids of CVs that need no further processing
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    
+    kept = []
+    failed = 0
+    with open(output_path, 'rb+') as f:
+        valid_bytes = 0
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                record = json.loads(line)
+                record_id = record['id']
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(line)
+            if 'error' in record:
+                failed += 1
+                continue
+            done.add(record_id)
+            kept.append(line)
+        f.truncate(valid_bytes)
+    
+    if failed:
+        logging.info(f"Retrying {failed} CVs that failed in the previous run")
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.writelines(kept)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, output_path)
+    return done
+
+
+def process_item(item, rules_only=False):
+    """
+    Parse, analyze and score one CV.
+    
+    Args:
+        item (dict): Work item from iter_inputs()
+        rules_only (bool): Use the rule-based analysis and scoring only (no network)
+    
+    Returns:
+        dict: Result record for the output file
+    """
+    started = time.monotonic()
+    record = {'id': item['id'], 'language': item['language']}
+    try:
+        resume_text = item['text'] if 'text' in item else parse_resume_file(item['path'])
+        if not resume_text or not resume_text.strip():
+            raise ValueError("No text could be extracted")
+        
+        if rules_only:
+            corrections = perform_enhanced_analysis(resume_text, item['language'])
+            features = features_from_parsed_cv(parse_cv(resume_text))
+            score_data = score_features([features], item['language'])[0]
+        else:
+            corrections, score_data = analyze_and_score(resume_text, item['language'])
+            if score_data is None:
+                score_data = score_resume(resume_text, item['language'])
+        
+        record['resume_score'] = score_data
+        record['corrections'] = corrections
+    except Exception as e:
+        logging.error(f"Error processing {item['id']}: {str(e)}")
+        logging.debug(traceback.format_exc())
+        record['error'] = str(e)
+    
+    record['seconds'] = round(time.monotonic() - started, 3)
+    return record
+
+
+def run_batch(source, output_path, workers=4, rate=0, language='en', rules_only=False):
+    """
+    Process all CVs from a source and stream the results to a JSONL file.
+    
+    Args:
+        source (str): Directory or JSONL file
+        output_path (str): JSONL output file, also used as the checkpoint
+        workers (int): Number of CVs processed at the same time
+        rate (float): Maximum CVs started per second (0 for no limit)
+        language (str): Default language ('en' or 'de')
+        rules_only (bool): Use the rule-based analysis and scoring only (no network)
+    
+    Returns:
+        dict: Counts of processed, failed and skipped CVs and the throughput
+    """
+    done = load_checkpoint(output_path)
+    limiter = RateLimiter(rate)
+    stats = {'processed': 0, 'failed': 0, 'skipped': 0}
+    started = time.monotonic()
+    last_report = started
+    
+    def report(final=False):
+        elapsed = time.monotonic() - started
+        throughput = stats['processed'] / elapsed if elapsed > 0 else 0.0
+        label = "Done" if final else "Progress"
+        print(f"{label}: {stats['processed']} processed ({stats['failed']} failed), "
+              f"{stats['skipped']} skipped, {elapsed:.1f}s, {throughput:.2f} CVs/s",
+              file=sys.stderr, flush=True)
+        return throughput
+    
+    def run(item):
+        limiter.wait()
+        return process_item(item, rules_only)
+    
+    with open(output_path, 'a', encoding='utf-8') as output, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        
+        def drain(return_when):
+            nonlocal last_report, pending
+            finished, pending = wait(pending, return_when=return_when)
+            for future in finished:
+                record = future.result()
+                output.write(json.dumps(record, ensure_ascii=False) + '\n')
+                stats['processed'] += 1
+                if 'error' in record:
+                    stats['failed'] += 1
+            output.flush()
+            os.fsync(output.fileno())
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                last_report = time.monotonic()
+                report()
+        
+        for item in iter_inputs(source, language):
+            if item['id'] in done:
+                stats['skipped'] += 1
+                continue
+            done.add(item['id'])
+            pending.add(executor.submit(run, item))
+            # Keep a bounded number of CVs in flight so huge inputs stream through
+            if len(pending) >= workers * 2:
+                drain(FIRST_COMPLETED)
+        
+        while pending:
+            drain(FIRST_COMPLETED)
+    
+    stats['throughput'] = report(final=True)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze and score a batch of CVs.")
+    parser.add_argument('source', help="Directory of PDF/DOCX/TXT files or a JSONL file")
+    parser.add_argument('-o', '--output', required=True,
+                        help="JSONL output file; CVs with a successful record are skipped on restart")
+    parser.add_argument('-w', '--workers', type=int, default=4, help="CVs processed at the same time")
+    parser.add_argument('-r', '--rate', type=float, default=0,
+                        help="Maximum CVs started per second (default: no limit)")
+    parser.add_argument('-l', '--language', choices=['en', 'de'], default='en',
+                        help="Language of the analysis and summaries")
+    parser.add_argument('--rules-only', action='store_true',
+                        help="Use the rule-based analysis and scoring only, without network calls")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log every API call")
+    args = parser.parse_args(argv)
+    
+    if not os.path.exists(args.source):
+        parser.error(f"{args.source} does not exist")
+    
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    stats = run_batch(args.source, args.output, workers=max(1, args.workers), rate=args.rate,
+                      language=args.language, rules_only=args.rules_only)
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
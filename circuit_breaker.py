@@ -0,0 +1,271 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+# Circuit breaker configuration, shared by all backends
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", "20"))  # number of recent calls considered
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.environ.get("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("BREAKER_SLOW_CALL_SECONDS", "20"))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("BREAKER_RESET_TIMEOUT", "30"))  # seconds open before probing
+BREAKER_HALF_OPEN_CALLS = int(os.environ.get("BREAKER_HALF_OPEN_CALLS", "1"))
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the backend's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one backend.
+    
+    The breaker opens when the share of failed or slow calls among the last
+    `window` calls reaches `error_rate`. While open, calls are rejected
+    immediately. After `reset_timeout` seconds a limited number of probe
+    calls are let through (half-open); a successful probe closes the breaker
+    and a failed one opens it again.
+    """
+    
+    def __init__(self, name, window=BREAKER_WINDOW, min_calls=BREAKER_MIN_CALLS,
+                 error_rate=BREAKER_ERROR_RATE, slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+                 reset_timeout=BREAKER_RESET_TIMEOUT, half_open_calls=BREAKER_HALF_OPEN_CALLS):
+        self.name = name
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        
+        self.state = STATE_CLOSED
+        self.opened_at = 0
+        self.probes_in_flight = 0
+        self.outcomes = deque(maxlen=window)  # True for a good call
+        self.rejected = 0
+        self.total_calls = 0
+        self.total_failures = 0
+        self.last_latency = None
+        self._lock = threading.Lock()
+    
+    def is_open(self):
+        """
+        Check whether calls are currently being rejected, without taking a probe slot.
+        
+        Returns:
+            bool: True while the circuit is open and the reset timeout has not passed
+        """
+        with self._lock:
+            return self.state == STATE_OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+    
+    def allow_request(self):
+        """
+        Check whether a call may go to the backend now.
+        
+        Returns:
+            bool: False if the circuit is open or all half-open probes are taken
+        """
+        with self._lock:
+            if self.state == STATE_OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = STATE_HALF_OPEN
+                self.probes_in_flight = 0
+                logging.info(f"Circuit breaker '{self.name}' half-open, probing backend")
+            
+            if self.state == STATE_HALF_OPEN:
+                if self.probes_in_flight >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self.probes_in_flight += 1
+            
+            return True
+    
+    def record(self, success, latency=None):
+        """
+        Record the outcome of a call that was allowed through.
+        
+        Args:
+            success (bool): Whether the backend answered successfully
+            latency (float): Call duration in seconds; slow calls count as failures
+        """
+        good = success and (latency is None or latency <= self.slow_call_seconds)
+        
+        with self._lock:
+            self.total_calls += 1
+            if not good:
+                self.total_failures += 1
+            if latency is not None:
+                self.last_latency = latency
+            
+            if self.state == STATE_HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+                if good:
+                    self.state = STATE_CLOSED
+                    self.outcomes.clear()
+                    logging.info(f"Circuit breaker '{self.name}' closed")
+                else:
+                    self._open()
+                return
+            
+            self.outcomes.append(good)
+            failures = self.outcomes.count(False)
+            if (self.state == STATE_CLOSED and len(self.outcomes) >= self.min_calls
+                    and failures / len(self.outcomes) >= self.error_rate):
+                self._open()
+    
+    def release(self):
+        """Give back a call that was allowed through without recording an outcome."""
+        with self._lock:
+            if self.state == STATE_HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+    
+    def _open(self):
+        self.state = STATE_OPEN
+        self.opened_at = time.monotonic()
+        logging.warning(f"Circuit breaker '{self.name}' opened")
+    
+    def call(self, func, *args, is_failure=None, is_ignored=None, **kwargs):
+        """
+        Call func through the breaker.
+        
+        Args:
+            func (callable): The backend call
+            *args: Positional arguments for func
+            is_failure (callable): Optional check that marks a returned result as failed
+            is_ignored (callable): Optional check on the result or raised exception for
+                calls that are neither a success nor a failure, such as rate-limit responses
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            The result of func
+        
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit breaker '{self.name}' is open")
+        
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_ignored and is_ignored(e):
+                self.release()
+            else:
+                self.record(False, time.monotonic() - start)
+            raise
+        
+        if is_ignored and is_ignored(result):
+            self.release()
+        else:
+            self.record(not (is_failure and is_failure(result)), time.monotonic() - start)
+        return result
+    
+    def call_stream(self, func, *args, is_ignored=None, **kwargs):
+        """
+        Call a streaming backend function through the breaker.
+        
+        The outcome is recorded when the stream ends rather than when it is
+        created, so a stream that breaks off or stalls mid-way counts as a
+        failure. A stream counts as slow when its first item takes longer
+        than the slow-call limit. The returned stream must be iterated.
+        
+        Args:
+            func (callable): The backend call returning an iterable stream
+            *args: Positional arguments for func
+            is_ignored (callable): Optional check on an exception raised when opening
+                the stream for calls that count neither way
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            generator: The items of the stream
+        
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"Circuit breaker '{self.name}' is open")
+        
+        start = time.monotonic()
+        try:
+            stream = func(*args, **kwargs)
+        except Exception as e:
+            if is_ignored and is_ignored(e):
+                self.release()
+            else:
+                self.record(False, time.monotonic() - start)
+            raise
+        return self._watch_stream(stream, start)
+    
+    def _watch_stream(self, stream, start):
+        first_item_latency = None
+        try:
+            for item in stream:
+                if first_item_latency is None:
+                    first_item_latency = time.monotonic() - start
+                yield item
+        except GeneratorExit:
+            # The consumer stopped early, e.g. a client disconnected; the backend was fine
+            self.record(True, first_item_latency)
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - start)
+            raise
+        self.record(True, first_item_latency if first_item_latency is not None else time.monotonic() - start)
+    
+    def stats(self):
+        """
+        Get the breaker state for metrics.
+        
+        Returns:
+            dict: State, recent error rate and call counters
+        """
+        with self._lock:
+            recent = len(self.outcomes)
+            return {
+                "state": self.state,
+                "recent_calls": recent,
+                "recent_error_rate": self.outcomes.count(False) / recent if recent else 0.0,
+                "total_calls": self.total_calls,
+                "total_failures": self.total_failures,
+                "rejected": self.rejected,
+                "last_latency": self.last_latency
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """
+    Get the process-wide circuit breaker for a backend, creating it on first use.
+    
+    Args:
+        name (str): Backend name, e.g. 'groq'
+    
+    Returns:
+        CircuitBreaker: The breaker for that backend
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_stats():
+    """
+    Get the state of every breaker.
+    
+    Returns:
+        dict: Breaker stats keyed by backend name
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
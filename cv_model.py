@@ -0,0 +1,248 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from rule_engine import find_missing_sections
+
+# Section headings mapped to a canonical section name
+SECTION_HEADINGS = {
+    "experience": ["experience", "work experience", "professional experience", "employment", "work history",
+                   "berufserfahrung", "arbeitserfahrung", "praxiserfahrung", "beruflicher werdegang", "tätigkeiten"],
+    "education": ["education", "academic background", "ausbildung", "bildung", "schulbildung",
+                  "studium", "akademischer werdegang"],
+    "skills": ["skills", "technical skills", "fähigkeiten", "kenntnisse", "kompetenzen", "it-kenntnisse"],
+    "languages": ["languages", "language skills", "sprachen", "sprachkenntnisse"],
+    "projects": ["projects", "projekte"],
+    "summary": ["summary", "profile", "about me", "profil", "über mich", "kurzprofil"],
+    "certifications": ["certifications", "certificates", "zertifikate", "weiterbildung"],
+}
+
+HEADING_LOOKUP = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+HEADING_MAX_LENGTH = 40
+
+# Patterns shared with the rule-based scoring
+BULLET_REGEX = re.compile(r"(?:^|\n)\s*(?:•|-|\*|\d+\.)\s+")
+SECTION_HEADER_REGEX = re.compile(
+    r"(?:^|\n)(?:[A-Z][A-Za-z\s]+:|\b(?:EDUCATION|EXPERIENCE|SKILLS|PROJECTS|AUSBILDUNG|BERUFSERFAHRUNG|FÄHIGKEITEN|PROJEKTE)\b)")
+SKILLS_KEYWORD_REGEX = re.compile(r"\b(?:skills|fähigkeiten|kenntnisse|kompetenzen)\b", re.IGNORECASE)
+EDUCATION_KEYWORD_REGEX = re.compile(
+    r"\b(?:bachelor|master|diplom|doktor|phd|ausbildung|studium|university|hochschule|universität)\b", re.IGNORECASE)
+DATE_REGEX = re.compile(r"\b(?:(?:0?[1-9]|1[0-2])[./-])?(?:19|20)\d{2}\b")
+
+# Patterns for skills and key information
+LANGUAGE_REGEXES = [
+    re.compile(r"\b(?:Deutsch|Englisch|Französisch|Spanisch|Italienisch|Russisch|Chinesisch|Japanisch)\b(?:\s+\((?:Muttersprache|[BCG][12]|fließend|verhandlungssicher|Grundkenntnisse)\))?", re.IGNORECASE),
+    re.compile(r"\b(?:German|English|French|Spanish|Italian|Russian|Chinese|Japanese)\b(?:\s+\((?:native|[BCG][12]|fluent|business|basic)\))?", re.IGNORECASE),
+]
+TECH_REGEXES = [
+    re.compile(r"\b(?:Java|Python|C\+\+|JavaScript|SQL|PHP|HTML|CSS|React|Angular|Vue|Node\.js|Excel|Word|PowerPoint|SAP)\b", re.IGNORECASE),
+]
+EDUCATION_REGEXES = [
+    re.compile(r"(?:Universität|Hochschule|Fachhochschule|University|College|Institute)[^\n.]{3,50}", re.IGNORECASE),
+    re.compile(r"(?:Bachelor|Master|Diplom|Promotion|PhD|Dr\.)[^\n.]{3,50}", re.IGNORECASE),
+]
+EXPERIENCE_REGEXES = [
+    re.compile(r"(?:Software Engineer|Developer|Entwickler|Projektmanager|Manager|Consultant|Berater)[^\n.]{3,50}", re.IGNORECASE),
+]
+
+PARSED_CV_CACHE_SIZE = 64
+
+
+class ParsedCV:
+    """
+    Precomputed document model of a CV.
+    
+    Built once per upload, it holds the line and section structure and the
+    facts downstream analysis needs (bullets, dates, skills, languages,
+    missing sections), so those steps do not rescan the raw text.
+    """
+    
+    def __init__(self, text, lines, sections, bullets, dates, skills,
+                 missing_sections, section_header_count, mentions, word_count):
+        self.text = text
+        self.lines = lines
+        self.sections = sections
+        self.bullets = bullets
+        self.dates = dates
+        self.skills = skills
+        self.missing_sections = missing_sections
+        self.section_header_count = section_header_count
+        self.mentions = mentions
+        self.word_count = word_count
+    
+    @classmethod
+    def from_text(cls, text):
+        """
+        Build the model from CV text.
+        
+        Args:
+            text (str): The CV text
+            
+        Returns:
+            ParsedCV: The document model
+        """
+        lines = []
+        headings = []
+        position = 0
+        for line in text.split("\n"):
+            stripped = line.strip()
+            if stripped:
+                start = position + line.index(stripped[0])
+                lines.append([start, start + len(stripped)])
+                name = detect_heading(stripped)
+                if name:
+                    headings.append((name, stripped, start))
+            position += len(line) + 1
+        
+        sections = []
+        for index, (name, heading, start) in enumerate(headings):
+            end = headings[index + 1][2] if index + 1 < len(headings) else len(text)
+            sections.append({"name": name, "heading": heading, "start": start, "end": end})
+        
+        return cls(
+            text=text,
+            lines=lines,
+            sections=sections,
+            bullets=[match.end() for match in BULLET_REGEX.finditer(text)],
+            dates=[match.group(0) for match in DATE_REGEX.finditer(text)],
+            skills=extract_skills(text),
+            missing_sections=find_missing_sections(text),
+            section_header_count=len(SECTION_HEADER_REGEX.findall(text)),
+            mentions={
+                "skills": SKILLS_KEYWORD_REGEX.search(text) is not None,
+                "education": EDUCATION_KEYWORD_REGEX.search(text) is not None,
+            },
+            word_count=len(text.split())
+        )
+    
+    def section_text(self, name):
+        """
+        Get the text of all sections with a canonical name.
+        
+        Args:
+            name (str): Canonical section name, e.g. 'experience'
+            
+        Returns:
+            str: The sections' text including headings, or '' if there is none
+        """
+        return "\n".join(
+            self.text[section["start"]:section["end"]].strip()
+            for section in self.sections if section["name"] == name
+        )
+    
+    def to_dict(self):
+        """
+        Convert the model to a JSON-serializable dict, without the text.
+        
+        Returns:
+            dict: The model's fields
+        """
+        return {
+            "lines": self.lines,
+            "sections": self.sections,
+            "bullets": self.bullets,
+            "dates": self.dates,
+            "skills": self.skills,
+            "missing_sections": self.missing_sections,
+            "section_header_count": self.section_header_count,
+            "mentions": self.mentions,
+            "word_count": self.word_count
+        }
+    
+    @classmethod
+    def from_dict(cls, text, data):
+        """
+        Restore a model stored with to_dict().
+        
+        Args:
+            text (str): The CV text the model was built from
+            data (dict): Output of to_dict()
+            
+        Returns:
+            ParsedCV: The document model
+        """
+        return cls(text=text, **data)
+
+
+def detect_heading(line):
+    """
+    Check whether a line is a section heading.
+    
+    Args:
+        line (str): A stripped line of the CV
+        
+    Returns:
+        str: Canonical section name, or None if the line is not a known heading
+    """
+    if len(line) > HEADING_MAX_LENGTH:
+        return None
+    key = " ".join(line.rstrip(":").split()).casefold()
+    return HEADING_LOOKUP.get(key)
+
+
+def extract_skills(text):
+    """
+    Extract skills and key information from CV text.
+    
+    Args:
+        text (str): The CV text
+        
+    Returns:
+        dict: Deduplicated technical_skills, languages, education and experience lists
+    """
+    groups = {
+        "technical_skills": TECH_REGEXES,
+        "languages": LANGUAGE_REGEXES,
+        "education": EDUCATION_REGEXES,
+        "experience": EXPERIENCE_REGEXES,
+    }
+    return {
+        key: list(set(match for regex in regexes for match in regex.findall(text)))
+        for key, regexes in groups.items()
+    }
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _text_key(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def remember_parsed_cv(parsed_cv):
+    """
+    Put a model into the per-process cache, e.g. after restoring it from the session.
+    
+    Args:
+        parsed_cv (ParsedCV): The document model
+    """
+    key = _text_key(parsed_cv.text)
+    with _cache_lock:
+        _cache[key] = parsed_cv
+        _cache.move_to_end(key)
+        while len(_cache) > PARSED_CV_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def parse_cv(text):
+    """
+    Get the document model for a CV text, building it only once.
+    
+    Args:
+        text (str): The CV text
+        
+    Returns:
+        ParsedCV: The document model
+    """
+    key = _text_key(text)
+    with _cache_lock:
+        parsed_cv = _cache.get(key)
+        if parsed_cv is not None:
+            _cache.move_to_end(key)
+            return parsed_cv
+    
+    parsed_cv = ParsedCV.from_text(text)
+    remember_parsed_cv(parsed_cv)
+    return parsed_cv
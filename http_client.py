@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connection pool sizing: HTTP_POOL_MAXSIZE is how many connections per host a
+# process keeps alive for reuse. LLM calls are made by the job queue workers
+# (JOB_WORKERS), the scoring calls they hand to the LLM pool (LLM_POOL_WORKERS),
+# the chunk pool (ANALYSIS_CHUNK_CONCURRENCY) and request threads streaming a
+# cover letter (GUNICORN_THREADS); the Groq rate limiter decides when they run,
+# not how many run at once. The default of request threads plus LLM pool threads
+# covers the usual peak of a few jobs. Calls beyond it open extra connections that
+# are closed afterwards; raise HTTP_POOL_MAXSIZE if "Connection pool is full"
+# warnings show up in the logs.
+GUNICORN_THREADS = int(os.environ.get("GUNICORN_THREADS", "1"))
+LLM_POOL_WORKERS = int(os.environ.get("LLM_POOL_WORKERS", "8"))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", str(GUNICORN_THREADS + LLM_POOL_WORKERS)))
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "4"))  # number of distinct hosts
+
+# Timeouts in seconds
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "45"))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Get the pooled HTTP session for this process.
+    
+    The session is created lazily so that every gunicorn worker gets its own
+    connection pool after forking; connections are kept alive between calls.
+    
+    Returns:
+        requests.Session: Shared session with a keep-alive connection pool
+    """
+    global _session, _session_pid
+    
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    max_retries=0
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Connection": "keep-alive"})
+                
+                _session = session
+                _session_pid = os.getpid()
+                logging.info(f"HTTP session initialized with pool size {HTTP_POOL_MAXSIZE}")
+    
+    return _session
+
+
+def post(url, read_timeout=None, **kwargs):
+    """
+    Send a POST request through the pooled session.
+    
+    Args:
+        url (str): Request URL
+        read_timeout (float): Read timeout in seconds; defaults to HTTP_READ_TIMEOUT
+        **kwargs: Passed on to requests.Session.post (headers, json, data, ...)
+        
+    Returns:
+        requests.Response: The response
+    """
+    timeout = (HTTP_CONNECT_TIMEOUT, read_timeout if read_timeout is not None else HTTP_READ_TIMEOUT)
+    return get_session().post(url, timeout=timeout, **kwargs)
+
+
+def create_groq_http_client():
+    """
+    Create an httpx client for the Groq SDK with the same pool size and timeouts.
+    
+    Returns:
+        httpx.Client: Client to pass as http_client to Groq(), or None if httpx is unavailable
+    """
+    try:
+        import httpx
+    except ImportError:
+        logging.warning("httpx is not installed; Groq client will use its default connection pool")
+        return None
+    
+    return httpx.Client(
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=HTTP_POOL_MAXSIZE
+        )
+    )
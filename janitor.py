@@ -0,0 +1,263 @@
+"""
+Cleanup of the directories the app leaves files behind in.
+
+Sessions used to be pickled into flask_sessions/ and uploads were saved to
+uploads/ before parsing; neither is written anymore, but long-lived
+instances still hold many old files there. Prepared downloads accumulate
+in the artifact directory. The janitor deletes files older than a maximum
+age and, if a directory is still over its size budget, the oldest files
+until it fits. It works in small batches so that it never holds up request
+handling.
+
+Usage:
+    python janitor.py            # clean the default directories once
+    python janitor.py --max-age 3600 --max-bytes 100000000 /some/dir
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from artifacts import ARTIFACT_DIR
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; every process cleans then
+    fcntl = None
+
+# Janitor configuration
+JANITOR_ENABLED = os.environ.get("JANITOR_ENABLED", "1") != "0"
+JANITOR_DIRS = os.environ.get("JANITOR_DIRS", os.pathsep.join([
+    os.path.join(tempfile.gettempdir(), 'flask_sessions'),  # legacy flask_session file store
+    os.path.join(os.getcwd(), 'uploads'),  # legacy upload folder
+    ARTIFACT_DIR  # prepared downloads; deleted ones are rendered again on demand
+])).split(os.pathsep)
+JANITOR_MAX_AGE = int(os.environ.get("JANITOR_MAX_AGE", str(24 * 3600)))  # seconds
+JANITOR_MAX_BYTES = int(os.environ.get("JANITOR_MAX_BYTES", str(256 * 1024 * 1024)))  # per directory
+JANITOR_BATCH_SIZE = int(os.environ.get("JANITOR_BATCH_SIZE", "500"))  # directory entries per step
+JANITOR_STEP_PAUSE = float(os.environ.get("JANITOR_STEP_PAUSE", "0.5"))  # seconds between steps
+JANITOR_INTERVAL = int(os.environ.get("JANITOR_INTERVAL", "3600"))  # seconds between full passes
+JANITOR_LOCK_PATH = os.environ.get(
+    "JANITOR_LOCK_PATH", os.path.join(tempfile.gettempdir(), 'resume_janitor.lock'))
+
+
+class Janitor:
+    """
+    Incremental age and size based cleanup of a set of directories.
+    
+    A pass walks the directories one batch of entries per step(). Files
+    older than `max_age` are deleted as they are seen; the remaining files
+    are remembered, and if their total size is over `max_bytes` the oldest
+    ones are deleted, again batch by batch, until the directory fits.
+    """
+    
+    def __init__(self, directories, max_age=JANITOR_MAX_AGE, max_bytes=JANITOR_MAX_BYTES,
+                 batch_size=JANITOR_BATCH_SIZE):
+        self.directories = [directory for directory in directories if directory]
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.counters = {"passes": 0, "files_scanned": 0, "files_removed": 0,
+                         "bytes_reclaimed": 0, "errors": 0, "last_pass_at": None}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._thread_pid = None
+        self._start_lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        # Position of the current pass
+        self._index = 0
+        self._scanner = None
+        self._kept = []  # (mtime, size, path) of files that survived the age check
+        self._kept_bytes = 0
+        self._trimming = False
+    
+    def _count(self, **amounts):
+        with self._stats_lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+    
+    def _remove(self, path, size):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logging.warning(f"Janitor could not remove {path}: {str(e)}")
+            self._count(errors=1)
+            return
+        self._count(files_removed=1, bytes_reclaimed=size)
+    
+    def step(self):
+        """
+        Process one batch of the current pass.
+        
+        Returns:
+            bool: True if this step finished a pass over all directories
+        """
+        if self._index >= len(self.directories):
+            self._finish_pass()
+            return True
+        
+        directory = self.directories[self._index]
+        if self._trimming:
+            self._trim_step()
+        elif self._scanner is None:
+            try:
+                self._scanner = os.scandir(directory)
+            except FileNotFoundError:
+                self._next_directory()
+            except OSError as e:
+                logging.warning(f"Janitor cannot scan {directory}: {str(e)}")
+                self._count(errors=1)
+                self._next_directory()
+        else:
+            self._scan_step()
+        
+        if self._index >= len(self.directories):
+            self._finish_pass()
+            return True
+        return False
+    
+    def _scan_step(self):
+        cutoff = time.time() - self.max_age
+        scanned = 0
+        for entry in self._scanner:
+            scanned += 1
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            
+            if stat.st_mtime < cutoff:
+                self._remove(entry.path, stat.st_size)
+            else:
+                self._kept.append((stat.st_mtime, stat.st_size, entry.path))
+                self._kept_bytes += stat.st_size
+            
+            if scanned >= self.batch_size:
+                self._count(files_scanned=scanned)
+                return
+        
+        # Directory fully scanned
+        self._count(files_scanned=scanned)
+        self._scanner.close()
+        self._scanner = None
+        if self._kept_bytes > self.max_bytes:
+            self._kept.sort(reverse=True)  # oldest last, so trimming pops from the end
+            self._trimming = True
+        else:
+            self._next_directory()
+    
+    def _trim_step(self):
+        for _ in range(self.batch_size):
+            if self._kept_bytes <= self.max_bytes or not self._kept:
+                self._next_directory()
+                return
+            mtime, size, path = self._kept.pop()
+            self._remove(path, size)
+            self._kept_bytes -= size
+    
+    def _next_directory(self):
+        if self._scanner is not None:
+            self._scanner.close()
+        self._scanner = None
+        self._kept = []
+        self._kept_bytes = 0
+        self._trimming = False
+        self._index += 1
+    
+    def _finish_pass(self):
+        self._reset()
+        with self._stats_lock:
+            self.counters["passes"] += 1
+            self.counters["last_pass_at"] = time.time()
+    
+    def run_pass(self, pause=0):
+        """
+        Run steps until a full pass over all directories is done.
+        
+        Args:
+            pause (float): Seconds to sleep between steps
+        """
+        while not self.step():
+            if pause:
+                time.sleep(pause)
+    
+    def ensure_started(self):
+        """Start the background janitor thread of this process if it is not running yet."""
+        if self._thread_pid == os.getpid():
+            return
+        
+        with self._start_lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._run, name="janitor", daemon=True)
+            self._thread.start()
+            self._thread_pid = os.getpid()
+    
+    def _run(self):
+        while True:
+            lock_file = self._try_lock()
+            if lock_file is not False:
+                try:
+                    self.run_pass(pause=JANITOR_STEP_PAUSE)
+                    logging.info(f"Janitor pass done: {self.stats()}")
+                except Exception as e:
+                    logging.error(f"Janitor pass failed: {str(e)}")
+                    self._reset()
+                finally:
+                    if lock_file is not None:
+                        lock_file.close()
+            time.sleep(JANITOR_INTERVAL)
+    
+    def _try_lock(self):
+        # Only one gunicorn worker cleans at a time; another one takes over if it goes away
+        if fcntl is None:
+            return None
+        lock_file = open(JANITOR_LOCK_PATH, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        return lock_file
+    
+    def stats(self):
+        """
+        Get the cleanup counters for metrics.
+        
+        Returns:
+            dict: Passes, scanned and removed files, reclaimed bytes and errors
+        """
+        with self._stats_lock:
+            return dict(self.counters)
+
+
+janitor = Janitor(JANITOR_DIRS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete old files from the session and upload directories.")
+    parser.add_argument('directories', nargs='*', default=JANITOR_DIRS,
+                        help="Directories to clean (default: the legacy session and upload directories)")
+    parser.add_argument('--max-age', type=int, default=JANITOR_MAX_AGE, help="Maximum file age in seconds")
+    parser.add_argument('--max-bytes', type=int, default=JANITOR_MAX_BYTES,
+                        help="Size budget per directory in bytes")
+    args = parser.parse_args(argv)
+    
+    cleaner = Janitor(args.directories, max_age=args.max_age, max_bytes=args.max_bytes)
+    cleaner.run_pass()
+    print(json.dumps(cleaner.stats()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+
+# Job queue configuration
+JOB_QUEUE_PATH = os.environ.get(
+    "JOB_QUEUE_PATH", os.path.join(tempfile.gettempdir(), 'resume_jobs.sqlite3'))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))  # worker threads per process
+JOB_TIMEOUT = int(os.environ.get("JOB_TIMEOUT", "300"))  # seconds before a running job is failed
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", "3600"))  # seconds finished jobs are kept
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class JobQueue:
+    """
+    Local job queue backed by SQLite and processed by worker threads.
+    
+    Jobs live in a database shared by all gunicorn workers, so any worker can
+    report the status of a job. Every process runs its own worker threads,
+    which claim queued jobs atomically and run the handler registered for
+    the job kind.
+    """
+    
+    def __init__(self, path, workers=JOB_WORKERS):
+        self.path = path
+        self.workers = workers
+        self.handlers = {}
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._threads_pid = None
+        self._start_lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        conn.commit()
+    
+    def _connect(self):
+        # One connection per thread; SQLite connections must not be shared
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def register(self, kind, handler):
+        """
+        Register the function that processes jobs of a kind.
+        
+        Args:
+            kind (str): Job kind, e.g. 'analyze'
+            handler (callable): Called with the job payload dict; returns a JSON-serializable result
+        """
+        self.handlers[kind] = handler
+    
+    def submit(self, kind, payload):
+        """
+        Enqueue a job.
+        
+        Args:
+            kind (str): Job kind with a registered handler
+            payload (dict): JSON-serializable job arguments
+            
+        Returns:
+            str: The job id
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+        
+        self.ensure_workers()
+        
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, STATUS_QUEUED, json.dumps(payload), now, now)
+        )
+        
+        with self._wakeup:
+            self._wakeup.notify()
+        
+        logging.debug(f"Enqueued {kind} job {job_id}")
+        return job_id
+    
+    def start_external(self, kind):
+        """
+        Record a job that the caller runs itself, e.g. a streamed response.
+        
+        The job is created as running so workers never pick it up; finish it
+        with complete() or fail(). Status polling works as for queued jobs.
+        
+        Args:
+            kind (str): Job kind
+            
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, STATUS_RUNNING, json.dumps({}), now, now)
+        )
+        return job_id
+    
+    def complete(self, job_id, result):
+        """
+        Mark a job as done.
+        
+        Args:
+            job_id (str): The job id
+            result: JSON-serializable job result
+            
+        Returns:
+            bool: False if the job was no longer running, e.g. it timed out; the result is dropped
+        """
+        return self._finish(job_id, STATUS_DONE, result=result)
+    
+    def fail(self, job_id, error):
+        """
+        Mark a job as failed.
+        
+        Args:
+            job_id (str): The job id
+            error (str): Error message reported to the client
+            
+        Returns:
+            bool: False if the job was no longer running
+        """
+        return self._finish(job_id, STATUS_FAILED, error=error)
+    
+    def get(self, job_id):
+        """
+        Get the status of a job.
+        
+        Args:
+            job_id (str): The job id
+            
+        Returns:
+            dict: Job id, kind, status, result and error, or None if unknown
+        """
+        row = self._connect().execute(
+            "SELECT id, kind, status, result, error FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4]
+        }
+    
+    def depth(self):
+        """
+        Count jobs that are waiting or running.
+        
+        Returns:
+            dict: Number of queued and running jobs
+        """
+        rows = self._connect().execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?) GROUP BY status",
+            (STATUS_QUEUED, STATUS_RUNNING)
+        ).fetchall()
+        counts = dict(rows)
+        return {"queued": counts.get(STATUS_QUEUED, 0), "running": counts.get(STATUS_RUNNING, 0)}
+    
+    def ensure_workers(self):
+        """Start the worker threads of this process if they are not running yet."""
+        if self._threads_pid == os.getpid():
+            return
+        
+        with self._start_lock:
+            if self._threads_pid == os.getpid():
+                return
+            
+            self._threads = []
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._threads_pid = os.getpid()
+            logging.info(f"Started {self.workers} job workers")
+    
+    def _claim(self):
+        # Atomically move the oldest queued job to running
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                    (STATUS_RUNNING, now, row[0])
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        return row
+    
+    def _finish(self, job_id, status, result=None, error=None):
+        # Only running jobs finish; a job that already timed out keeps the status clients have seen
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ? AND status = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id,
+             STATUS_RUNNING)
+        )
+        if cursor.rowcount == 0:
+            logging.warning(f"Dropping late {status} result of job {job_id}, it is no longer running")
+            return False
+        return True
+    
+    def _expire(self):
+        # Fail jobs whose worker died and drop old finished jobs
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+            (STATUS_FAILED, "Job timed out", now, STATUS_RUNNING, now - JOB_TIMEOUT)
+        )
+        conn.execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (STATUS_DONE, STATUS_FAILED, now - JOB_RETENTION)
+        )
+    
+    def _work(self):
+        last_expiry = 0
+        while True:
+            try:
+                if time.time() - last_expiry > JOB_POLL_INTERVAL * 60:
+                    self._expire()
+                    last_expiry = time.time()
+                
+                row = self._claim()
+            except sqlite3.Error as e:
+                logging.warning(f"Job queue error: {str(e)}")
+                row = None
+            
+            if row is None:
+                with self._wakeup:
+                    self._wakeup.wait(JOB_POLL_INTERVAL)
+                continue
+            
+            job_id, kind, payload = row
+            logging.info(f"Processing {kind} job {job_id}")
+            try:
+                result = self.handlers[kind](json.loads(payload))
+                self.complete(job_id, result)
+            except Exception as e:
+                logging.error(f"Error processing {kind} job {job_id}: {str(e)}")
+                logging.error(traceback.format_exc())
+                try:
+                    self.fail(job_id, str(e))
+                except sqlite3.Error as db_error:
+                    logging.error(f"Could not record failure of job {job_id}: {str(db_error)}")
+
+
+# Process-wide job queue instance
+job_queue = JobQueue(JOB_QUEUE_PATH)
@@ -0,0 +1,187 @@
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+
+from result_cache import ResultCache
+
+# PDF export configuration
+PDF_FONT_PATH = os.environ.get("PDF_FONT_PATH")  # Unicode TTF font; searched in PDF_FONT_CANDIDATES if unset
+PDF_FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf"
+]
+PDF_FONT_CACHE_DIR = os.environ.get(
+    "PDF_FONT_CACHE_DIR", os.path.join(tempfile.gettempdir(), 'resume_pdf_fonts'))
+PDF_CACHE_ENABLED = os.environ.get("PDF_CACHE_ENABLED", "1") != "0"
+PDF_CACHE_PATH = os.environ.get(
+    "PDF_CACHE_PATH", os.path.join(tempfile.gettempdir(), 'resume_pdf_cache.sqlite3'))
+PDF_CACHE_TTL = int(os.environ.get("PDF_CACHE_TTL", str(24 * 3600)))  # seconds
+PDF_CACHE_MAX_ENTRIES = int(os.environ.get("PDF_CACHE_MAX_ENTRIES", "500"))
+PDF_EXPORT_VERSION = "1"  # bump when the rendered output changes
+
+UNICODE_FONT_FAMILY = "DocumentSans"
+CORE_FONT_FAMILY = "Arial"
+
+# Replacements for the Latin-1 core font, which lacks typographic punctuation
+CORE_FONT_REPLACEMENTS = str.maketrans({
+    '\u2013': '-',    # en-dash
+    '\u2014': '--',   # em-dash
+    '\u2018': "'",    # left single quote
+    '\u2019': "'",    # right single quote
+    '\u201a': "'",    # single low quote
+    '\u201c': '"',    # left double quote
+    '\u201d': '"',    # right double quote
+    '\u201e': '"',    # double low quote (German opening quote)
+    '\u2022': '-',    # bullet
+    '\u2026': '...',  # ellipsis
+    '\u00a0': ' '     # non-breaking space
+})
+
+_font_path = None
+_font_resolved = False
+_font_lock = threading.Lock()
+
+
+def get_unicode_font():
+    """
+    Find the Unicode TTF font, once per process.
+    
+    The font metrics are parsed by FPDF on first use and kept in
+    PDF_FONT_CACHE_DIR, so later documents only load the parsed metrics.
+    
+    Returns:
+        str: Path of the TTF font, or None if no Unicode font is available
+    """
+    global _font_path, _font_resolved
+    
+    if _font_resolved:
+        return _font_path
+    
+    with _font_lock:
+        if _font_resolved:
+            return _font_path
+        
+        candidates = [PDF_FONT_PATH] if PDF_FONT_PATH else PDF_FONT_CANDIDATES
+        _font_path = next((path for path in candidates if os.path.isfile(path)), None)
+        if _font_path:
+            try:
+                import fpdf.fpdf as fpdf_module
+                if hasattr(fpdf_module, 'FPDF_CACHE_MODE'):
+                    # Keep the parsed metrics in a writable directory instead of next to the font
+                    os.makedirs(PDF_FONT_CACHE_DIR, exist_ok=True)
+                    fpdf_module.FPDF_CACHE_MODE = 2
+                    fpdf_module.FPDF_CACHE_DIR = PDF_FONT_CACHE_DIR
+            except (ImportError, OSError) as e:
+                logging.warning(f"Could not set up the PDF font cache: {str(e)}")
+            logging.info(f"Using Unicode font {_font_path} for PDF export")
+        else:
+            logging.warning("No Unicode TTF font found; PDF export falls back to Latin-1")
+        
+        _font_resolved = True
+        return _font_path
+
+
+class PdfLayout:
+    """
+    Page layout for exported documents.
+    
+    One layout instance renders any number of documents; each render() call
+    creates a new FPDF document, sets the font and writes the text
+    paragraph by paragraph.
+    """
+    
+    def __init__(self, font_size=12, line_height=10, margin=10):
+        self.font_size = font_size
+        self.line_height = line_height
+        self.margin = margin
+    
+    def signature(self):
+        """Identify the layout settings in cache keys."""
+        return f"{self.font_size}:{self.line_height}:{self.margin}"
+    
+    def render(self, text):
+        """
+        Render text into a PDF.
+        
+        Args:
+            text (str): Plain text; line breaks are kept
+        
+        Returns:
+            bytes: The PDF document
+        """
+        from fpdf import FPDF
+        
+        pdf = FPDF()
+        pdf.set_margins(self.margin, self.margin)
+        pdf.add_page()
+        
+        font_path = get_unicode_font()
+        if font_path:
+            pdf.add_font(UNICODE_FONT_FAMILY, '', font_path, uni=True)
+            pdf.set_font(UNICODE_FONT_FAMILY, size=self.font_size)
+            widths = pdf.current_font.get('cw') if isinstance(pdf.current_font, dict) else None
+            if isinstance(widths, list):
+                # FPDF 1.7 fails on characters beyond the font's character map, e.g. emoji
+                text = ''.join(char if ord(char) < len(widths) else '?' for char in text)
+        else:
+            pdf.set_font(CORE_FONT_FAMILY, size=self.font_size)
+            text = text.translate(CORE_FONT_REPLACEMENTS).encode('latin-1', 'replace').decode('latin-1')
+        
+        for line in text.replace('\r\n', '\n').split('\n'):
+            pdf.multi_cell(0, self.line_height, line)
+        
+        pdf_data = pdf.output(dest='S')
+        if isinstance(pdf_data, str):
+            pdf_data = pdf_data.encode('latin-1')
+        return bytes(pdf_data)
+
+
+default_layout = PdfLayout()
+
+# Rendered PDFs, shared by all gunicorn workers
+pdf_cache = ResultCache(PDF_CACHE_PATH, ttl=PDF_CACHE_TTL,
+                        max_entries=PDF_CACHE_MAX_ENTRIES, enabled=PDF_CACHE_ENABLED)
+
+
+def export_signature(layout=default_layout):
+    """
+    Identify everything besides the text that shapes a rendered PDF.
+    
+    Args:
+        layout (PdfLayout): Page layout
+    
+    Returns:
+        str: Layout settings, resolved font and export version
+    """
+    return f"{layout.signature()}:{get_unicode_font() or 'latin-1'}:{PDF_EXPORT_VERSION}"
+
+
+def render_pdf(text, layout=default_layout):
+    """
+    Render text into a PDF, reusing a cached rendering of the same text.
+    
+    Args:
+        text (str): Plain text to export
+        layout (PdfLayout): Page layout
+    
+    Returns:
+        bytes: The PDF document
+    """
+    # Hash the exact text: whitespace changes the rendered document
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    cache_key = f"{digest}:{export_signature(layout)}"
+    
+    cached = pdf_cache.get('pdf', cache_key)
+    if cached is not None:
+        logging.info("Serving cached PDF")
+        return base64.b64decode(cached)
+    
+    pdf_data = layout.render(text)
+    pdf_cache.set('pdf', cache_key, base64.b64encode(pdf_data).decode('ascii'))
+    return pdf_data
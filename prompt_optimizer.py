@@ -0,0 +1,340 @@
+import logging
+import os
+import re
+import threading
+
+from cv_model import parse_cv
+from rate_limiter import CHARS_PER_TOKEN
+
+# Tokenizer for exact counts; without it, tokens are estimated from the text length
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Prompt optimizer configuration; budgets are in tokens of CV text per prompt
+PROMPT_OPTIMIZER_ENABLED = os.environ.get("PROMPT_OPTIMIZER_ENABLED", "1") != "0"
+ANALYSIS_TOKEN_BUDGET = int(os.environ.get("ANALYSIS_TOKEN_BUDGET", "900"))  # per analysis chunk
+SCORE_TOKEN_BUDGET = int(os.environ.get("SCORE_TOKEN_BUDGET", "1000"))  # score and combined prompts
+JOB_DESCRIPTION_TOKEN_BUDGET = int(os.environ.get("JOB_DESCRIPTION_TOKEN_BUDGET", "150"))
+PROMPT_TOKENIZER = os.environ.get("PROMPT_TOKENIZER", "cl100k_base")  # close to the Llama 3 tokenizer
+
+# Sections in the order they are packed into the budget; text before the first heading is 'header'
+SECTION_PRIORITY = ["experience", "skills", "summary", "header", "education", "projects",
+                    "certifications", "languages"]
+
+# Contact details and page furniture that don't help the model judge a CV
+CONTACT_REGEX = re.compile(
+    r"[\w.+-]+@[\w-]+\.[\w.-]+"                                          # e-mail
+    r"|\b(?:e-?mail|tel|telefon|phone|mobil|mobile|handy|fon|adresse|address)\b\.?\s*:"  # labels
+    r"|\+\d{1,3}[\s\d()/-]{6,}\d"                                        # international number
+    r"|\b0\d{2,5}[\s/-]?\d{4,}\b"                                        # national number
+    r"|(?:https?://|www\.)\S+|\b(?:linkedin|xing|github)\.com\S*"        # profile links
+    # Postal code and city, case-sensitive and at the start of the line or after a separator,
+    # so counts such as "20000 users" or "Betreute 20000 Kunden" are not taken for an address
+    r"|(?-i:(?:^\s*|[,|·•]\s*)\d{5}\s+[A-ZÄÖÜ][a-zäöüß.-]+(?:\s+(?:am|an|im|in|der|[A-ZÄÖÜ][a-zäöüß.-]*)){0,2})"
+    r"(?=\s*(?:$|[,|·•]))"
+    r"|\b\S*(?:straße|strasse|str\.|weg|platz|allee|gasse)\s+\d+\w?\b",  # street and number
+    re.IGNORECASE)
+CONTACT_MAX_OTHER_WORDS = 3  # a line is a contact line if no more words remain besides contact details
+PAGE_NUMBER_REGEX = re.compile(r"^(?:(?:page|seite)\s*)?[-–]?\s*\d{1,3}\s*(?:(?:of|von|/)\s*\d+)?\s*[-–]?$", re.IGNORECASE)
+PAGE_EDGE_LINES = 2  # lines at the top and bottom of a page checked for repeated headers and footers
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    
+    if tiktoken is None:
+        return None
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    _encoding = tiktoken.get_encoding(PROMPT_TOKENIZER)
+                except Exception as e:
+                    logging.warning(f"Tokenizer {PROMPT_TOKENIZER} unavailable, estimating tokens: {str(e)}")
+                    _encoding = False
+    return _encoding or None
+
+
+def count_tokens(text):
+    """
+    Count the tokens of a text.
+    
+    Args:
+        text (str): The text
+    
+    Returns:
+        int: Token count from the tokenizer, or an estimate if it isn't installed
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def packing_signature(token_budget):
+    """
+    Identify how text is packed into a budget, for the cache keys of results from packed prompts.
+    
+    Args:
+        token_budget (int): The token budget of the prompt
+    
+    Returns:
+        str: Signature that changes with the budget, the tokenizer and whether packing is on
+    """
+    if not PROMPT_OPTIMIZER_ENABLED:
+        return "unpacked"
+    tokenizer = PROMPT_TOKENIZER if _get_encoding() is not None else f"chars/{CHARS_PER_TOKEN}"
+    return f"{tokenizer}:{token_budget}"
+
+
+class PackedText:
+    """
+    Compacted excerpt of a text that maps back to the original offsets.
+    
+    `offsets[i]` is the position in the original text of character i of the
+    packed text, so spans found in the packed text can be located in the
+    original.
+    """
+    
+    def __init__(self, text, offsets, tokens, original_tokens=None, source=None):
+        self.text = text
+        self.offsets = offsets
+        self.tokens = tokens
+        self.original_tokens = original_tokens
+        self.source = source
+    
+    @classmethod
+    def identity(cls, text):
+        """Wrap a text unchanged."""
+        return cls(text, list(range(len(text))), count_tokens(text), source=text)
+    
+    def to_original(self, start, end):
+        """
+        Map a span of the packed text to the original text.
+        
+        Spans that run across text dropped while packing, such as a contact
+        line between two lines that were kept, are rejected: the original
+        range would include text the model never saw.
+        
+        Args:
+            start (int): Start offset in the packed text
+            end (int): End offset in the packed text (exclusive)
+        
+        Returns:
+            tuple: (start, end) offsets in the original text, or None if the span isn't contiguous there
+        """
+        if start >= end:
+            position = self.offsets[start] if start < len(self.offsets) else (self.offsets[-1] + 1 if self.offsets else 0)
+            return position, position
+        
+        if self.source is not None:
+            for index in range(start, end - 1):
+                gap = self.source[self.offsets[index] + 1:self.offsets[index + 1]]
+                if gap and not gap.isspace():
+                    return None
+        return self.offsets[start], self.offsets[end - 1] + 1
+
+
+def split_lines(text):
+    """
+    Split text into lines with their offsets.
+    
+    Args:
+        text (str): The text
+    
+    Returns:
+        list: (start, line) tuples; page breaks ('\\f') end a line
+    """
+    lines = []
+    for match in re.finditer(r"[^\n\f]*", text):
+        if match.start() == match.end() and match.start() > 0 and text[match.start() - 1] not in "\n\f":
+            continue
+        lines.append((match.start(), match.group(0)))
+    return lines
+
+
+def find_page_furniture(text, lines):
+    """
+    Find header and footer lines that repeat on several pages, and page numbers.
+    
+    Args:
+        text (str): The full text, with pages separated by '\\f'
+        lines (list): Output of split_lines(text)
+    
+    Returns:
+        set: Start offsets of the lines to drop
+    """
+    # Group the non-empty lines by page
+    pages = [[]]
+    page_breaks = iter([match.start() for match in re.finditer("\f", text)] + [len(text) + 1])
+    next_break = next(page_breaks)
+    for start, line in lines:
+        while start > next_break:
+            pages.append([])
+            next_break = next(page_breaks)
+        if line.strip():
+            pages[-1].append((start, line))
+    pages = [page for page in pages if page]
+    
+    furniture = set()
+    edges = {}
+    for page in pages:
+        for start, line in page[:PAGE_EDGE_LINES] + page[-PAGE_EDGE_LINES:]:
+            stripped = line.strip()
+            if PAGE_NUMBER_REGEX.match(stripped):
+                furniture.add(start)
+                continue
+            # Ignore the numbers in "Page 2" or a date, so the line matches on every page
+            key = re.sub(r"\d+", "#", " ".join(stripped.casefold().split()))
+            edges.setdefault(key, set()).add(start)
+    
+    if len(pages) > 1:
+        for key, starts in edges.items():
+            if len(starts) > 1:
+                furniture.update(starts)
+    return furniture
+
+
+def is_contact_line(line):
+    """Check whether a line holds only contact details such as e-mail, phone, address or profile links."""
+    if not CONTACT_REGEX.search(line):
+        return False
+    other_words = re.findall(r"\w+", CONTACT_REGEX.sub(" ", line))
+    return len(other_words) <= CONTACT_MAX_OTHER_WORDS
+
+
+def compact_line(start, line):
+    """
+    Collapse whitespace runs in a line and strip it.
+    
+    Args:
+        start (int): Offset of the line in the original text
+        line (str): The line
+    
+    Returns:
+        tuple: (compacted line, offsets of its characters in the original text)
+    """
+    chars = []
+    offsets = []
+    for match in re.finditer(r"\S+", line):
+        if chars:
+            chars.append(" ")
+            offsets.append(start + match.start() - 1)
+        chars.append(match.group(0))
+        offsets.extend(range(start + match.start(), start + match.end()))
+    return "".join(chars), offsets
+
+
+def truncate_line(line, offsets, token_budget):
+    """
+    Cut a compacted line at a word boundary so it fits a token budget.
+    
+    Args:
+        line (str): The compacted line
+        offsets (list): Offsets of its characters in the original text
+        token_budget (int): Tokens available for the line, including its line break
+    
+    Returns:
+        tuple: (line, offsets, tokens) of the longest prefix that fits, or None if not even one word fits
+    """
+    # Token counts grow with the prefix, so search the word ends for the longest one that fits
+    cuts = [match.start() for match in re.finditer(" ", line)]
+    low, high = 0, len(cuts)
+    best = None
+    while low < high:
+        middle = (low + high) // 2
+        tokens = count_tokens(line[:cuts[middle]]) + 1
+        if tokens <= token_budget:
+            best = (line[:cuts[middle]], offsets[:cuts[middle]], tokens)
+            low = middle + 1
+        else:
+            high = middle
+    return best
+
+
+def pack_text(text, token_budget, use_sections=True, strip_contact=True):
+    """
+    Reduce a text to its high-signal content within a token budget.
+    
+    Page headers and footers, page numbers and contact lines are dropped and
+    whitespace is collapsed within lines. If the rest still exceeds the budget, CV
+    sections are added in SECTION_PRIORITY order, each as far as it fits,
+    and kept in their original order. A line that doesn't fit is cut at a
+    word boundary, so text pasted as one long line is shortened rather than
+    dropped.
+    
+    Args:
+        text (str): The CV or job description text
+        token_budget (int): Maximum number of tokens of the packed text
+        use_sections (bool): Pack by CV sections; otherwise keep the text from the top
+        strip_contact (bool): Drop contact lines
+    
+    Returns:
+        PackedText: The packed text with its map to the original offsets
+    """
+    if not PROMPT_OPTIMIZER_ENABLED:
+        return PackedText.identity(text)
+    
+    lines = split_lines(text)
+    dropped = find_page_furniture(text, lines)
+    
+    # Assign every line to a block: the text before the first heading, then each section
+    blocks = [{"name": "header", "start": 0, "lines": []}]
+    if use_sections:
+        for section in parse_cv(text).sections:
+            blocks.append({"name": section["name"], "start": section["start"], "lines": []})
+    
+    block_index = 0
+    for start, line in lines:
+        while block_index + 1 < len(blocks) and start >= blocks[block_index + 1]["start"]:
+            block_index += 1
+        if start in dropped or (strip_contact and is_contact_line(line)):
+            continue
+        compacted, offsets = compact_line(start, line)
+        if compacted:
+            blocks[block_index]["lines"].append((compacted, offsets, count_tokens(compacted) + 1))
+    
+    original_tokens = sum(tokens for block in blocks for _, _, tokens in block["lines"])
+    
+    # Take whole lines of each block in priority order while they fit
+    priority = {name: rank for rank, name in enumerate(SECTION_PRIORITY)}
+    order = sorted(range(len(blocks)), key=lambda index: (priority.get(blocks[index]["name"], len(priority)), index))
+    remaining = token_budget
+    taken = {}
+    for index in order:
+        count = 0
+        for line_index, (compacted, offsets, tokens) in enumerate(blocks[index]["lines"]):
+            if tokens > remaining:
+                truncated = truncate_line(compacted, offsets, remaining)
+                if truncated:
+                    blocks[index]["lines"][line_index] = truncated
+                    remaining -= truncated[2]
+                    count += 1
+                break
+            remaining -= tokens
+            count += 1
+        if count == 1 and len(blocks[index]["lines"]) > 1 and blocks[index]["name"] != "header":
+            # A section heading without any of its content only costs tokens
+            remaining += blocks[index]["lines"][0][2]
+            count = 0
+        taken[index] = count
+    
+    chars = []
+    offsets = []
+    for index, block in enumerate(blocks):
+        for compacted, line_offsets, _ in block["lines"][:taken[index]]:
+            if chars:
+                chars.append("\n")
+                offsets.append(offsets[-1] + 1)
+            chars.append(compacted)
+            offsets.extend(line_offsets)
+    
+    packed = PackedText("".join(chars), offsets, token_budget - remaining, original_tokens, source=text)
+    if packed.tokens < original_tokens:
+        logging.info(f"Packed text into {packed.tokens} of {original_tokens} tokens")
+    return packed
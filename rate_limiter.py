@@ -0,0 +1,419 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+
+from circuit_breaker import CircuitOpenError
+from result_cache import make_key
+
+# Groq limits per API key; all gunicorn workers share one bucket file.
+# The defaults match Groq's free tier. A chunk analysis call reserves about
+# 1.5k tokens (prompt plus GROQ_COMPLETION_TOKENS), so a full bucket covers
+# about four chunks (ANALYSIS_CHUNK_CONCURRENCY) and then one more every
+# ~15s. Chunks beyond that which can't get capacity within
+# GROQ_MAX_QUEUE_WAIT are skipped, so for CVs that split into more chunks
+# (see ANALYSIS_MAX_CHUNKS) raise GROQ_TOKENS_PER_MINUTE to your plan's limit.
+GROQ_RATE_LIMIT_ENABLED = os.environ.get("GROQ_RATE_LIMIT_ENABLED", "1") != "0"
+GROQ_RATE_LIMIT_PATH = os.environ.get(
+    "GROQ_RATE_LIMIT_PATH", os.path.join(tempfile.gettempdir(), 'groq_rate_limit.sqlite3'))
+GROQ_REQUESTS_PER_MINUTE = int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.environ.get("GROQ_TOKENS_PER_MINUTE", "6000"))
+GROQ_COMPLETION_TOKENS = int(os.environ.get("GROQ_COMPLETION_TOKENS", "600"))  # completion reserved per call
+GROQ_MAX_QUEUE_WAIT = float(os.environ.get("GROQ_MAX_QUEUE_WAIT", "10"))  # seconds a call may wait for capacity
+GROQ_RATE_LIMIT_RETRIES = int(os.environ.get("GROQ_RATE_LIMIT_RETRIES", "2"))  # retries after a 429
+
+CHARS_PER_TOKEN = 4  # rough average for Llama tokenizers on English and German text
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators per chat message
+POLL_INTERVAL = 0.25  # upper bound for one sleep while queued, so freed capacity is noticed quickly
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call could not get capacity within the maximum queue wait."""
+
+
+def estimate_tokens(messages, max_tokens=0):
+    """
+    Estimate the tokens a chat completion counts against the tokens-per-minute limit.
+    
+    The completion is reserved at its expected size rather than the full
+    `max_tokens`; the reservation is settled against the reported usage
+    once the call returns.
+    
+    Args:
+        messages (list): Chat messages with 'content'
+        max_tokens (int): Completion budget of the request
+    
+    Returns:
+        int: Estimated prompt tokens plus the expected completion tokens
+    """
+    prompt_tokens = 0
+    for message in messages or []:
+        prompt_tokens += len(message.get("content") or "") // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+    return prompt_tokens + min(max_tokens or 0, GROQ_COMPLETION_TOKENS)
+
+
+def parse_retry_after(headers):
+    """
+    Read how long the API asked us to back off.
+    
+    Understands Retry-After in seconds and Groq's x-ratelimit-reset-* durations
+    such as "7.66s" or "2m59.56s".
+    
+    Args:
+        headers (Mapping): Response headers
+    
+    Returns:
+        float: Seconds to wait, or None if the headers don't say
+    """
+    if not headers:
+        return None
+    
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+    
+    waits = []
+    for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        match = re.fullmatch(r"(?:(\d+)h)?(?:(\d+)m(?!s))?(?:([\d.]+)s)?(?:([\d.]+)ms)?", value or "")
+        if value and match:
+            hours, minutes, seconds, millis = match.groups()
+            waits.append(int(hours or 0) * 3600 + int(minutes or 0) * 60
+                         + float(seconds or 0) + float(millis or 0) / 1000)
+    return max(waits) if waits else None
+
+
+def is_rate_limited(outcome):
+    """Check whether a response or Groq SDK exception is a 429."""
+    return getattr(outcome, "status_code", None) == 429
+
+
+def rate_limit_wait(outcome):
+    """
+    Check whether a call was rejected by the rate limit.
+    
+    Args:
+        outcome: A requests.Response, or an exception raised by the Groq SDK
+    
+    Returns:
+        float: Seconds to back off (0 if unknown), or None if this was no 429
+    """
+    if not is_rate_limited(outcome):
+        return None
+    
+    response = outcome if not isinstance(outcome, Exception) else getattr(outcome, "response", None)
+    wait = parse_retry_after(getattr(response, "headers", None))
+    return wait if wait is not None else 0.0
+
+
+class TokenBucketLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets shared across processes.
+    
+    Bucket levels live in a small SQLite database, so every gunicorn worker
+    draws from the same budget. Calls that don't fit wait for the buckets to
+    refill for up to `max_wait` seconds instead of failing. A 429 from the API
+    blocks the buckets for the Retry-After period and the call is retried.
+    Identical non-streaming calls that are in flight at the same time in this
+    process are coalesced into one API request.
+    """
+    
+    def __init__(self, path, requests_per_minute=GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=GROQ_TOKENS_PER_MINUTE, max_wait=GROQ_MAX_QUEUE_WAIT,
+                 retries=GROQ_RATE_LIMIT_RETRIES, enabled=GROQ_RATE_LIMIT_ENABLED):
+        self.path = path
+        self.capacity = {'requests': float(requests_per_minute), 'tokens': float(tokens_per_minute)}
+        self.max_wait = max_wait
+        self.retries = retries
+        self.enabled = enabled
+        self._local = threading.local()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.counters = {"calls": 0, "queued": 0, "queue_seconds": 0.0, "timeouts": 0,
+                         "rate_limited": 0, "coalesced": 0}
+        
+        if not self.enabled:
+            return
+        
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " name TEXT PRIMARY KEY,"
+            " level REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " blocked_until REAL NOT NULL DEFAULT 0)"
+        )
+        now = time.time()
+        for name, capacity in self.capacity.items():
+            conn.execute("INSERT OR IGNORE INTO buckets (name, level, updated_at) VALUES (?, ?, ?)",
+                         (name, capacity, now))
+        conn.commit()
+    
+    def _connect(self):
+        # One connection per thread; WAL lets readers proceed while a worker takes tokens
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.counters[name] += amount
+    
+    def _try_take(self, tokens):
+        """
+        Take one request and `tokens` tokens if both buckets have them.
+        
+        Returns:
+            float: 0 on success, otherwise the seconds until the buckets could have enough
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT name, level, updated_at, blocked_until FROM buckets").fetchall()
+            cost = {'requests': 1.0, 'tokens': float(tokens)}
+            levels = {}
+            wait = 0.0
+            for name, level, updated_at, blocked_until in rows:
+                if name not in self.capacity:
+                    continue
+                capacity = self.capacity[name]
+                refill_rate = capacity / 60.0
+                level = min(capacity, level + max(0.0, now - updated_at) * refill_rate)
+                levels[name] = level
+                # A call larger than the whole bucket waits for a full bucket, not forever
+                needed = min(cost[name], capacity)
+                if blocked_until > now:
+                    wait = max(wait, blocked_until - now)
+                elif level < needed:
+                    wait = max(wait, (needed - level) / refill_rate)
+            
+            if wait == 0.0:
+                for name, level in levels.items():
+                    conn.execute("UPDATE buckets SET level = ?, updated_at = ? WHERE name = ?",
+                                 (level - min(cost[name], self.capacity[name]), now, name))
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def acquire(self, tokens, deadline):
+        """
+        Wait until one request and `tokens` tokens are available, then take them.
+        
+        Args:
+            tokens (int): Estimated token cost of the call
+            deadline (float): time.monotonic() value after which to give up
+        
+        Raises:
+            RateLimitTimeout: If the capacity is not available before the deadline
+        """
+        started = time.monotonic()
+        queued = False
+        while True:
+            wait = self._try_take(tokens)
+            if wait == 0.0:
+                if queued:
+                    self._count("queued")
+                    self._count("queue_seconds", time.monotonic() - started)
+                return
+            if time.monotonic() + wait > deadline:
+                self._count("timeouts")
+                raise RateLimitTimeout(f"Groq rate limit: no capacity within {self.max_wait:g}s")
+            queued = True
+            time.sleep(min(wait, POLL_INTERVAL))
+    
+    def refund(self, tokens, requests=0):
+        """
+        Give back capacity that was reserved but not used.
+        
+        Args:
+            tokens (int): Estimated minus actual token usage
+            requests (int): Requests that were never sent
+        """
+        conn = self._connect()
+        for name, amount in (('tokens', tokens), ('requests', requests)):
+            if amount > 0:
+                conn.execute("UPDATE buckets SET level = MIN(?, level + ?) WHERE name = ?",
+                             (self.capacity[name], amount, name))
+    
+    def settle(self, reserved, used):
+        """
+        Correct the token bucket once the real usage of a call is known.
+        
+        A call that used more than it reserved draws the bucket below zero,
+        so later calls wait for the difference.
+        
+        Args:
+            reserved (int): Tokens taken by acquire()
+            used (int): Tokens the API reported
+        """
+        if used == reserved:
+            return
+        self._connect().execute("UPDATE buckets SET level = MIN(?, level + ?) WHERE name = 'tokens'",
+                                (self.capacity['tokens'], reserved - used))
+    
+    def block(self, seconds):
+        """
+        Stop all workers from calling the API for a while, e.g. after a 429.
+        
+        Args:
+            seconds (float): Back-off period
+        """
+        until = time.time() + seconds
+        self._connect().execute("UPDATE buckets SET blocked_until = MAX(blocked_until, ?)", (until,))
+    
+    def call(self, func, *args, breaker=None, is_failure=None, **kwargs):
+        """
+        Call a chat completion endpoint within the rate limit.
+        
+        The token cost is estimated from `messages` and `max_tokens`, given
+        either as keyword arguments (Groq SDK) or inside a `json` body
+        (plain HTTP request). With a breaker, capacity is acquired first and
+        only the API call itself goes through the breaker, so waiting for
+        capacity never counts as a slow or failed backend call.
+        
+        Args:
+            func (callable): groq_client.chat.completions.create or http_client.post
+            *args: Positional arguments for func
+            breaker (CircuitBreaker): Optional breaker of the backend
+            is_failure (callable): Optional check passed to the breaker
+            **kwargs: Keyword arguments for func
+        
+        Returns:
+            The result of func
+        
+        Raises:
+            RateLimitTimeout: If no capacity became available in time
+            CircuitOpenError: If the breaker rejected the call
+        """
+        if not self.enabled:
+            return self._invoke(func, args, kwargs, breaker, is_failure)
+        
+        self._count("calls")
+        body = kwargs.get("json") if isinstance(kwargs.get("json"), dict) else kwargs
+        if body.get("stream"):
+            return self._call_limited(func, args, kwargs, body, breaker, is_failure)
+        
+        key = make_key(getattr(func, "__qualname__", repr(func)),
+                       json.dumps([args, kwargs], sort_keys=True, default=str))
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            leader = entry is None
+            if leader:
+                entry = self._inflight[key] = {"done": threading.Event()}
+        
+        if not leader:
+            self._count("coalesced")
+            entry["done"].wait()
+            if "error" in entry:
+                raise entry["error"]
+            return entry["result"]
+        
+        try:
+            entry["result"] = self._call_limited(func, args, kwargs, body, breaker, is_failure)
+            return entry["result"]
+        except Exception as e:
+            entry["error"] = e
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            entry["done"].set()
+    
+    @staticmethod
+    def _invoke(func, args, kwargs, breaker, is_failure):
+        if breaker is None:
+            return func(*args, **kwargs)
+        # A 429 is backed off and retried here, so it isn't a backend failure for the breaker
+        if kwargs.get("stream"):
+            # The breaker records a stream's outcome once it has been consumed
+            return breaker.call_stream(func, *args, is_ignored=is_rate_limited, **kwargs)
+        return breaker.call(func, *args, is_failure=is_failure, is_ignored=is_rate_limited, **kwargs)
+    
+    def _call_limited(self, func, args, kwargs, body, breaker=None, is_failure=None):
+        tokens = estimate_tokens(body.get("messages"), body.get("max_tokens"))
+        deadline = time.monotonic() + self.max_wait
+        
+        for attempt in range(self.retries + 1):
+            self.acquire(tokens, deadline)
+            try:
+                outcome = self._invoke(func, args, kwargs, breaker, is_failure)
+                failed = False
+            except CircuitOpenError:
+                # Nothing was sent, so the reserved capacity goes back to the buckets
+                self.refund(tokens, requests=1)
+                raise
+            except Exception as e:
+                outcome = e
+                failed = True
+            
+            wait = rate_limit_wait(outcome)
+            if wait is None:
+                if failed:
+                    raise outcome
+                self.settle(tokens, self._used_tokens(outcome, tokens))
+                return outcome
+            
+            self._count("rate_limited")
+            wait = max(wait, 1.0)
+            self.block(wait)
+            logging.warning(f"Groq rate limit hit, backing off for {wait:.1f}s")
+            if attempt == self.retries or time.monotonic() + wait > deadline:
+                break
+        
+        if failed:
+            raise outcome
+        return outcome
+    
+    @staticmethod
+    def _used_tokens(result, estimated):
+        # Groq reports the real usage; fall back to the estimate for streams and errors
+        usage = getattr(result, "usage", None)
+        if usage is None and hasattr(result, "json") and getattr(result, "status_code", None) == 200:
+            try:
+                usage = result.json().get("usage")
+            except ValueError:
+                usage = None
+        if isinstance(usage, dict):
+            return usage.get("total_tokens", estimated)
+        return getattr(usage, "total_tokens", estimated) if usage is not None else estimated
+    
+    def stats(self):
+        """
+        Get bucket levels and limiter counters for metrics.
+        
+        Returns:
+            dict: Current bucket levels, whether calls are blocked, and counters
+        """
+        with self._stats_lock:
+            stats = dict(self.counters)
+        stats["enabled"] = self.enabled
+        if not self.enabled:
+            return stats
+        
+        now = time.time()
+        rows = self._connect().execute("SELECT name, level, updated_at, blocked_until FROM buckets").fetchall()
+        for name, level, updated_at, blocked_until in rows:
+            if name in self.capacity:
+                capacity = self.capacity[name]
+                stats[f"{name}_available"] = round(min(capacity, level + max(0.0, now - updated_at) * capacity / 60.0), 1)
+                stats["blocked_for"] = round(max(stats.get("blocked_for", 0.0), blocked_until - now, 0.0), 1)
+        return stats
+
+
+groq_limiter = TokenBucketLimiter(GROQ_RATE_LIMIT_PATH)
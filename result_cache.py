@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Result cache configuration
+RESULT_CACHE_ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "1") != "0"
+RESULT_CACHE_PATH = os.environ.get(
+    "RESULT_CACHE_PATH", os.path.join(tempfile.gettempdir(), 'resume_result_cache.sqlite3'))
+RESULT_CACHE_TTL = int(os.environ.get("RESULT_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "5000"))
+
+
+def normalize_text(text):
+    """
+    Normalize text for use in a cache key.
+    
+    Args:
+        text (str): Raw text
+        
+    Returns:
+        str: Text with whitespace runs collapsed and surrounding whitespace removed
+    """
+    return " ".join((text or "").split())
+
+
+def make_key(*parts):
+    """
+    Build a content-addressed cache key.
+    
+    Args:
+        *parts: Values that identify the result (text, language, model, prompt version, ...)
+        
+    Returns:
+        str: SHA-256 hex digest of the normalized parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(normalize_text(str(part)).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent LRU cache for LLM results backed by SQLite.
+    
+    Entries expire after a TTL, and the least recently used entries are evicted
+    once the cache grows beyond max_entries. The database file is shared by all
+    gunicorn workers and survives restarts.
+    """
+    
+    def __init__(self, path, ttl=RESULT_CACHE_TTL, max_entries=RESULT_CACHE_MAX_ENTRIES, enabled=True):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+    
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def get(self, namespace, key):
+        """
+        Look up a cached result.
+        
+        Args:
+            namespace (str): Kind of result ('analysis', 'score', ...)
+            key (str): Key built with make_key()
+            
+        Returns:
+            The cached value, or None on a miss or expired entry
+        """
+        if not self.enabled:
+            return None
+        
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM results WHERE namespace = ? AND key = ?",
+                    (namespace, key)
+                ).fetchone()
+                
+                if row is None or now - row[1] > self.ttl:
+                    if row is not None:
+                        conn.execute("DELETE FROM results WHERE namespace = ? AND key = ?", (namespace, key))
+                        conn.commit()
+                    self.misses += 1
+                    return None
+                
+                conn.execute(
+                    "UPDATE results SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key)
+                )
+                conn.commit()
+                self.hits += 1
+            
+            logging.debug(f"Result cache hit for {namespace}:{key[:12]}")
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logging.warning(f"Result cache read failed: {str(e)}")
+            return None
+    
+    def set(self, namespace, key, value):
+        """
+        Store a result and evict expired or least recently used entries.
+        
+        Args:
+            namespace (str): Kind of result ('analysis', 'score', ...)
+            key (str): Key built with make_key()
+            value: JSON-serializable result
+        """
+        if not self.enabled:
+            return
+        
+        now = time.time()
+        try:
+            payload = json.dumps(value)
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (namespace, key, value, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (namespace, key, payload, now, now)
+                )
+                conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM results WHERE rowid IN ("
+                    " SELECT rowid FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                conn.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.warning(f"Result cache write failed: {str(e)}")
+    
+    def stats(self):
+        """
+        Get hit/miss counters for this process.
+        
+        Returns:
+            dict: Hits, misses, hit rate and number of stored entries
+        """
+        entries = 0
+        if self.enabled:
+            try:
+                with self._lock:
+                    entries = self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            except sqlite3.Error as e:
+                logging.warning(f"Result cache stats failed: {str(e)}")
+        
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
+
+
+# Process-wide cache instance
+result_cache = ResultCache(RESULT_CACHE_PATH, enabled=RESULT_CACHE_ENABLED)
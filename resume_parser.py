@@ -1,5 +1,274 @@
+import hashlib
+import io
 import logging
+import multiprocessing
 import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from xml.etree import ElementTree
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from result_cache import ResultCache
+
+# Limits for incremental PDF parsing
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "10"))
+PDF_MAX_BYTES = int(os.environ.get("PDF_MAX_BYTES", str(5 * 1024 * 1024)))
+PDF_MAX_CHARS = int(os.environ.get("PDF_MAX_CHARS", "20000"))  # enough text for the chunked analysis
+PDF_TIME_BUDGET = float(os.environ.get("PDF_TIME_BUDGET", "10"))  # seconds
+
+# Non-seekable upload streams larger than this are spooled to a unique temp file
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get("UPLOAD_SPOOL_THRESHOLD", str(1024 * 1024)))
+
+# Process pool for CPU-heavy parsing, so a large PDF does not block the request worker
+PARSER_POOL_ENABLED = os.environ.get("PARSER_POOL_ENABLED", "1") != "0"
+PARSER_POOL_WORKERS = int(os.environ.get("PARSER_POOL_WORKERS", "2"))
+PARSER_POOL_MAX_PENDING = int(os.environ.get("PARSER_POOL_MAX_PENDING", "8"))
+PARSER_TIMEOUT = float(os.environ.get("PARSER_TIMEOUT", "20"))  # seconds a parse may run before it is killed
+PARSER_START_POLL = 0.2  # seconds between checks whether a queued job has started
+
+# Cache of extracted text keyed by the SHA-256 of the uploaded bytes
+PARSE_CACHE_ENABLED = os.environ.get("PARSE_CACHE_ENABLED", "1") != "0"
+PARSE_CACHE_PATH = os.environ.get(
+    "PARSE_CACHE_PATH", os.path.join(tempfile.gettempdir(), 'resume_parse_cache.sqlite3'))
+PARSE_CACHE_TTL = int(os.environ.get("PARSE_CACHE_TTL", str(24 * 3600)))  # seconds
+PARSE_CACHE_MAX_ENTRIES = int(os.environ.get("PARSE_CACHE_MAX_ENTRIES", "2000"))
+PARSER_VERSION = "2"  # bump when extraction output changes
+
+
+class ParserBusyError(Exception):
+    """Raised when the parser pool already has the maximum number of pending jobs."""
+
+
+# Start times of the jobs in a parser pool, shared with its workers
+_job_starts = None
+
+
+def _warm_worker():
+    # Pre-import the parsing libraries so the first job in a worker is not slowed down
+    for module in ('pdfminer.high_level', 'pdfminer.layout'):
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+
+def _init_worker(job_starts):
+    global _job_starts
+    
+    _job_starts = job_starts
+    _warm_worker()
+
+
+def _run_job(slot, func, args):
+    # Report the start, so the timeout doesn't include the time spent in the queue
+    _job_starts[slot] = time.time()
+    return func(*args)
+
+
+class ParserPool:
+    """
+    Bounded process pool for parsing uploaded files.
+    
+    Workers are started ahead of time with the parsing libraries imported.
+    The timeout of a job counts from when a worker starts it, so jobs queued
+    behind a slow one don't time out while waiting. A job that exceeds the
+    timeout gets the worker processes killed and the pool replaced, since a
+    running process pool task cannot be cancelled; the other jobs that were
+    running or queued are resubmitted to the new pool once.
+    """
+    
+    def __init__(self, workers=PARSER_POOL_WORKERS, max_pending=PARSER_POOL_MAX_PENDING, timeout=PARSER_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._executor = None
+        self._executor_pid = None
+        self._job_starts = None
+        self._free_slots = []
+        self._lock = threading.Lock()
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                if self._executor_pid != os.getpid():
+                    # One start time slot per pending job, written by the worker that runs it
+                    self._job_starts = context.RawArray('d', self.max_pending)
+                    self._free_slots = list(range(self.max_pending))
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context, initializer=_init_worker,
+                    initargs=(self._job_starts,))
+                self._executor_pid = os.getpid()
+                for _ in range(self.workers):
+                    self._executor.submit(_warm_worker)
+                logging.info(f"Started parser pool with {self.workers} workers")
+            return self._executor
+    
+    def _restart(self, executor):
+        with self._lock:
+            if self._executor is not executor:
+                return
+            # ProcessPoolExecutor has no public way to kill a running task
+            for process in list(getattr(executor, '_processes', {}).values()):
+                process.kill()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.restarts += 1
+            logging.warning("Parser pool restarted")
+    
+    def parse(self, data, filename=None):
+        """
+        Parse an uploaded file in a worker process.
+        
+        Args:
+            data (bytes): The uploaded file content
+            filename (str): Original file name, used in log messages only
+        
+        Returns:
+            str: Extracted text from the resume
+        """
+        return self.run(parse_resume_stream, data, filename, description=filename or 'the file')
+    
+    def run(self, func, *args, description='the file'):
+        """
+        Run a job in a worker process.
+        
+        Args:
+            func (callable): Module-level function to run
+            *args: Picklable arguments for func
+            description (str): What the job processes, for the timeout error
+        
+        Returns:
+            The return value of func
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                raise ParserBusyError("Too many files are being processed. Please try again in a moment.")
+            self.pending += 1
+        
+        succeeded = False
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                with self._lock:
+                    job_starts = self._job_starts
+                    slot = self._free_slots.pop()
+                job_starts[slot] = 0.0
+                try:
+                    future = executor.submit(_run_job, slot, func, args)
+                    result = self._wait(future, job_starts, slot)
+                    succeeded = True
+                    return result
+                except FutureTimeoutError:
+                    self.timeouts += 1
+                    self._restart(executor)
+                    raise Exception(f"Parsing {description} took longer than {self.timeout:.0f} seconds")
+                except (BrokenProcessPool, CancelledError):
+                    # Another job's timeout killed this pool or cancelled this job; retry once on a fresh pool
+                    self._restart(executor)
+                    if attempt:
+                        raise
+                except RuntimeError:
+                    # The pool was shut down between getting and using it
+                    if attempt or self._executor is executor:
+                        raise
+                finally:
+                    with self._lock:
+                        if job_starts is self._job_starts:
+                            self._free_slots.append(slot)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+    
+    def _wait(self, future, job_starts, slot):
+        # Wait for the job to leave the queue, then for at most the timeout
+        while not job_starts[slot]:
+            try:
+                return future.result(timeout=PARSER_START_POLL)
+            except FutureTimeoutError:
+                continue
+        remaining = job_starts[slot] + self.timeout - time.time()
+        return future.result(timeout=max(remaining, 0))
+    
+    def stats(self):
+        """
+        Get parser pool metrics.
+        
+        Returns:
+            dict: Pending jobs (queued or running), completed and failed jobs, timeouts and restarts
+        """
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts
+        }
+
+
+# Process-wide parser pool, started on first use
+parser_pool = ParserPool()
+
+
+# Process-wide cache of parsed documents
+parse_cache = ResultCache(PARSE_CACHE_PATH, ttl=PARSE_CACHE_TTL,
+                          max_entries=PARSE_CACHE_MAX_ENTRIES, enabled=PARSE_CACHE_ENABLED)
+
+
+def parse_resume_upload(stream, filename=None):
+    """
+    Parse an uploaded resume, in the parser pool if it is enabled.
+    
+    The extracted text is cached by the SHA-256 of the uploaded bytes, so
+    uploading the identical file again skips parsing entirely. Text from a PDF
+    whose parsing ran out of time is not cached, since it depends on the load
+    at the time rather than on the file.
+    
+    Args:
+        stream (file-like): The upload stream, e.g. FileStorage.stream
+        filename (str): Original file name, used in log messages only
+    
+    Returns:
+        str: Extracted text from the resume
+    """
+    data = stream.read()
+    
+    digest = hashlib.sha256(data)
+    digest.update(f"|{PARSER_VERSION}|{PDF_MAX_PAGES}|{PDF_MAX_CHARS}".encode('utf-8'))
+    cache_key = digest.hexdigest()
+    
+    cached = parse_cache.get('parsed', cache_key)
+    if cached is not None:
+        logging.debug(f"Using cached parse of {filename}")
+        return cached
+    
+    if PARSER_POOL_ENABLED:
+        document = parser_pool.run(parse_resume_document, data, filename, description=filename or 'the file')
+    else:
+        document = parse_resume_document(data, filename)
+    
+    if document['partial']:
+        logging.info(f"Not caching the partial parse of {filename}")
+    else:
+        parse_cache.set('parsed', cache_key, document['text'])
+    return document['text']
+
 
 def parse_resume_file(file_path):
     """
@@ -7,7 +276,7 @@ def parse_resume_file(file_path):
     
     Args:
         file_path (str): Path to the resume file
-        
+    
     Returns:
         str: Extracted text from the resume
     """
@@ -22,20 +291,113 @@ def parse_resume_file(file_path):
     else:
         raise ValueError(f"Unsupported file format: {file_extension}")
 
+def parse_resume_stream(source, filename=None):
+    """
+    Parse a resume from bytes or a file-like object without saving it to disk.
+    
+    The format is detected from the file's magic bytes rather than its name.
+    Non-seekable streams are copied into a spooled buffer that stays in memory
+    up to UPLOAD_SPOOL_THRESHOLD bytes and moves to a unique temp file beyond.
+    
+    Args:
+        source (bytes or file-like): The uploaded file content, e.g. FileStorage.stream
+        filename (str): Original file name, used in log messages only
+    
+    Returns:
+        str: Extracted text from the resume
+    """
+    return parse_resume_document(source, filename)['text']
+
+def parse_resume_document(source, filename=None):
+    """
+    Parse a resume from bytes or a file-like object, reporting whether the text is complete.
+    
+    Args:
+        source (bytes or file-like): The uploaded file content, e.g. FileStorage.stream
+        filename (str): Original file name, used in log messages only
+    
+    Returns:
+        dict: "text" and "partial" (True if PDF parsing stopped because the time budget ran out)
+    """
+    if isinstance(source, (bytes, bytearray)):
+        stream = io.BytesIO(source)
+    elif source.seekable():
+        stream = source
+    else:
+        stream = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD)
+        shutil.copyfileobj(source, stream)
+    
+    stream.seek(0)
+    file_format = detect_format(stream.read(8))
+    stream.seek(0)
+    logging.debug(f"Detected {file_format} content for upload {filename}")
+    
+    if file_format == 'pdf':
+        result = parse_pdf_result(stream)
+        return {"text": result['text'], "partial": result['timed_out']}
+    elif file_format == 'docx':
+        return {"text": parse_docx(stream), "partial": False}
+    elif file_format == 'txt':
+        return {"text": parse_txt(stream), "partial": False}
+    else:
+        raise ValueError(f"Unsupported file format: {filename or 'upload'}")
+
+def detect_format(header):
+    """
+    Detect a resume file format from its first bytes.
+    
+    Args:
+        header (bytes): The first bytes of the file
+    
+    Returns:
+        str: 'pdf', 'docx' (any ZIP container) or 'txt'; None for other binary data
+    """
+    if header.startswith(b'%PDF-'):
+        return 'pdf'
+    if header.startswith(b'PK\x03\x04'):
+        return 'docx'
+    if b'\x00' in header:
+        return None
+    return 'txt'
+
+def _source_size(source):
+    # Size of a path or a seekable file-like object
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    position = source.tell()
+    size = source.seek(0, os.SEEK_END)
+    source.seek(position)
+    return size
+
 def parse_pdf(file_path):
     """
     Parse a PDF file and extract the text.
     
     Args:
-        file_path (str): Path to the PDF file
-        
+        file_path (str or file-like): Path to the PDF file, or a binary file object
+    
     Returns:
         str: Extracted text from the PDF
     """
+    return parse_pdf_result(file_path)['text']
+
+def parse_pdf_result(file_path):
+    """
+    Parse a PDF file within the configured budgets, logging where parsing stopped.
+    
+    Args:
+        file_path (str or file-like): Path to the PDF file, or a binary file object
+    
+    Returns:
+        dict: The result of parse_pdf_pages()
+    """
     try:
-        from pdfminer.high_level import extract_text
-        text = extract_text(file_path)
-        return text
+        result = parse_pdf_pages(file_path)
+        timings = ", ".join(f"{page['seconds']:.2f}s" for page in result['pages'])
+        logging.debug(f"Parsed {len(result['pages'])} PDF pages ({timings})")
+        if result['stopped']:
+            logging.info(f"Stopped PDF parsing early: {result['stopped']}")
+        return result
     except ImportError:
         logging.error("pdfminer.six is not installed. Unable to parse PDF files.")
         raise ImportError("pdfminer.six is not installed. Unable to parse PDF files.")
@@ -43,39 +405,199 @@ def parse_pdf(file_path):
         logging.error(f"Error parsing PDF file: {str(e)}")
         raise Exception(f"Error parsing PDF file: {str(e)}")
 
+def parse_pdf_pages(file_path, max_pages=PDF_MAX_PAGES, max_bytes=PDF_MAX_BYTES,
+                    max_chars=PDF_MAX_CHARS, time_budget=PDF_TIME_BUDGET):
+    """
+    Extract PDF text one page at a time within page, size and time budgets.
+    
+    Pages are laid out lazily through pdfminer's page iterator, and parsing
+    stops once enough text has been collected or a budget is used up. The
+    time budget is checked between pages.
+    
+    Args:
+        file_path (str or file-like): Path to the PDF file, or a binary file object
+        max_pages (int): Maximum number of pages to parse
+        max_bytes (int): Maximum file size; larger files are rejected
+        max_chars (int): Stop after this much text has been extracted
+        time_budget (float): Stop after this many seconds
+    
+    Returns:
+        dict: "text", "pages" (page number, characters and seconds per page),
+            "stopped" (reason parsing stopped early, or None) and "timed_out"
+            (whether it stopped because the time budget was used up)
+    """
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    
+    file_size = _source_size(file_path)
+    if file_size > max_bytes:
+        raise ValueError(f"PDF file is too large ({file_size} bytes, limit {max_bytes})")
+    
+    parts = []
+    pages = []
+    total_chars = 0
+    stopped = None
+    timed_out = False
+    started = time.monotonic()
+    
+    page_iterator = extract_pages(file_path, maxpages=max_pages)
+    while True:
+        page_started = time.monotonic()
+        page = next(page_iterator, None)
+        if page is None:
+            if len(pages) >= max_pages:
+                stopped = f"page limit of {max_pages} reached"
+            break
+        
+        page_text = "".join(
+            element.get_text() for element in page if isinstance(element, LTTextContainer)
+        )
+        parts.append(page_text)
+        parts.append("\f")
+        total_chars += len(page_text)
+        pages.append({
+            "page": len(pages) + 1,
+            "chars": len(page_text),
+            "seconds": time.monotonic() - page_started
+        })
+        
+        if total_chars >= max_chars:
+            stopped = f"collected {total_chars} characters"
+            break
+        if time.monotonic() - started > time_budget:
+            stopped = f"time budget of {time_budget}s used up"
+            timed_out = True
+            break
+    
+    return {"text": "".join(parts), "pages": pages, "stopped": stopped, "timed_out": timed_out}
+
+# WordprocessingML parts and elements used by the DOCX extractor
+DOCX_BODY = 'word/document.xml'
+DOCX_HEADER_PATTERN = re.compile(r'word/header\d*\.xml$')
+DOCX_FOOTER_PATTERN = re.compile(r'word/footer\d*\.xml$')
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_P = W_NS + 'p'
+W_T = W_NS + 't'
+W_TAB = W_NS + 'tab'
+W_BR = W_NS + 'br'
+W_CR = W_NS + 'cr'
+W_TBL = W_NS + 'tbl'
+W_TR = W_NS + 'tr'
+W_TC = W_NS + 'tc'
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
 def parse_docx(file_path):
     """
     Parse a DOCX file and extract the text.
     
     Args:
-        file_path (str): Path to the DOCX file
-        
+        file_path (str or file-like): Path to the DOCX file, or a binary file object
+    
     Returns:
-        str: Extracted text from the DOCX
+        str: Extracted text from the DOCX, including tables, text boxes, headers and footers
     """
     try:
-        import docx
-        doc = docx.Document(file_path)
-        text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        return text
-    except ImportError:
-        logging.error("python-docx is not installed. Unable to parse DOCX files.")
-        raise ImportError("python-docx is not installed. Unable to parse DOCX files.")
+        with zipfile.ZipFile(file_path) as archive:
+            names = archive.namelist()
+            if DOCX_BODY not in names:
+                raise ValueError("Not a Word document")
+            
+            headers = sorted(name for name in names if DOCX_HEADER_PATTERN.match(name))
+            footers = sorted(name for name in names if DOCX_FOOTER_PATTERN.match(name))
+            
+            parts = []
+            seen = set()
+            for name in headers + [DOCX_BODY] + footers:
+                with archive.open(name) as part:
+                    part_text = extract_docx_part_text(part)
+                # First-page and default headers are often identical
+                if part_text and part_text not in seen:
+                    seen.add(part_text)
+                    parts.append(part_text)
+        
+        return "\n".join(parts)
     except Exception as e:
         logging.error(f"Error parsing DOCX file: {str(e)}")
         raise Exception(f"Error parsing DOCX file: {str(e)}")
 
+def extract_docx_part_text(part):
+    """
+    Stream the text out of one WordprocessingML part in reading order.
+    
+    Paragraphs become lines, table cells of a row are joined with tabs, and
+    text boxes are read from their primary markup only (the VML fallback
+    copy is skipped). Elements are cleared once read to keep memory flat.
+    
+    Args:
+        part (file-like): XML part such as word/document.xml
+    
+    Returns:
+        str: Extracted text
+    """
+    lines = []
+    sinks = [lines]  # where finished paragraphs and rows go; a table cell collects its own
+    paragraphs = []  # text of open paragraphs (text boxes nest paragraphs inside runs)
+    rows = []
+    fallback_depth = 0
+    
+    for event, element in ElementTree.iterparse(part, events=('start', 'end')):
+        tag = element.tag
+        
+        if tag == MC_FALLBACK:
+            fallback_depth += 1 if event == 'start' else -1
+            if event == 'end':
+                element.clear()
+            continue
+        if fallback_depth:
+            continue
+        
+        if event == 'start':
+            if tag == W_P:
+                paragraphs.append([])
+            elif tag == W_TR:
+                rows.append([])
+            elif tag == W_TC:
+                sinks.append([])
+            continue
+        
+        if tag == W_T and paragraphs:
+            paragraphs[-1].append(element.text or "")
+        elif tag == W_TAB and paragraphs and W_NS + 'val' not in element.attrib:  # not a tab stop
+            paragraphs[-1].append("\t")
+        elif tag in (W_BR, W_CR) and paragraphs:
+            paragraphs[-1].append("\n")
+        elif tag == W_P and paragraphs:
+            text = "".join(paragraphs.pop())
+            if text.strip():
+                sinks[-1].append(text)
+            element.clear()
+        elif tag == W_TC and len(sinks) > 1:
+            cell_text = " ".join(sinks.pop())
+            if rows:
+                rows[-1].append(cell_text)
+        elif tag == W_TR and rows:
+            cells = rows.pop()
+            if any(cell.strip() for cell in cells):
+                sinks[-1].append("\t".join(cells))
+            element.clear()
+        elif tag == W_TBL:
+            element.clear()
+    
+    return "\n".join(lines)
+
 def parse_txt(file_path):
     """
     Parse a TXT file and extract the text.
     
     Args:
-        file_path (str): Path to the TXT file
-        
+        file_path (str or file-like): Path to the TXT file, or a binary file object
+    
     Returns:
         str: Extracted text from the TXT
     """
     try:
+        if not isinstance(file_path, (str, os.PathLike)):
+            return file_path.read().decode('utf-8')
         with open(file_path, 'r', encoding='utf-8') as file:
             text = file.read()
         return text
@@ -89,7 +611,7 @@ def parse_resume_text(text):
     
     Args:
         text (str): Raw resume text
-        
+    
     Returns:
         str: Processed resume text
     """
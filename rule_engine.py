@@ -0,0 +1,219 @@
+import re
+
+# Common weak phrases that should be replaced with strong action verbs
+WEAK_PHRASES = [
+    # English weak phrases
+    {"pattern": r"\bresponsible for\b", "replacement": "managed", 
+     "explanation": "Use action verbs instead of passive phrases to show proactive leadership", "category": "clarity"},
+    {"pattern": r"\bhelped (with|to)?\b", "replacement": "assisted with", 
+     "explanation": "Use more professional terminology to describe your contributions", "category": "professional language"},
+    {"pattern": r"\bworked (on|with)\b", "replacement": "developed", 
+     "explanation": "Use stronger action verbs to demonstrate your contribution", "category": "clarity"},
+    {"pattern": r"\bpart of (a|the) team\b", "replacement": "collaborated with team members to", 
+     "explanation": "Specify your role in the team rather than just mentioning team membership", "category": "content"},
+    
+    # German weak phrases
+    {"pattern": r"\bzuständig für\b", "replacement": "verantwortete", 
+     "explanation": "Verwenden Sie Aktiv-Formulierungen statt passiver Ausdrücke", "category": "clarity"},
+    {"pattern": r"\bhabe (mitge)?arbeitet\b", "replacement": "entwickelte", 
+     "explanation": "Nutzen Sie stärkere Verben, um Ihre Beiträge hervorzuheben", "category": "clarity"},
+    {"pattern": r"\bwar beteiligt an\b", "replacement": "koordinierte", 
+     "explanation": "Verdeutlichen Sie Ihre aktive Rolle statt nur Beteiligung zu erwähnen", "category": "content"},
+]
+
+# Personal pronouns to avoid in CVs
+PRONOUNS = [
+    {"pattern": r"\bi\b", "replacement": "", 
+     "explanation": "Avoid first-person pronouns in CVs; start sentences with action verbs instead", "category": "professional language"},
+    {"pattern": r"\bmy\b", "replacement": "the", 
+     "explanation": "Avoid possessive pronouns in CVs for a more professional tone", "category": "professional language"},
+    {"pattern": r"\bich\b", "replacement": "", 
+     "explanation": "Vermeiden Sie 'ich' im Lebenslauf; beginnen Sie Sätze direkt mit Verben", "category": "professional language"},
+    {"pattern": r"\bmein(e)?\b", "replacement": "die", 
+     "explanation": "Vermeiden Sie Possessivpronomen im Lebenslauf", "category": "professional language"},
+]
+
+# Cliché terms that should be avoided or replaced
+CLICHES = [
+    {"pattern": r"\bteam player\b", "replacement": "collaborative professional", 
+     "explanation": "Replace overused clichés with specific examples of collaboration", "category": "content"},
+    {"pattern": r"\bthinking outside the box\b", "replacement": "implementing innovative solutions", 
+     "explanation": "Avoid clichés and use concrete examples of innovation", "category": "content"},
+    {"pattern": r"\bteamfähig\b", "replacement": "arbeitete effektiv im Team bei [Projektname]", 
+     "explanation": "Ersetzen Sie Floskeln durch konkrete Beispiele Ihrer Teamarbeit", "category": "content"},
+    {"pattern": r"\bhardworking\b", "replacement": "delivered projects consistently ahead of deadline", 
+     "explanation": "Show your work ethic through specific achievements rather than generic terms", "category": "content"},
+]
+
+# Format and capitalization issues
+FORMATTING = [
+    {"pattern": r"\bms office\b", "replacement": "Microsoft Office", 
+     "explanation": "Use proper capitalization for product names", "category": "formatting"},
+    {"pattern": r"\b(java ?script|type ?script)\b", "replacement": "JavaScript", 
+     "explanation": "Use correct capitalization for programming languages", "category": "formatting"},
+    {"pattern": r"\bc\+\+\b", "replacement": "C++", 
+     "explanation": "Use correct capitalization for programming languages", "category": "formatting"},
+]
+
+# Vague descriptions that need quantification
+VAGUE_TERMS = [
+    {"pattern": r"\b(significantly|substantially|greatly) (improved|increased|decreased|reduced)\b", 
+     "replacement": "improved by X%", 
+     "explanation": "Quantify your achievements with specific numbers or percentages", "category": "achievement"},
+    {"pattern": r"\b(managed|led) a team\b", "replacement": "managed a team of X members", 
+     "explanation": "Specify the size of the team you managed for greater impact", "category": "achievement"},
+    {"pattern": r"\bverbesserte Prozesse\b", "replacement": "verbesserte Prozesse, was zu einer X% Effizienzsteigerung führte", 
+     "explanation": "Quantifizieren Sie Ihre Erfolge mit konkreten Zahlen", "category": "achievement"},
+]
+
+# German-specific language issues
+GERMAN_SPECIFIC = [
+    {"pattern": r"\b(?:gute|sehr gute|ausgezeichnete)\s+kenntnisse\b", 
+     "replacement": "Fortgeschrittene Kenntnisse", 
+     "explanation": "Verwenden Sie präzisere Begriffe zur Beschreibung Ihrer Fähigkeiten", "category": "professional language"},
+    {"pattern": r"\bargts", "replacement": "arbeitet", 
+     "explanation": "Verwenden Sie vollständige Wörter statt Abkürzungen", "category": "professional language"},
+    {"pattern": r"\binteragirt\b", "replacement": "interagiert", 
+     "explanation": "Korrigieren Sie Rechtschreibfehler", "category": "spelling"},
+]
+
+# Basic checks used when the enhanced analysis itself fails
+BASIC_CHECKS = [
+    {"pattern": r"\bresponsible for\b", "replacement": "managed",
+     "explanation": "Use action verbs instead of passive phrases", "category": "clarity"},
+    {"pattern": r"\bhelped\b", "replacement": "assisted",
+     "explanation": "Use more professional terminology", "category": "professional language"},
+    {"pattern": r"\bi\b", "replacement": "",
+     "explanation": "Avoid using first-person pronouns in CVs", "category": "professional language"},
+    {"pattern": r"\bteam player\b", "replacement": "collaborative professional",
+     "explanation": "Avoid overused phrases and clichés", "category": "content"},
+    {"pattern": r"\bms office\b", "replacement": "Microsoft Office",
+     "explanation": "Use proper capitalization for product names", "category": "formatting"},
+    {"pattern": r"\b(?:gute|sehr gute|ausgezeichnete)\s+kenntnisse\b", "replacement": "Fortgeschrittene Kenntnisse",
+     "explanation": "Be more specific and professional in describing skills", "category": "professional language"},
+    {"pattern": r"\bargts", "replacement": "arbeitet",
+     "explanation": "Use full words instead of abbreviations", "category": "professional language"},
+    {"pattern": r"\binteragirt\b", "replacement": "interagiert",
+     "explanation": "Fix spelling errors", "category": "spelling"},
+]
+
+# Section headings whose absence is reported by the enhanced analysis
+SECTION_PATTERNS = {
+    "experience": r"\b(?:experience|work|employment|berufserfahrung|arbeitserfahrung|tätigkeiten)\b",
+    "education": r"\b(?:education|ausbildung|bildung|studium|akademisch)\b",
+    "skills": r"\b(?:skills|fähigkeiten|kenntnisse|kompetenzen)\b",
+}
+
+
+class RuleSet:
+    """
+    A list of replacement rules compiled into a single case-insensitive regex.
+    
+    Each rule becomes a named group of one alternation, so the text is scanned
+    once regardless of the number of rules. Rules with an empty replacement
+    never produce a correction and are left out of the alternation.
+    
+    Matches never overlap: where the patterns of several rules match
+    overlapping text, the match that starts first wins, and of matches
+    starting at the same position the rule listed first. Scanning each rule
+    separately would also report the other rules' overlapping matches, but
+    overlapping corrections can't be applied together anyway, and
+    apply_edits() would reject all but one of them as conflicts.
+    """
+    
+    def __init__(self, checks):
+        self.checks = [check for check in checks if check["replacement"]]
+        alternation = "|".join(
+            f"(?P<r{index}>{check['pattern']})" for index, check in enumerate(self.checks)
+        )
+        self.regex = re.compile(alternation, re.IGNORECASE) if self.checks else None
+    
+    def scan(self, text):
+        """
+        Scan text once and build corrections for every rule match.
+        
+        Args:
+            text (str): The CV text to analyze
+            
+        Returns:
+            list: Corrections ordered by rule, then by position in the text
+        """
+        if self.regex is None:
+            return []
+        
+        # Overlaps resolve to the leftmost match, then the earliest rule (see the class docstring)
+        matches = []
+        for match in self.regex.finditer(text):
+            if match.start() == match.end():
+                continue
+            rule_index = int(match.lastgroup[1:])
+            matches.append((rule_index, match.start(), match.end()))
+        matches.sort()
+        
+        corrections = []
+        for rule_index, start_pos, end_pos in matches:
+            check = self.checks[rule_index]
+            original_text = text[start_pos:end_pos]
+            
+            # Create replacement based on case of original
+            if original_text.isupper():
+                replacement = check["replacement"].upper()
+            elif original_text[0].isupper():
+                replacement = check["replacement"].capitalize()
+            else:
+                replacement = check["replacement"]
+            
+            corrections.append({
+                "original": original_text,
+                "position": {"start": start_pos, "end": end_pos},
+                "suggestion": replacement,
+                "explanation": check["explanation"],
+                "category": check["category"]
+            })
+        
+        return corrections
+
+
+SECTION_REGEX = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in SECTION_PATTERNS.items()),
+    re.IGNORECASE
+)
+
+
+def find_missing_sections(text):
+    """
+    Find which standard CV sections are not mentioned in the text.
+    
+    Args:
+        text (str): The CV text to analyze
+        
+    Returns:
+        list: Names from SECTION_PATTERNS that have no match, in definition order
+    """
+    missing = set(SECTION_PATTERNS)
+    for match in SECTION_REGEX.finditer(text):
+        missing.discard(match.lastgroup)
+        if not missing:
+            break
+    return [name for name in SECTION_PATTERNS if name in missing]
+
+
+# Rule sets compiled once at import, per analysis language
+ENHANCED_RULES = {
+    'en': RuleSet(WEAK_PHRASES + PRONOUNS + CLICHES + FORMATTING + VAGUE_TERMS),
+    'de': RuleSet(WEAK_PHRASES + PRONOUNS + CLICHES + FORMATTING + VAGUE_TERMS + GERMAN_SPECIFIC),
+}
+BASIC_RULES = RuleSet(BASIC_CHECKS)
+
+
+def get_rule_set(language='en'):
+    """
+    Get the compiled enhanced rule set for a language.
+    
+    Args:
+        language (str): Language for the analysis ('en' or 'de')
+        
+    Returns:
+        RuleSet: Rules for that language; English rules for unknown languages
+    """
+    return ENHANCED_RULES.get(language, ENHANCED_RULES['en'])
@@ -0,0 +1,216 @@
+import re
+
+from cv_model import BULLET_REGEX, EDUCATION_KEYWORD_REGEX, SECTION_HEADER_REGEX, SKILLS_KEYWORD_REGEX
+
+# NumPy is optional; without it the same formulas run per CV in plain Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+ACHIEVEMENT_REGEX = re.compile(
+    r"\b(?:increased|improved|reduced|saved|achieved|developed|launched|managed|led)\b.*?\b\d+(?:\.\d+)?%?\b",
+    re.IGNORECASE)
+
+# Simplistic grammar checks; each pattern is counted separately
+GRAMMAR_REGEXES = [
+    re.compile(r"\bi\s+(?:has|have|is|am|are|was|were)\b", re.IGNORECASE),  # Subject-verb agreement issues
+    re.compile(r"\b(?:a|an)\s+(?:[aeiou]|hour|honor)", re.IGNORECASE),       # A/An issues
+    re.compile(r"\b(?:he|she|it|they)\s+(?:has|have|is|am|are|was|were)\b", re.IGNORECASE)  # More subject-verb agreement
+]
+
+# Columns of the feature matrix
+FEATURES = ["achievements", "skills_mentioned", "education_mentioned", "bullets",
+            "section_headers", "grammar_errors", "word_count"]
+
+
+def extract_features(text):
+    """
+    Compute the rule-based scoring features of one CV.
+    
+    Args:
+        text (str): The CV text
+        
+    Returns:
+        list: Feature values in FEATURES order
+    """
+    return [
+        len(ACHIEVEMENT_REGEX.findall(text)),
+        int(SKILLS_KEYWORD_REGEX.search(text) is not None),
+        int(EDUCATION_KEYWORD_REGEX.search(text) is not None),
+        len(BULLET_REGEX.findall(text)),
+        len(SECTION_HEADER_REGEX.findall(text)),
+        sum(len(regex.findall(text)) for regex in GRAMMAR_REGEXES),
+        len(text.split())
+    ]
+
+
+def features_from_parsed_cv(parsed_cv):
+    """
+    Compute the scoring features of a CV, reusing its document model.
+    
+    Args:
+        parsed_cv (ParsedCV): The CV's document model
+        
+    Returns:
+        list: Feature values in FEATURES order
+    """
+    text = parsed_cv.text
+    return [
+        len(ACHIEVEMENT_REGEX.findall(text)),
+        int(parsed_cv.mentions["skills"]),
+        int(parsed_cv.mentions["education"]),
+        len(parsed_cv.bullets),
+        parsed_cv.section_header_count,
+        sum(len(regex.findall(text)) for regex in GRAMMAR_REGEXES),
+        parsed_cv.word_count
+    ]
+
+
+def score_features(features, language='en'):
+    """
+    Turn feature rows into score dicts.
+    
+    Weights: content 40%, format 30%, language 15%, conciseness 15%.
+    
+    Args:
+        features (list): One feature row per CV, in FEATURES order
+        language (str): Language for the summaries ('en' or 'de')
+        
+    Returns:
+        list: Score dicts with overall score, category scores and summary
+    """
+    if not features:
+        return []
+    
+    if np is None:
+        return [_score_row(row, language) for row in features]
+    
+    matrix = np.asarray(features, dtype=np.int64)
+    achievements, skills, education, bullets, sections, grammar, words = matrix.T
+    
+    # Content: 5 points per achievement (max 20), 10 each for skills and education
+    content = np.minimum(achievements * 5, 20) + skills * 10 + education * 10
+    # Format: 2 points per bullet (max 15), 3 points per section (max 15)
+    format_ = np.minimum(bullets * 2, 15) + np.minimum(sections * 3, 15)
+    # Language: 15 points minus 5 per grammar error
+    language_ = np.maximum(0, 15 - grammar * 5)
+    # Conciseness: full points for 300-600 words
+    conciseness = np.where(
+        words < 300, words / 300 * 15,
+        np.where(words <= 600, 15.0, np.maximum(0, 15 - (words - 600) / 100))
+    )
+    
+    overall = (content * 0.4) + (format_ * 0.3) + (language_ * 0.15) + (conciseness * 0.15)
+    overall = np.round(overall).astype(int)
+    categories = np.round(np.stack([
+        content * 100 / 40,
+        format_ * 100 / 30,
+        language_ * 100 / 15,
+        conciseness * 100 / 15
+    ], axis=1)).astype(int)
+    
+    return [
+        {
+            "overall": int(overall[index]),
+            "categories": {
+                "content": int(categories[index, 0]),
+                "format": int(categories[index, 1]),
+                "language": int(categories[index, 2]),
+                "conciseness": int(categories[index, 3])
+            },
+            "summary": get_score_summary(int(overall[index]), language)
+        }
+        for index in range(len(overall))
+    ]
+
+
+def _score_row(row, language):
+    # Plain Python version of score_features() for a single row
+    achievements, skills, education, bullets, sections, grammar, words = row
+    
+    content = min(achievements * 5, 20) + skills * 10 + education * 10
+    format_ = min(bullets * 2, 15) + min(sections * 3, 15)
+    language_ = max(0, 15 - grammar * 5)
+    if 300 <= words <= 600:
+        conciseness = 15
+    elif words < 300:
+        conciseness = words / 300 * 15
+    else:
+        conciseness = max(0, 15 - (words - 600) / 100)
+    
+    overall = (content * 0.4) + (format_ * 0.3) + (language_ * 0.15) + (conciseness * 0.15)
+    return {
+        "overall": round(overall),
+        "categories": {
+            "content": round(content * 100 / 40),
+            "format": round(format_ * 100 / 30),
+            "language": round(language_ * 100 / 15),
+            "conciseness": round(conciseness * 100 / 15)
+        },
+        "summary": get_score_summary(round(overall), language)
+    }
+
+
+def score_many(texts, language='en'):
+    """
+    Score many CVs with the rule-based scorer.
+    
+    Features are extracted with precompiled patterns and the weights are
+    applied to all CVs at once, which suits offline re-scoring of archives.
+    
+    Args:
+        texts (iterable): CV texts
+        language (str): Language for the summaries ('en' or 'de')
+        
+    Returns:
+        list: Score dicts in the order of texts
+    """
+    return score_features([extract_features(text) for text in texts], language)
+
+
+def get_score_summary(score, language='en'):
+    """
+    Get a summary message based on the overall score.
+    
+    Args:
+        score (int): The overall score (0-100)
+        language (str): Language for the summary ('en' or 'de')
+        
+    Returns:
+        str: A summary message
+    """
+    if language == 'de':
+        if score >= 90:
+            return "Ausgezeichneter Lebenslauf, der deutsche Standards hervorragend erfüllt. Sofort einsatzbereit."
+        elif score >= 80:
+            return "Sehr guter Lebenslauf mit wenigen Verbesserungsmöglichkeiten."
+        elif score >= 70:
+            return "Guter Lebenslauf, der grundlegende Anforderungen erfüllt, aber noch optimiert werden kann."
+        elif score >= 60:
+            return "Solider Lebenslauf mit mehreren Verbesserungsmöglichkeiten."
+        elif score >= 50:
+            return "Durchschnittlicher Lebenslauf, der deutliche Überarbeitung benötigt."
+        elif score >= 40:
+            return "Schwacher Lebenslauf, der erhebliche Verbesserungen erfordert."
+        elif score >= 30:
+            return "Unzureichender Lebenslauf mit grundlegenden Mängeln."
+        else:
+            return "Kritisch mangelhafter Lebenslauf, der eine komplette Überarbeitung benötigt."
+    else:  # default to English
+        if score >= 90:
+            return "Excellent CV that meets German standards exceptionally well. Ready for immediate use."
+        elif score >= 80:
+            return "Very good CV with few areas for improvement."
+        elif score >= 70:
+            return "Good CV that meets basic requirements but can still be optimized."
+        elif score >= 60:
+            return "Solid CV with several areas for improvement."
+        elif score >= 50:
+            return "Average CV that needs significant revision."
+        elif score >= 40:
+            return "Weak CV that requires substantial improvements."
+        elif score >= 30:
+            return "Insufficient CV with fundamental deficiencies."
+        else:
+            return "Critical deficiencies in CV, requires complete revision."
@@ -0,0 +1,354 @@
+import hashlib
+import logging
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+
+# Session store configuration
+SESSION_STORE_PATH = os.environ.get(
+    "SESSION_STORE_PATH", os.path.join(tempfile.gettempdir(), 'resume_sessions.sqlite3'))
+SESSION_TTL = int(os.environ.get("SESSION_TTL", str(24 * 3600)))  # seconds of inactivity before a session expires
+SESSION_INLINE_LIMIT = int(os.environ.get("SESSION_INLINE_LIMIT", "512"))  # larger values go to the blob table
+SESSION_VACUUM_INTERVAL = int(os.environ.get("SESSION_VACUUM_INTERVAL", "600"))  # seconds between cleanups
+SESSION_COMPRESSION_LEVEL = 6
+
+# Expiry is only pushed back when at least this share of the TTL has passed, so reads don't write
+SESSION_REFRESH_FRACTION = 0.1
+
+
+class SQLiteSession(SessionMixin):
+    """
+    Server-side session whose values are loaded lazily and tracked per key.
+    
+    Small values are loaded with the session; large values (CV text,
+    corrections) stay in the blob table until a request reads them. Only
+    keys that were set or deleted are written back.
+    """
+    
+    def __init__(self, store, sid, items=None, expires_at=None, new=False):
+        self.store = store
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.accessed = False
+        self._values = {}
+        self._digests = {}  # key -> digest of the stored value
+        self._pending = {}  # key -> digest of a blob not loaded yet
+        self._dirty = set()
+        self._deleted = set()
+        
+        for key, digest, inline in items or []:
+            self._digests[key] = digest
+            if inline is not None:
+                self._values[key] = session_json_serializer.loads(inline)
+            else:
+                self._pending[key] = digest
+    
+    def __getitem__(self, key):
+        self.accessed = True
+        if key in self._pending:
+            self._values[key] = self.store.load_blob(self._pending.pop(key))
+        return self._values[key]
+    
+    def __setitem__(self, key, value):
+        self.accessed = True
+        self.modified = True
+        self._pending.pop(key, None)
+        self._values[key] = value
+        self._dirty.add(key)
+        self._deleted.discard(key)
+    
+    def __delitem__(self, key):
+        if key not in self._values and key not in self._pending:
+            raise KeyError(key)
+        self.accessed = True
+        self.modified = True
+        self._values.pop(key, None)
+        self._pending.pop(key, None)
+        self._dirty.discard(key)
+        self._deleted.add(key)
+    
+    def __contains__(self, key):
+        self.accessed = True
+        return key in self._values or key in self._pending
+    
+    def __iter__(self):
+        self.accessed = True
+        return iter(list(self._values) + list(self._pending))
+    
+    def __len__(self):
+        return len(self._values) + len(self._pending)
+    
+    def changes(self):
+        """
+        Get the keys to write and delete.
+        
+        If `modified` was set by hand after changing a value in place, every
+        loaded key is written; its content hash keeps unchanged blobs shared.
+        
+        Returns:
+            tuple: (dict of key -> value to write, set of keys to delete)
+        """
+        keys = self._dirty if self._dirty or self._deleted else set(self._values)
+        return {key: self._values[key] for key in keys}, set(self._deleted)
+
+
+class SQLiteSessionStore:
+    """
+    Session storage in a SQLite database shared by all gunicorn workers.
+    
+    Values are serialized with Flask's tagged JSON serializer. Values up to
+    `inline_limit` bytes are kept in the session row; larger ones are stored
+    once per content hash, zlib-compressed, and the session only holds the
+    hash. Sessions expire after `ttl` seconds without a write, and a periodic
+    vacuum deletes expired sessions and blobs no session refers to.
+    """
+    
+    def __init__(self, path, ttl=SESSION_TTL, inline_limit=SESSION_INLINE_LIMIT,
+                 vacuum_interval=SESSION_VACUUM_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.inline_limit = inline_limit
+        self.vacuum_interval = vacuum_interval
+        self._local = threading.local()
+        self._vacuum_lock = threading.Lock()
+        self._last_vacuum = time.monotonic()
+        
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")  # only takes effect on a new database
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_items ("
+            " sid TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " inline TEXT,"
+            " PRIMARY KEY (sid, key))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " digest TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS session_items_digest ON session_items (digest)")
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires_at)")
+    
+    def _connect(self):
+        # One connection per thread; WAL lets readers proceed while another worker writes
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def open(self, sid):
+        """
+        Load a session, or start a new one if it is unknown or expired.
+        
+        Args:
+            sid (str): Session id from the cookie, or None
+        
+        Returns:
+            SQLiteSession: The session
+        """
+        conn = self._connect()
+        if sid:
+            row = conn.execute("SELECT expires_at FROM sessions WHERE sid = ?", (sid,)).fetchone()
+            if row and row[0] > time.time():
+                items = conn.execute(
+                    "SELECT key, digest, inline FROM session_items WHERE sid = ?", (sid,)).fetchall()
+                return SQLiteSession(self, sid, items, expires_at=row[0])
+        
+        return SQLiteSession(self, secrets.token_urlsafe(32), new=True)
+    
+    def load_blob(self, digest):
+        """
+        Load a large session value by its content hash.
+        
+        Args:
+            digest (str): SHA-256 of the serialized value
+        
+        Returns:
+            The deserialized value
+        """
+        row = self._connect().execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return session_json_serializer.loads(zlib.decompress(row[0]).decode('utf-8'))
+    
+    def save(self, session):
+        """
+        Write the changed keys of a session and push back its expiry.
+        
+        Args:
+            session (SQLiteSession): The session to save
+        
+        Returns:
+            bool: True if the expiry was pushed back, so the cookie should be refreshed
+        """
+        now = time.time()
+        values, deleted = session.changes() if session.modified else ({}, set())
+        refresh = session.new or session.expires_at - now < self.ttl * (1 - SESSION_REFRESH_FRACTION)
+        if not values and not deleted and not refresh:
+            return False
+        
+        rows = []
+        blobs = []
+        for key, value in values.items():
+            serialized = session_json_serializer.dumps(value)
+            digest = hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+            if digest == session._digests.get(key):
+                continue
+            if len(serialized) <= self.inline_limit:
+                rows.append((session.sid, key, digest, serialized))
+            else:
+                rows.append((session.sid, key, digest, None))
+                blobs.append((digest, serialized))
+        
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for digest, serialized in blobs:
+                if conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is None:
+                    data = zlib.compress(serialized.encode('utf-8'), SESSION_COMPRESSION_LEVEL)
+                    conn.execute("INSERT INTO blobs (digest, data, size) VALUES (?, ?, ?)",
+                                 (digest, data, len(data)))
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_items (sid, key, digest, inline) VALUES (?, ?, ?, ?)", rows)
+            conn.executemany("DELETE FROM session_items WHERE sid = ? AND key = ?",
+                             [(session.sid, key) for key in deleted])
+            if refresh or session.new:
+                session.expires_at = now + self.ttl
+                conn.execute("INSERT OR REPLACE INTO sessions (sid, expires_at) VALUES (?, ?)",
+                             (session.sid, session.expires_at))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        for sid, key, digest, inline in rows:
+            session._digests[key] = digest
+        
+        self.maybe_vacuum()
+        return refresh
+    
+    def delete(self, sid):
+        """
+        Delete a session and all its values.
+        
+        Args:
+            sid (str): Session id
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM session_items WHERE sid = ?", (sid,))
+        conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+        conn.execute("COMMIT")
+    
+    def maybe_vacuum(self):
+        """Run vacuum() if this process hasn't done so for `vacuum_interval` seconds."""
+        if time.monotonic() - self._last_vacuum < self.vacuum_interval:
+            return
+        if not self._vacuum_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_vacuum = time.monotonic()
+            self.vacuum()
+        except sqlite3.Error as e:
+            logging.warning(f"Session vacuum failed: {str(e)}")
+        finally:
+            self._vacuum_lock.release()
+    
+    def vacuum(self):
+        """
+        Delete expired sessions and unreferenced blobs, and return free pages to the OS.
+        
+        Returns:
+            dict: Number of deleted sessions and blobs
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+            conn.execute("DELETE FROM session_items WHERE sid NOT IN (SELECT sid FROM sessions)")
+            blobs = conn.execute(
+                "DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM session_items)").rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        
+        conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if expired or blobs:
+            logging.info(f"Session vacuum removed {expired} expired sessions and {blobs} blobs")
+        return {"sessions": expired, "blobs": blobs}
+    
+    def stats(self):
+        """
+        Get the session store size for metrics.
+        
+        Returns:
+            dict: Session, item and blob counts and the compressed blob bytes
+        """
+        conn = self._connect()
+        sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        items = conn.execute("SELECT COUNT(*) FROM session_items").fetchone()[0]
+        blobs, blob_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {"sessions": sessions, "items": items, "blobs": blobs, "blob_bytes": blob_bytes}
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """Flask session interface that keeps sessions in a SQLiteSessionStore."""
+    
+    def __init__(self, store):
+        self.store = store
+    
+    def open_session(self, app, request):
+        return self.store.open(request.cookies.get(self.get_cookie_name(app)))
+    
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        
+        # Delete a session that was emptied during this request
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        
+        if session.accessed:
+            response.vary.add("Cookie")
+        
+        if self.store.save(session) or session.new:
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+                partitioned=self.get_cookie_partitioned(app)
+            )
+
+
+session_store = SQLiteSessionStore(SESSION_STORE_PATH)
@@ -0,0 +1,52 @@
+from cv_model import ParsedCV, detect_heading, parse_cv
+
+CV = (
+    "Erika Musterfrau\n"
+    "Profil\n"
+    "Entwicklerin mit 8 Jahren Erfahrung.\n"
+    "Berufserfahrung:\n"
+    "- 03/2019 - heute Senior Developer\n"
+    "- 2015 - 2019 Developer\n"
+    "Ausbildung\n"
+    "Master Informatik, TU Berlin\n"
+    "Kenntnisse\n"
+    "Python, SQL, Deutsch (Muttersprache)\n"
+)
+
+
+def test_headings_are_detected_case_and_colon_insensitive():
+    assert detect_heading("Berufserfahrung:") == "experience"
+    assert detect_heading("WORK  EXPERIENCE") == "experience"
+    assert detect_heading("Über mich") == "summary"
+    assert detect_heading("Senior Developer") is None
+
+
+def test_sections_span_from_heading_to_next_heading():
+    parsed = ParsedCV.from_text(CV)
+    assert [section["name"] for section in parsed.sections] == ["summary", "experience", "education", "skills"]
+    experience = parsed.sections[1]
+    assert CV[experience["start"]:].startswith("Berufserfahrung:")
+    assert experience["end"] == parsed.sections[2]["start"]
+    assert parsed.sections[-1]["end"] == len(CV)
+    assert parsed.section_text("education") == "Ausbildung\nMaster Informatik, TU Berlin"
+    assert parsed.section_text("projects") == ""
+
+
+def test_facts_are_extracted_once():
+    parsed = ParsedCV.from_text(CV)
+    assert len(parsed.bullets) == 2
+    assert parsed.dates == ["03/2019", "2015", "2019"]
+    assert set(parsed.skills["technical_skills"]) == {"Python", "SQL"}
+    assert parsed.skills["languages"] == ["Deutsch (Muttersprache)"]
+    assert parsed.word_count == len(CV.split())
+
+
+def test_dict_round_trip_restores_the_model():
+    parsed = ParsedCV.from_text(CV)
+    restored = ParsedCV.from_dict(CV, parsed.to_dict())
+    assert restored.to_dict() == parsed.to_dict()
+    assert restored.section_text("skills") == parsed.section_text("skills")
+
+
+def test_parse_cv_builds_each_text_once():
+    assert parse_cv(CV) is parse_cv(CV)
@@ -0,0 +1,138 @@
+import pytest
+
+import prompt_optimizer
+from prompt_optimizer import PackedText, count_tokens, is_contact_line, pack_text, packing_signature
+
+CV = (
+    "Max Mustermann\n"
+    "max@example.com | +49 151 2345678\n"
+    "Musterstraße 12, 10115 Berlin\n"
+    "\n"
+    "Profil\n"
+    "Erfahrener   Entwickler mit 10 Jahren Erfahrung.\n"
+    "Berufserfahrung\n"
+    "01/2019 - 12/2021  Senior Developer, ACME GmbH\n"
+    "- Steigerte die Performance um 30%\n"
+    "Max Mustermann - Lebenslauf\n"
+    "Seite 1 von 2\n"
+    "\f"
+    "Max Mustermann - Lebenslauf\n"
+    "- Leitete ein Team von 5 Entwicklern\n"
+    "Ausbildung\n"
+    "2010 - 2015 B.Sc. Informatik, TU Berlin\n"
+    "Kenntnisse\n"
+    "Python, Java, SQL\n"
+    "Seite 2 von 2\n"
+)
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Deterministic counts whether or not tiktoken is installed
+    monkeypatch.setattr(prompt_optimizer, "tiktoken", None)
+    monkeypatch.setattr(prompt_optimizer, "PROMPT_OPTIMIZER_ENABLED", True)
+
+
+def test_count_tokens_estimates_without_a_tokenizer():
+    assert count_tokens("") == 0
+    assert count_tokens("abcde") == 2
+
+
+def test_contact_lines_need_little_else_on_the_line():
+    assert is_contact_line("max@example.com | +49 151 2345678")
+    assert is_contact_line("Tel.: 0151 2345678")
+    assert is_contact_line("Musterstraße 12, 10115 Berlin")
+    assert is_contact_line("www.linkedin.com/in/max")
+    assert not is_contact_line("01/2019 - 12/2021 Senior Developer")
+    assert not is_contact_line("Wir suchen einen Entwickler (m/w/d). Kontakt: jobs@firma.de")
+    assert not is_contact_line("- Served 20000 users")
+    assert not is_contact_line("- Served 20000 Users")
+    assert not is_contact_line("Budget of 50000 EUR")
+    assert not is_contact_line("- Betreute 20000 Kunden")
+    assert not is_contact_line("20000 Kunden betreut")
+    assert is_contact_line("10115 Berlin")
+    assert is_contact_line("Hauptweg 3 | 60311 Frankfurt am Main")
+
+
+def test_furniture_and_contact_lines_are_dropped_and_whitespace_collapsed():
+    packed = pack_text(CV, 1000)
+    assert "@" not in packed.text
+    assert "Musterstraße" not in packed.text
+    assert "Seite" not in packed.text
+    assert "Lebenslauf" not in packed.text
+    assert "Erfahrener Entwickler mit" in packed.text
+    assert "- Leitete ein Team von 5 Entwicklern" in packed.text
+    assert packed.tokens <= packed.original_tokens
+
+
+def test_offsets_point_at_the_same_characters():
+    packed = pack_text(CV, 1000)
+    assert len(packed.offsets) == len(packed.text)
+    for index, char in enumerate(packed.text):
+        if not char.isspace():
+            assert CV[packed.offsets[index]] == char
+
+
+def test_to_original_maps_spans_with_collapsed_whitespace():
+    packed = pack_text(CV, 1000)
+    start = packed.text.index("Erfahrener Entwickler")
+    original_start, original_end = packed.to_original(start, start + len("Erfahrener Entwickler"))
+    assert CV[original_start:original_end] == "Erfahrener   Entwickler"
+
+
+def test_to_original_rejects_spans_across_dropped_lines():
+    text = "Senior engineer at ACME\nmax@example.com | +49 170 1234567\nled a team"
+    packed = pack_text(text, 1000)
+    assert packed.text == "Senior engineer at ACME\nled a team"
+    assert packed.to_original(0, len(packed.text)) is None
+    assert packed.to_original(0, 23) == (0, 23)
+    
+    # Lines separated by whitespace only still map to one range
+    packed = pack_text("first line\n\n   second line", 1000, use_sections=False)
+    assert packed.to_original(0, len(packed.text)) == (0, len("first line\n\n   second line"))
+
+
+def test_budget_keeps_high_priority_sections_in_original_order():
+    packed = pack_text(CV, 50)
+    assert packed.tokens <= 50
+    assert "Steigerte die Performance" in packed.text
+    assert "Python, Java, SQL" in packed.text
+    assert "B.Sc. Informatik" not in packed.text
+    assert packed.text.index("Berufserfahrung") < packed.text.index("Kenntnisse")
+
+
+def test_headings_are_not_kept_without_content():
+    packed = pack_text(CV, 22)
+    lines = packed.text.split("\n")
+    for heading in ("Profil", "Ausbildung", "Kenntnisse"):
+        if heading in lines:
+            assert lines.index(heading) + 1 < len(lines)
+
+
+def test_single_line_text_over_budget_is_cut_at_a_word_boundary():
+    text = " ".join(["Led the migration of billing services to Kubernetes."] * 100)
+    packed = pack_text(text, 100)
+    assert 0 < packed.tokens <= 100
+    assert len(packed.text) > 300
+    assert text.startswith(packed.text)
+    assert text[len(packed.text)] == " "
+    assert packed.to_original(0, len(packed.text)) == (0, len(packed.text))
+
+
+def test_disabled_optimizer_returns_the_text_unchanged(monkeypatch):
+    monkeypatch.setattr(prompt_optimizer, "PROMPT_OPTIMIZER_ENABLED", False)
+    packed = pack_text(CV, 10)
+    assert packed.text == CV
+    assert packed.to_original(3, 9) == (3, 9)
+    assert packing_signature(10) == "unpacked"
+
+
+def test_packing_signature_changes_with_budget_and_tokenizer():
+    assert packing_signature(900) != packing_signature(1000)
+    assert packing_signature(900).startswith("chars/")
+
+
+def test_identity_wraps_text():
+    packed = PackedText.identity("abc")
+    assert packed.offsets == [0, 1, 2]
+    assert packed.to_original(0, 3) == (0, 3)
@@ -0,0 +1,170 @@
+import pytest
+
+import rate_limiter
+from circuit_breaker import CircuitBreaker
+from rate_limiter import (RateLimitTimeout, TokenBucketLimiter, estimate_tokens, parse_retry_after,
+                          rate_limit_wait)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def time(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class Response:
+    def __init__(self, status_code, headers=None, usage=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.usage = usage
+
+
+class Usage:
+    def __init__(self, total_tokens):
+        self.total_tokens = total_tokens
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter.time, "time", clock.time)
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock.time)
+    monkeypatch.setattr(rate_limiter.time, "sleep", clock.sleep)
+    return clock
+
+
+def make_limiter(tmp_path, **kwargs):
+    return TokenBucketLimiter(str(tmp_path / "buckets.sqlite3"), enabled=True, **kwargs)
+
+
+def test_parse_retry_after_seconds_and_groq_reset_headers():
+    assert parse_retry_after({"retry-after": "12"}) == 12.0
+    assert parse_retry_after({"x-ratelimit-reset-requests": "2m59.5s"}) == pytest.approx(179.5)
+    assert parse_retry_after({"x-ratelimit-reset-tokens": "7.66s",
+                              "x-ratelimit-reset-requests": "250ms"}) == pytest.approx(7.66)
+    assert parse_retry_after({"x-ratelimit-reset-tokens": "1h"}) == 3600
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({}) is None
+    assert parse_retry_after(None) is None
+
+
+def test_rate_limit_wait_only_for_429():
+    assert rate_limit_wait(Response(200)) is None
+    assert rate_limit_wait(Response(429)) == 0.0
+    assert rate_limit_wait(Response(429, {"retry-after": "3"})) == 3.0
+
+
+def test_estimate_reserves_the_expected_completion(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "GROQ_COMPLETION_TOKENS", 600)
+    messages = [{"role": "user", "content": "x" * 400}]
+    prompt = 400 // rate_limiter.CHARS_PER_TOKEN + rate_limiter.MESSAGE_OVERHEAD_TOKENS
+    assert estimate_tokens(messages, 2000) == prompt + 600
+    assert estimate_tokens(messages, 100) == prompt + 100
+    assert estimate_tokens(None) == 0
+
+
+def test_buckets_refill_linearly(tmp_path, clock):
+    limiter = make_limiter(tmp_path, requests_per_minute=60, tokens_per_minute=600)
+    assert limiter._try_take(600) == 0.0
+    # Empty token bucket refills at 10 tokens per second
+    assert limiter._try_take(300) == pytest.approx(30.0)
+    clock.now += 30
+    assert limiter._try_take(300) == 0.0
+    assert limiter.stats()["tokens_available"] == 0.0
+
+
+def test_oversized_calls_wait_for_a_full_bucket(tmp_path, clock):
+    limiter = make_limiter(tmp_path, requests_per_minute=60, tokens_per_minute=600)
+    assert limiter._try_take(5000) == 0.0
+    assert limiter._try_take(5000) == pytest.approx(60.0)
+
+
+def test_acquire_times_out_when_capacity_comes_too_late(tmp_path, clock):
+    limiter = make_limiter(tmp_path, requests_per_minute=1, max_wait=10)
+    limiter.acquire(1, clock.now + 10)
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(1, clock.now + 10)
+    assert limiter.stats()["timeouts"] == 1
+
+
+def test_settle_returns_unused_and_charges_extra_tokens(tmp_path, clock):
+    limiter = make_limiter(tmp_path, tokens_per_minute=6000)
+    limiter._try_take(1000)
+    limiter.settle(1000, 400)
+    assert limiter.stats()["tokens_available"] == 5600
+    limiter.settle(400, 2400)
+    assert limiter.stats()["tokens_available"] == 3600
+
+
+def test_429_blocks_the_buckets_and_retries(tmp_path, clock):
+    limiter = make_limiter(tmp_path, max_wait=30, retries=2)
+    outcomes = [Response(429, {"retry-after": "5"}), Response(200, usage=Usage(10))]
+    calls = []
+    
+    def api(**kwargs):
+        calls.append(clock.now)
+        return outcomes.pop(0)
+    
+    result = limiter.call(api, messages=[{"content": "hi"}])
+    assert result.status_code == 200
+    assert calls[1] - calls[0] >= 5
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_local_timeouts_are_not_breaker_failures(tmp_path, clock):
+    limiter = make_limiter(tmp_path, requests_per_minute=1, max_wait=1)
+    breaker = CircuitBreaker("test", min_calls=1)
+    limiter.call(lambda **kwargs: "ok", messages=[], breaker=breaker)
+    with pytest.raises(RateLimitTimeout):
+        limiter.call(lambda **kwargs: "ok", messages=[{"content": "other"}], breaker=breaker)
+    assert breaker.stats()["total_calls"] == 1
+    assert breaker.stats()["total_failures"] == 0
+
+
+class RateLimitError(Exception):
+    status_code = 429
+    
+    def __init__(self):
+        super().__init__("rate limited")
+        self.response = Response(429, {"retry-after": "2"})
+
+
+def test_retried_429s_are_not_breaker_failures(tmp_path, clock):
+    limiter = make_limiter(tmp_path, max_wait=60, retries=3)
+    breaker = CircuitBreaker("test", min_calls=1)
+    outcomes = [Response(429, {"retry-after": "2"}), RateLimitError(), Response(429, {"retry-after": "2"}),
+                Response(200, usage=Usage(10))]
+    
+    def api(**kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    result = limiter.call(api, messages=[], breaker=breaker,
+                          is_failure=lambda response: response.status_code in (429, 500))
+    assert result.status_code == 200
+    assert limiter.stats()["rate_limited"] == 3
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.stats()["total_calls"] == 1
+    assert breaker.stats()["total_failures"] == 0
+
+
+def test_stream_failures_are_recorded_when_the_stream_breaks(tmp_path, clock):
+    limiter = make_limiter(tmp_path)
+    breaker = CircuitBreaker("test", min_calls=1)
+    
+    def stream(**kwargs):
+        yield "Sehr geehrte"
+        raise ConnectionError("stream closed")
+    
+    chunks = limiter.call(stream, messages=[], stream=True, breaker=breaker)
+    assert breaker.stats()["total_calls"] == 0
+    with pytest.raises(ConnectionError):
+        list(chunks)
+    assert breaker.stats()["total_failures"] == 1
@@ -0,0 +1,69 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import resume_parser
+from result_cache import ResultCache
+from resume_parser import ParserPool, parse_resume_upload
+
+
+def slow_job(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+@pytest.fixture
+def pool():
+    pool = ParserPool(workers=1, max_pending=4, timeout=1.5)
+    yield pool
+    if pool._executor is not None:
+        pool._executor.shutdown(cancel_futures=True)
+
+
+def run_all(pool, jobs):
+    with ThreadPoolExecutor(max_workers=len(jobs)) as threads:
+        futures = []
+        for seconds, value in jobs:
+            futures.append(threads.submit(pool.run, slow_job, seconds, value))
+            time.sleep(0.05)  # submit in order
+        return [future.exception() or future.result() for future in futures]
+
+
+def test_queued_jobs_are_timed_from_their_start(pool):
+    pool.run(slow_job, 0, "warm")
+    results = run_all(pool, [(1, "a"), (1, "b"), (1, "c"), (0, "d")])
+    assert results == ["a", "b", "c", "d"]
+    assert pool.stats()["timeouts"] == 0
+    assert pool.stats()["restarts"] == 0
+
+
+def test_a_job_over_the_timeout_does_not_fail_the_jobs_behind_it(pool):
+    pool.run(slow_job, 0, "warm")
+    results = run_all(pool, [(10, "hangs"), (0, "b"), (0, "c")])
+    assert isinstance(results[0], Exception)
+    assert "longer than" in str(results[0])
+    assert results[1:] == ["b", "c"]
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["completed"] == 3
+    assert stats["failed"] == 1
+
+
+@pytest.mark.parametrize("timed_out", [False, True])
+def test_pdfs_cut_short_by_the_time_budget_are_not_cached(monkeypatch, tmp_path, timed_out):
+    parses = []
+    
+    def parse_pdf_pages(stream):
+        parses.append(stream)
+        return {"text": "Erfahrung\f", "pages": [], "stopped": "time budget" if timed_out else None,
+                "timed_out": timed_out}
+    
+    monkeypatch.setattr(resume_parser, "PARSER_POOL_ENABLED", False)
+    monkeypatch.setattr(resume_parser, "parse_pdf_pages", parse_pdf_pages)
+    monkeypatch.setattr(resume_parser, "parse_cache", ResultCache(str(tmp_path / "parse.sqlite3"), ttl=60))
+    
+    for _ in range(2):
+        assert parse_resume_upload(io.BytesIO(b"%PDF-1.7 ..."), "cv.pdf") == "Erfahrung\f"
+    assert len(parses) == (2 if timed_out else 1)
@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+
+import scoring
+from cv_model import ParsedCV
+
+CV = (
+    "EXPERIENCE\n"
+    "- Increased sales by 25% in two years\n"
+    "- Led a team of 6 engineers\n"
+    "EDUCATION\n"
+    "Master of Science, University of Munich\n"
+    "SKILLS\n"
+    "Python, SQL. I has a engineering degree.\n"
+)
+
+# Feature rows around every cap and conciseness threshold
+FEATURE_GRID = [
+    list(row) for row in itertools.product(
+        [0, 3, 4, 7],        # achievements
+        [0, 1],              # skills mentioned
+        [0, 1],              # education mentioned
+        [0, 7, 8],           # bullets
+        [0, 4, 5, 9],        # section headers
+        [0, 1, 3, 4],        # grammar errors
+        [0, 150, 299, 300, 450, 600, 601, 750, 2200],  # word count
+    )
+]
+
+
+def test_score_row_applies_the_weights():
+    # content 20+10+10, format 15+15, language 15, conciseness 15, weighted 40/30/15/15%
+    score = scoring._score_row([4, 1, 1, 8, 5, 0, 450], 'en')
+    assert score["overall"] == round(40 * 0.4 + 30 * 0.3 + 15 * 0.15 + 15 * 0.15)
+    assert score["categories"] == {"content": 100, "format": 100, "language": 100, "conciseness": 100}
+    
+    score = scoring._score_row([0, 0, 0, 0, 0, 3, 0], 'en')
+    assert score["overall"] == 0
+    assert score["categories"]["language"] == 0
+
+
+def test_conciseness_falls_off_outside_300_to_600_words():
+    conciseness = [scoring._score_row([0, 0, 0, 0, 0, 0, words], 'en')["categories"]["conciseness"]
+                   for words in (150, 300, 600, 750, 2200)]
+    assert conciseness == [50, 100, 100, 90, 0]
+
+
+def test_parsed_cv_features_match_text_features():
+    assert scoring.features_from_parsed_cv(ParsedCV.from_text(CV)) == scoring.extract_features(CV)
+
+
+def test_extract_features_counts_each_grammar_pattern():
+    features = dict(zip(scoring.FEATURES, scoring.extract_features(CV)))
+    assert features["achievements"] == 2
+    assert features["skills_mentioned"] == 1
+    assert features["education_mentioned"] == 1
+    assert features["bullets"] == 2
+    assert features["grammar_errors"] == 2  # "I has" and "a engineering"
+
+
+def test_pure_python_fallback_matches_score_row(monkeypatch):
+    monkeypatch.setattr(scoring, "np", None)
+    assert scoring.score_features(FEATURE_GRID, 'de') == [scoring._score_row(row, 'de') for row in FEATURE_GRID]
+
+
+def test_numpy_scores_match_score_row():
+    pytest.importorskip("numpy")
+    assert scoring.np is not None
+    assert scoring.score_features(FEATURE_GRID, 'en') == [scoring._score_row(row, 'en') for row in FEATURE_GRID]
+
+
+def test_score_many_keeps_input_order():
+    texts = [CV, "", "word " * 450]
+    scores = scoring.score_many(texts)
+    assert [score["overall"] for score in scores] == [
+        scoring._score_row(scoring.extract_features(text), 'en')["overall"] for text in texts]
+    assert scoring.score_features([]) == []
@@ -0,0 +1,101 @@
+import zlib
+
+import pytest
+
+pytest.importorskip("flask")
+
+import session_store
+from session_store import SQLiteSessionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl=3600, inline_limit=64,
+                              vacuum_interval=3600)
+
+
+def save_values(store, session, **values):
+    for key, value in values.items():
+        session[key] = value
+    return store.save(session)
+
+
+def test_small_values_inline_and_large_values_as_compressed_blobs(store):
+    session = store.open(None)
+    save_values(store, session, language="de", resume_text="Berufserfahrung " * 100)
+    
+    rows = dict((key, inline) for key, inline in store._connect().execute(
+        "SELECT key, inline FROM session_items WHERE sid = ?", (session.sid,)))
+    assert rows["language"] == '"de"'
+    assert rows["resume_text"] is None
+    
+    data, size = store._connect().execute("SELECT data, size FROM blobs").fetchone()
+    assert size == len(data) < len("Berufserfahrung " * 100)
+    assert zlib.decompress(data).decode("utf-8") == '"' + "Berufserfahrung " * 100 + '"'
+
+
+def test_blobs_load_lazily_and_round_trip(store, monkeypatch):
+    session = store.open(None)
+    corrections = [{"original": "teh", "suggestion": "the", "position": {"start": 0, "end": 3}}] * 5
+    save_values(store, session, language="en", corrections=corrections)
+    
+    loads = []
+    load_blob = store.load_blob
+    monkeypatch.setattr(store, "load_blob", lambda digest: loads.append(digest) or load_blob(digest))
+    
+    reopened = store.open(session.sid)
+    assert reopened["language"] == "en"
+    assert loads == []
+    assert reopened["corrections"] == corrections
+    assert len(loads) == 1
+
+
+def test_identical_large_values_share_one_blob(store):
+    text = "Lebenslauf " * 50
+    for _ in range(3):
+        save_values(store, store.open(None), resume_text=text)
+    assert store.stats()["blobs"] == 1
+    assert store.stats()["items"] == 3
+
+
+def test_only_changed_keys_are_written(store):
+    session = store.open(None)
+    save_values(store, session, a="1", b="2")
+    reopened = store.open(session.sid)
+    reopened["a"] = "1"
+    del reopened["b"]
+    reopened["c"] = "3"
+    store.save(reopened)
+    final = store.open(session.sid)
+    assert dict((key, final[key]) for key in final) == {"a": "1", "c": "3"}
+
+
+def test_expiry_is_pushed_back_only_after_the_refresh_fraction(store, monkeypatch):
+    clock = [10000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    session = store.open(None)
+    assert save_values(store, session, a="1") is True
+    expires_at = session.expires_at
+    
+    clock[0] += 3600 * session_store.SESSION_REFRESH_FRACTION / 2
+    reopened = store.open(session.sid)
+    assert store.save(reopened) is False
+    assert reopened.expires_at == expires_at
+    
+    clock[0] += 3600 * session_store.SESSION_REFRESH_FRACTION
+    reopened = store.open(session.sid)
+    assert store.save(reopened) is True
+    assert reopened.expires_at == clock[0] + 3600
+
+
+def test_expired_sessions_reopen_empty_and_vacuum_removes_them(store, monkeypatch):
+    clock = [10000.0]
+    monkeypatch.setattr(session_store.time, "time", lambda: clock[0])
+    session = store.open(None)
+    save_values(store, session, resume_text="x" * 500)
+    
+    clock[0] += 3601
+    reopened = store.open(session.sid)
+    assert reopened.new and reopened.sid != session.sid
+    assert store.vacuum() == {"sessions": 1, "blobs": 1}
+    assert store.stats() == {"sessions": 0, "items": 0, "blobs": 0, "blob_bytes": 0}
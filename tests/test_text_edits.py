@@ -0,0 +1,53 @@
+from text_edits import apply_edits, map_span
+
+
+def edit(start, end, suggestion):
+    return {"position": {"start": start, "end": end}, "suggestion": suggestion}
+
+
+def test_edits_apply_in_text_order_regardless_of_input_order():
+    text = "I has led a team"
+    new_text, conflicts, offset_map = apply_edits(text, [edit(10, 11, "the"), edit(2, 5, "have")])
+    assert new_text == "I have led the team"
+    assert conflicts == []
+    assert offset_map == [
+        {"start": 2, "end": 5, "new_start": 2, "new_end": 6},
+        {"start": 10, "end": 11, "new_start": 11, "new_end": 14},
+    ]
+
+
+def test_overlapping_edit_is_reported_not_applied():
+    text = "responsible for sales"
+    new_text, conflicts, _ = apply_edits(text, [edit(0, 15, "led"), edit(12, 21, "for revenue")])
+    assert new_text == "led sales"
+    assert conflicts == [{"index": 1, "reason": "overlap"}]
+
+
+def test_same_span_is_duplicate_or_conflict():
+    text = "teh team"
+    corrections = [edit(0, 3, "the"), edit(0, 3, "the"), edit(0, 3, "a")]
+    new_text, conflicts, _ = apply_edits(text, corrections)
+    assert new_text == "the team"
+    assert conflicts == [{"index": 1, "reason": "duplicate"}, {"index": 2, "reason": "conflict"}]
+
+
+def test_out_of_range_edits_are_skipped():
+    new_text, conflicts, _ = apply_edits("short", [edit(3, 10, "x"), edit(4, 2, "y")])
+    assert new_text == "short"
+    assert conflicts == [{"index": 0, "reason": "out of range"}, {"index": 1, "reason": "out of range"}]
+
+
+def test_map_span_shifts_spans_after_edits():
+    text = "I has led a team of five"
+    new_text, _, offset_map = apply_edits(text, [edit(2, 5, "have"), edit(10, 11, "the")])
+    start, end = text.index("five"), text.index("five") + 4
+    new_start, new_end = map_span(offset_map, start, end)
+    assert new_text[new_start:new_end] == "five"
+    assert map_span(offset_map, 0, 1) == (0, 1)
+
+
+def test_map_span_rejects_spans_touching_an_edit():
+    _, _, offset_map = apply_edits("I has led a team", [edit(2, 5, "have")])
+    assert map_span(offset_map, 4, 8) is None
+    assert map_span(offset_map, 0, 3) is None
+    assert map_span(offset_map, 5, 9) == (6, 10)
@@ -0,0 +1,42 @@
+from text_index import TextIndex
+
+
+def test_exact_match_keeps_original_offsets():
+    text = "Led a team of 5 developers."
+    assert TextIndex(text).locate_all(["team of 5"]) == [(6, 15)]
+
+
+def test_fuzzy_match_ignores_case_and_whitespace():
+    text = "Responsible   for\n  the BUDGET"
+    span = TextIndex(text).locate_all(["responsible for the budget"])[0]
+    assert span == (0, len(text))
+    assert text[span[0]:span[1]] == text
+
+
+def test_exact_match_is_preferred_over_fuzzy():
+    text = "python basics\nPython Basics"
+    assert TextIndex(text).locate_all(["Python Basics"]) == [(14, 27)]
+
+
+def test_repeated_snippets_get_distinct_spans():
+    text = "managed projects; managed budgets; managed projects"
+    spans = TextIndex(text).locate_all(["managed projects", "managed projects", "managed projects"])
+    assert spans[0] == (0, 16)
+    assert spans[1] == (35, 51)
+    # More requests than occurrences fall back to the first occurrence
+    assert spans[2] == (0, 16)
+
+
+def test_unlocatable_and_empty_snippets_are_none():
+    assert TextIndex("Some CV text").locate_all(["missing phrase", "", "CV"]) == [None, None, (5, 7)]
+
+
+def test_short_snippets_use_the_plain_scan():
+    index = TextIndex("A B\nab")
+    assert index.fuzzy_occurrences("ab") == [(4, 6)]
+    assert index.fuzzy_occurrences("A  b") == [(0, 3)]
+
+
+def test_casefold_expansion_maps_back_to_the_source_character():
+    text = "Straße 5"
+    assert TextIndex(text).locate_all(["STRASSE"]) == [(0, 6)]
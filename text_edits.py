@@ -0,0 +1,95 @@
+import bisect
+
+
+def apply_edits(text, corrections):
+    """
+    Apply span replacements to a text in a single pass.
+    
+    Corrections are applied in order of their start position. An edit that
+    overlaps one already applied, or whose span lies outside the text, is
+    not applied and is reported as a conflict instead.
+    
+    Args:
+        text (str): The original text
+        corrections (list): Dicts with "position" {"start", "end"} and "suggestion"
+        
+    Returns:
+        tuple: (new_text, conflicts, offset_map). conflicts lists
+            {"index", "reason"} for every skipped correction, by its index in
+            the input. offset_map lists {"start", "end", "new_start", "new_end"}
+            for every applied edit, in text order.
+    """
+    order = sorted(
+        range(len(corrections)),
+        key=lambda i: (corrections[i]["position"]["start"], corrections[i]["position"]["end"], i)
+    )
+    
+    pieces = []
+    conflicts = []
+    offset_map = []
+    cursor = 0  # end of the last applied edit in the original text
+    new_length = 0
+    applied_spans = {}
+    
+    for index in order:
+        correction = corrections[index]
+        start = correction["position"]["start"]
+        end = correction["position"]["end"]
+        suggestion = correction.get("suggestion", "")
+        
+        if start < 0 or end > len(text) or start > end:
+            conflicts.append({"index": index, "reason": "out of range"})
+            continue
+        
+        if (start, end) in applied_spans:
+            reason = "duplicate" if applied_spans[(start, end)] == suggestion else "conflict"
+            conflicts.append({"index": index, "reason": reason})
+            continue
+        
+        if start < cursor:
+            conflicts.append({"index": index, "reason": "overlap"})
+            continue
+        
+        pieces.append(text[cursor:start])
+        new_length += start - cursor
+        pieces.append(suggestion)
+        offset_map.append({
+            "start": start,
+            "end": end,
+            "new_start": new_length,
+            "new_end": new_length + len(suggestion)
+        })
+        new_length += len(suggestion)
+        applied_spans[(start, end)] = suggestion
+        cursor = end
+    
+    pieces.append(text[cursor:])
+    conflicts.sort(key=lambda conflict: conflict["index"])
+    return "".join(pieces), conflicts, offset_map
+
+
+def map_span(offset_map, start, end):
+    """
+    Map a span of the original text to the edited text.
+    
+    Args:
+        offset_map (list): Offset map returned by apply_edits()
+        start (int): Start offset in the original text
+        end (int): End offset in the original text
+        
+    Returns:
+        tuple: (new_start, new_end), or None if the span overlaps an applied edit
+    """
+    starts = [edit["start"] for edit in offset_map]
+    
+    # Last edit that starts before the span ends
+    position = bisect.bisect_left(starts, end) - 1
+    if position >= 0 and offset_map[position]["end"] > start:
+        return None
+    
+    # Shift by the length change of all edits that end at or before the span start
+    delta = 0
+    if position >= 0:
+        edit = offset_map[position]
+        delta = edit["new_end"] - edit["end"]
+    return start + delta, end + delta
@@ -0,0 +1,145 @@
+import logging
+
+
+class TextIndex:
+    """
+    Per-request index for locating quoted snippets in a CV text.
+    
+    Holds a case-folded copy of the text with whitespace runs collapsed to a
+    single space, plus a map from every normalized character back to its
+    offsets in the original text. A trigram index over the normalized copy is
+    built on first use, so fuzzy lookups check only candidate positions
+    instead of rescanning the text.
+    """
+    
+    def __init__(self, text):
+        self.text = text
+        
+        normalized = []
+        self.start_map = []  # normalized index -> original start offset
+        self.end_map = []  # normalized index -> original end offset
+        in_space = False
+        for position, char in enumerate(text):
+            if char.isspace():
+                if not in_space and normalized:
+                    normalized.append(' ')
+                    self.start_map.append(position)
+                    self.end_map.append(position + 1)
+                in_space = True
+                continue
+            
+            in_space = False
+            for folded in char.casefold():
+                normalized.append(folded)
+                self.start_map.append(position)
+                self.end_map.append(position + 1)
+        
+        self.normalized = "".join(normalized)
+        self._trigrams = None
+    
+    @staticmethod
+    def normalize(snippet):
+        """
+        Normalize a snippet the same way as the indexed text.
+        
+        Args:
+            snippet (str): Text to normalize
+            
+        Returns:
+            str: Case-folded text with whitespace runs collapsed and stripped
+        """
+        return " ".join(snippet.casefold().split())
+    
+    def _trigram_index(self):
+        if self._trigrams is None:
+            trigrams = {}
+            normalized = self.normalized
+            for position in range(len(normalized) - 2):
+                trigrams.setdefault(normalized[position:position + 3], []).append(position)
+            self._trigrams = trigrams
+        return self._trigrams
+    
+    def exact_occurrences(self, snippet):
+        """
+        Find all exact occurrences of a snippet.
+        
+        Args:
+            snippet (str): Text to find
+            
+        Returns:
+            list: (start, end) offsets in the original text
+        """
+        spans = []
+        start = self.text.find(snippet)
+        while start != -1:
+            spans.append((start, start + len(snippet)))
+            start = self.text.find(snippet, start + 1)
+        return spans
+    
+    def fuzzy_occurrences(self, snippet):
+        """
+        Find all case- and whitespace-insensitive occurrences of a snippet.
+        
+        Args:
+            snippet (str): Text to find
+            
+        Returns:
+            list: (start, end) offsets in the original text
+        """
+        needle = self.normalize(snippet)
+        if not needle:
+            return []
+        
+        if len(needle) < 3:
+            candidates = []
+            start = self.normalized.find(needle)
+            while start != -1:
+                candidates.append(start)
+                start = self.normalized.find(needle, start + 1)
+        else:
+            candidates = [
+                position for position in self._trigram_index().get(needle[:3], [])
+                if self.normalized.startswith(needle, position)
+            ]
+        
+        return [
+            (self.start_map[position], self.end_map[position + len(needle) - 1])
+            for position in candidates
+        ]
+    
+    def locate_all(self, snippets):
+        """
+        Resolve the spans of several snippets in one batch.
+        
+        Exact matches are preferred over fuzzy ones. When a snippet occurs more
+        than once, each request gets the first occurrence that does not overlap
+        a span already assigned, so repeated phrases map to distinct places.
+        
+        Args:
+            snippets (list): Texts to locate, e.g. the "original" of each suggestion
+            
+        Returns:
+            list: (start, end) offsets per snippet, or None if it can't be located
+        """
+        assigned = []
+        spans = []
+        for snippet in snippets:
+            if not snippet:
+                spans.append(None)
+                continue
+            
+            candidates = self.exact_occurrences(snippet) or self.fuzzy_occurrences(snippet)
+            if not candidates:
+                logging.warning(f"Original text not found: {snippet[:30]}...")
+                spans.append(None)
+                continue
+            
+            span = next(
+                (candidate for candidate in candidates
+                 if all(candidate[1] <= start or candidate[0] >= end for start, end in assigned)),
+                candidates[0]
+            )
+            assigned.append(span)
+            spans.append(span)
+        
+        return spans